@@ -0,0 +1,91 @@
+"""Microbenchmark: legacy serialize_row + json vs the compiled row serializer.
+
+Runs on synthetic rows shaped like the maintenance_requests list query, so no
+database is needed:
+
+    cd backend && python -m benchmarks.bench_serialization --rows 100000
+"""
+import argparse
+import json
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from flask import Flask
+from mysql.connector.constants import FieldType
+
+from serializers import FastJSONProvider, compile_serializer, orjson
+
+DESCRIPTION = [
+    ('id', FieldType.LONG), ('subject', FieldType.VAR_STRING), ('equipment_id', FieldType.LONG),
+    ('team_id', FieldType.LONG), ('technician_id', FieldType.LONG), ('request_type', FieldType.STRING),
+    ('scheduled_date', FieldType.DATE), ('duration_hours', FieldType.NEWDECIMAL), ('status', FieldType.STRING),
+    ('created_at', FieldType.TIMESTAMP), ('updated_at', FieldType.TIMESTAMP),
+    ('equipment_name', FieldType.VAR_STRING), ('serial_number', FieldType.VAR_STRING),
+    ('team_name', FieldType.VAR_STRING), ('technician_name', FieldType.VAR_STRING),
+    ('technician_email', FieldType.VAR_STRING),
+]
+COLUMNS = [name for name, _ in DESCRIPTION]
+
+
+def legacy_serialize_row(row, columns):
+    # The per-cell enumerate/isinstance path the handlers used before.
+    result = {}
+    for i, col in enumerate(columns):
+        value = row[i]
+        if isinstance(value, (date, datetime)):
+            result[col] = value.isoformat()
+        else:
+            result[col] = value
+    return result
+
+
+def make_rows(count):
+    base = datetime(2024, 1, 1, 8, 0, 0)
+    statuses = ('New', 'In Progress', 'Repaired', 'Scrap')
+    rows = []
+    for i in range(count):
+        created = base + timedelta(minutes=i)
+        rows.append((
+            i, f'Inspect unit {i}', i % 10000, i % 12, i % 300, 'Preventive' if i % 3 else 'Corrective',
+            created.date() if i % 4 else None, Decimal('2.50') if i % 2 else None, statuses[i % 4],
+            created, created, f'Machine {i % 10000}', f'SN-{i % 10000:05d}', f'Team {i % 12}',
+            f'Technician {i % 300}', f'tech{i % 300}@gearguard.com',
+        ))
+    return rows
+
+
+def best_of(repeat, func):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    dumps = FastJSONProvider(Flask(__name__)).dumps
+    serialize = compile_serializer(DESCRIPTION)
+
+    legacy_rows, legacy_dicts = best_of(args.repeat, lambda: [legacy_serialize_row(row, COLUMNS) for row in rows])
+    legacy_json, _ = best_of(args.repeat, lambda: json.dumps(legacy_dicts, default=str))
+    fast_rows, fast_dicts = best_of(args.repeat, lambda: [serialize(row) for row in rows])
+    fast_json, _ = best_of(args.repeat, lambda: dumps(fast_dicts))
+
+    print(f"rows: {args.rows}  repeat: {args.repeat}  json backend: {'orjson' if orjson else 'stdlib json'}")
+    print(f"{'path':<10} {'rows->dict ms':>14} {'dict->json ms':>14} {'total ms':>10}")
+    for label, to_dict, to_json in (('legacy', legacy_rows, legacy_json), ('compiled', fast_rows, fast_json)):
+        print(f"{label:<10} {to_dict * 1000:>14.1f} {to_json * 1000:>14.1f} {(to_dict + to_json) * 1000:>10.1f}")
+    print(f"speedup: {(legacy_rows + legacy_json) / (fast_rows + fast_json):.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Compare two benchmarks.load result files and flag regressions.
+
+A scenario regresses when its p95 latency grows, or its throughput drops,
+by more than --threshold percent. Exits with status 1 if any scenario
+regressed, so it can gate CI:
+
+    cd backend && python -m benchmarks.compare benchmarks/results/base.json benchmarks/results/new.json
+"""
+import argparse
+import json
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def change(before, after):
+    """Relative change in percent, or None when it cannot be computed"""
+    if not before or after is None:
+        return None
+    return (after - before) / before * 100
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--threshold', type=float, default=10.0, help='allowed change in percent')
+    args = parser.parse_args()
+
+    baseline = load(args.baseline)
+    candidate = load(args.candidate)
+    if baseline['config'].get('concurrency') != candidate['config'].get('concurrency'):
+        print("warning: runs used different concurrency; numbers are not directly comparable")
+
+    regressions = []
+    print(f"{'scenario':<24} {'rps before':>11} {'rps after':>10} {'change':>8} "
+          f"{'p95 before':>11} {'p95 after':>10} {'change':>8}")
+    for name in sorted(set(baseline['scenarios']) & set(candidate['scenarios'])):
+        before = baseline['scenarios'][name]
+        after = candidate['scenarios'][name]
+        rps_change = change(before['throughput_rps'], after['throughput_rps'])
+        p95_change = change(before['latency_ms']['p95'], after['latency_ms']['p95'])
+        flag = ''
+        if (rps_change is not None and rps_change < -args.threshold) or \
+                (p95_change is not None and p95_change > args.threshold):
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f"{name:<24} {before['throughput_rps']:>11.1f} {after['throughput_rps']:>10.1f} "
+              f"{_percent(rps_change):>8} {before['latency_ms']['p95'] or 0:>11.2f} "
+              f"{after['latency_ms']['p95'] or 0:>10.2f} {_percent(p95_change):>8}{flag}")
+
+    missing = sorted(set(baseline['scenarios']) - set(candidate['scenarios']))
+    if missing:
+        print(f"not in candidate: {', '.join(missing)}")
+    if regressions:
+        raise SystemExit(f"{len(regressions)} scenario(s) regressed by more than {args.threshold:g}%")
+    print("No regressions")
+
+
+def _percent(value):
+    return f"{value:+.1f}%" if value is not None else 'n/a'
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,373 @@
+"""Load test the GearGuard API and save the results as JSON.
+
+Drives each /api/* scenario against a running server for a fixed time at a
+fixed concurrency (one keep-alive connection per client thread) and records
+throughput, latency percentiles, errors and, with --server-pid, the server
+process tree's resident memory. Ids used in paths are sampled from the API
+before the run, so any seeded database works (see benchmarks.seed).
+
+    cd backend && python -m benchmarks.load --url http://127.0.0.1:5000 --concurrency 16 --duration 10
+    cd backend && python -m benchmarks.load --only kanban,dashboard --server-pid $(pgrep -o gunicorn)
+    cd backend && python -m benchmarks.load --writes          # also POST/PATCH (mutates the database)
+
+Results go to benchmarks/results/<timestamp>.json; compare two runs with
+benchmarks.compare. The SSE stream and the CSV import are not driven:
+one is a long-lived connection and the other is covered by --writes bulk calls.
+"""
+import argparse
+import contextlib
+import http.client
+import itertools
+import json
+import math
+import os
+import platform
+import random
+import resource
+import string
+import subprocess
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from urllib.parse import quote, urlsplit
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+# (name, method, path template, body template or None); {placeholders} are
+# filled per call from the ids sampled in discover()
+READ_SCENARIOS = [
+    ('health', 'GET', '/api/', None),
+    ('teams', 'GET', '/api/teams', None),
+    ('team_technicians', 'GET', '/api/teams/{team_id}/technicians', None),
+    ('technicians', 'GET', '/api/technicians', None),
+    ('equipment_page', 'GET', '/api/equipment?limit=50', None),
+    ('equipment_by_team', 'GET', '/api/equipment?team_id={team_id}&limit=50&include_total=1', None),
+    ('equipment_by_id', 'GET', '/api/equipment/{equipment_id}', None),
+    ('maintenance_count', 'GET', '/api/equipment/{equipment_id}/maintenance_count', None),
+    ('maintenance_counts', 'GET', '/api/equipment/maintenance_counts?ids={equipment_ids}', None),
+    ('requests_page', 'GET', '/api/requests?limit=50', None),
+    ('requests_filtered', 'GET', '/api/requests?status=New,In%20Progress&team_id={team_id}&limit=50', None),
+    ('requests_by_equipment', 'GET', '/api/requests?equipment_id={equipment_id}&limit=50', None),
+    ('kanban', 'GET', '/api/requests/kanban', None),
+    ('kanban_column', 'GET', '/api/requests/kanban?status={status}&limit=50', None),
+    ('calendar', 'GET', '/api/requests/calendar?start={month_start}&end={month_end}', None),
+    ('dashboard', 'GET', '/api/stats/dashboard', None),
+    ('search', 'GET', '/api/search?q=CNC%20mach', None),
+    ('search_prefix', 'GET', '/api/search?q=CN&types=equipment', None),
+    ('export_equipment', 'GET', '/api/export/equipment?format=csv&team_id={team_id}', None),
+    ('export_requests', 'GET', '/api/export/requests?format=ndjson&equipment_id={equipment_id}', None),
+    ('stats_pool', 'GET', '/api/stats/pool', None),
+    ('stats_cache', 'GET', '/api/stats/cache', None),
+    ('stats_feed', 'GET', '/api/stats/feed', None),
+    ('stats_coalescing', 'GET', '/api/stats/coalescing', None),
+    ('metrics', 'GET', '/api/metrics', None),
+]
+WRITE_SCENARIOS = [
+    ('create_request', 'POST', '/api/requests',
+     {'subject': 'Benchmark request', 'equipment_id': '{equipment_id}', 'request_type': 'Corrective'}),
+    ('move_request', 'PATCH', '/api/requests/bulk', [{'id': '{request_id}', 'status': 'In Progress'}]),
+    ('bulk_create_requests', 'POST', '/api/requests/bulk',
+     [{'subject': 'Benchmark bulk request', 'equipment_id': '{equipment_id}', 'request_type': 'Preventive',
+       'scheduled_date': '{month_start}'}] * 50),
+    ('create_equipment', 'POST', '/api/equipment',
+     {'name': 'Benchmark unit', 'serial_number': 'BENCH-W-{unique}', 'maintenance_team_id': '{team_id}'}),
+]
+STATUSES = ('New', 'In Progress', 'Repaired', 'Scrap')
+
+
+class Client:
+    """One keep-alive HTTP connection; reconnects after errors"""
+
+    def __init__(self, url, timeout):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port
+        self.https = parts.scheme == 'https'
+        self.timeout = timeout
+        self.connection = None
+
+    def request(self, method, path, body=None):
+        if self.connection is None:
+            factory = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+            self.connection = factory(self.host, self.port, timeout=self.timeout)
+        headers = {'Accept-Encoding': 'identity'}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        try:
+            self.connection.request(method, path, payload, headers)
+            response = self.connection.getresponse()
+            data = response.read()
+        except (OSError, http.client.HTTPException):
+            self.close()
+            raise
+        if response.will_close:
+            self.close()
+        return response.status, data
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+def discover(url, timeout):
+    """Ids to substitute into scenario paths, sampled from the running API"""
+    client = Client(url, timeout)
+    try:
+        def get(path):
+            status, data = client.request('GET', path)
+            if status != 200:
+                raise SystemExit(f"GET {path} returned {status}; is the API up and seeded?")
+            return json.loads(data)
+
+        teams = [team['id'] for team in get('/api/teams')]
+        equipment = [item['id'] for item in get('/api/equipment?limit=500')['items']]
+        requests = [item['id'] for item in get('/api/requests?limit=500')['items']]
+    finally:
+        client.close()
+    if not (teams and equipment and requests):
+        raise SystemExit("The API has no teams, equipment or requests; run benchmarks.seed first")
+    month_start = date.today().replace(day=1)
+    return {
+        'team_id': teams,
+        'equipment_id': equipment,
+        'request_id': requests,
+        'status': list(STATUSES),
+        'month_start': [month_start.isoformat()],
+        'month_end': [(month_start + timedelta(days=32)).replace(day=1).isoformat()],
+    }
+
+
+def render(template, ids, rng, unique, quote_values=False):
+    """Fill {placeholders} in a path (quote_values=True) or JSON body template"""
+    if isinstance(template, str):
+        values = {}
+        for _, field, _, _ in string.Formatter().parse(template):
+            if field == 'equipment_ids':
+                values[field] = ','.join(str(rng.choice(ids['equipment_id'])) for _ in range(50))
+            elif field == 'unique':
+                values[field] = unique()
+            elif field:
+                values[field] = rng.choice(ids[field])
+        if not values:
+            return template
+        if quote_values:
+            values = {field: quote(str(value), safe=',') for field, value in values.items()}
+        filled = template.format(**values)
+        return int(filled) if template.startswith('{') and template.endswith('_id}') else filled
+    if isinstance(template, list):
+        return [render(item, ids, rng, unique) for item in template]
+    if isinstance(template, dict):
+        return {key: render(value, ids, rng, unique) for key, value in template.items()}
+    return template
+
+
+def tree_rss_kb(pid):
+    """Resident memory of pid and its descendants (Linux /proc), in KiB"""
+    total = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f'/proc/{current}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total += int(line.split()[1])
+                        break
+            with open(f'/proc/{current}/task/{current}/children') as f:
+                pending.extend(int(child) for child in f.read().split())
+        except (OSError, ValueError):
+            continue
+    return total
+
+
+class MemorySampler:
+    """Peak process-tree RSS while a scenario runs"""
+
+    def __init__(self, pid, interval=0.2):
+        self.pid = pid
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.start_kb = tree_rss_kb(self.pid)
+        self.peak = self.start_kb
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.end_kb = tree_rss_kb(self.pid)
+        return False
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, tree_rss_kb(self.pid))
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    return sorted_values[max(0, math.ceil(fraction * len(sorted_values)) - 1)]
+
+
+def run_scenario(scenario, args, ids, unique):
+    name, method, path, body = scenario
+    window = {}
+    latencies = [[] for _ in range(args.concurrency)]
+    statuses = [{} for _ in range(args.concurrency)]
+    received = [0] * args.concurrency
+    errors = [0] * args.concurrency
+    start_barrier = threading.Barrier(args.concurrency + 1)
+
+    def worker(slot):
+        client = Client(args.url, args.timeout)
+        rng = random.Random(args.seed * 1000 + slot)
+        own_latencies = latencies[slot]
+        own_statuses = statuses[slot]
+        start_barrier.wait()
+        try:
+            while time.perf_counter() < window['end']:
+                request_path = render(path, ids, rng, unique, quote_values=True)
+                request_body = render(body, ids, rng, unique) if body is not None else None
+                started = time.perf_counter()
+                try:
+                    status, data = client.request(method, request_path, request_body)
+                except (OSError, http.client.HTTPException):
+                    errors[slot] += 1
+                    continue
+                elapsed = time.perf_counter() - started
+                # Warm the connection (and server caches) outside the timed window
+                if started < window['timed_from']:
+                    continue
+                own_latencies.append(elapsed)
+                own_statuses[status] = own_statuses.get(status, 0) + 1
+                received[slot] += len(data)
+                if status >= 400:
+                    errors[slot] += 1
+        finally:
+            client.close()
+
+    threads = [threading.Thread(target=worker, args=(slot,), daemon=True) for slot in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    window['timed_from'] = time.perf_counter() + args.warmup
+    window['end'] = window['timed_from'] + args.duration
+    sampler = MemorySampler(args.server_pid) if args.server_pid else None
+    with sampler or contextlib.nullcontext():
+        start_barrier.wait()
+        for thread in threads:
+            thread.join()
+
+    merged = sorted(latency for own in latencies for latency in own)
+    status_counts = {}
+    for own in statuses:
+        for status, count in own.items():
+            status_counts[str(status)] = status_counts.get(str(status), 0) + count
+    result = {
+        'method': method,
+        'path': path,
+        'requests': len(merged),
+        'errors': sum(errors),
+        'statuses': status_counts,
+        'throughput_rps': round(len(merged) / args.duration, 2),
+        'bytes_per_request': round(sum(received) / len(merged)) if merged else 0,
+        'latency_ms': {
+            'mean': round(sum(merged) / len(merged) * 1000, 3) if merged else None,
+            'p50': _ms(percentile(merged, 0.50)),
+            'p95': _ms(percentile(merged, 0.95)),
+            'p99': _ms(percentile(merged, 0.99)),
+            'max': _ms(merged[-1] if merged else None),
+        },
+    }
+    if sampler:
+        result['server_rss_kb'] = {'start': sampler.start_kb, 'peak': sampler.peak, 'end': sampler.end_kb}
+    return name, result
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 3) if seconds is not None else None
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default=os.environ.get('GEARGUARD_URL', 'http://127.0.0.1:5000'))
+    parser.add_argument('--concurrency', type=int, default=8, help='client threads per scenario')
+    parser.add_argument('--duration', type=float, default=10, help='timed seconds per scenario')
+    parser.add_argument('--warmup', type=float, default=1, help='untimed seconds before each scenario')
+    parser.add_argument('--timeout', type=float, default=30, help='per-request timeout in seconds')
+    parser.add_argument('--only', help='comma-separated scenario names')
+    parser.add_argument('--writes', action='store_true', help='also run write scenarios (mutates data)')
+    parser.add_argument('--server-pid', type=int, help='sample RSS of this process and its children')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--label', help='free-form label stored with the results')
+    parser.add_argument('--output', help='results file (default: benchmarks/results/<timestamp>.json)')
+    args = parser.parse_args()
+
+    scenarios = READ_SCENARIOS + (WRITE_SCENARIOS if args.writes else [])
+    if args.only:
+        wanted = set(args.only.split(','))
+        unknown = wanted - {scenario[0] for scenario in READ_SCENARIOS + WRITE_SCENARIOS}
+        if unknown:
+            raise SystemExit(f"Unknown scenario(s): {', '.join(sorted(unknown))}")
+        scenarios = [scenario for scenario in READ_SCENARIOS + WRITE_SCENARIOS if scenario[0] in wanted]
+
+    ids = discover(args.url, args.timeout)
+    counter = itertools.count()
+    lock = threading.Lock()
+
+    def unique():
+        # Serial numbers must not collide across threads or runs
+        with lock:
+            return f'{int(time.time())}-{next(counter)}'
+
+    started_at = datetime.now(timezone.utc)
+    results = {}
+    print(f"{'scenario':<24} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for scenario in scenarios:
+        name, result = run_scenario(scenario, args, ids, unique)
+        results[name] = result
+        latency = result['latency_ms']
+        print(f"{name:<24} {result['throughput_rps']:>9.1f} {latency['p50'] or 0:>9.2f} "
+              f"{latency['p95'] or 0:>9.2f} {latency['p99'] or 0:>9.2f} {result['errors']:>7}")
+
+    report = {
+        'label': args.label,
+        'started_at': started_at.isoformat(),
+        'git_revision': git_revision(),
+        'config': {
+            'url': args.url, 'concurrency': args.concurrency, 'duration': args.duration,
+            'warmup': args.warmup, 'writes': args.writes, 'seed': args.seed,
+        },
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+        },
+        'client_max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        'scenarios': results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, started_at.strftime('%Y%m%dT%H%M%SZ') + '.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f"Saved {output}")
+
+
+if __name__ == '__main__':
+    main()
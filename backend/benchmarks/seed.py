@@ -0,0 +1,189 @@
+"""Seed a GearGuard database with benchmark-sized data.
+
+Adds teams, technicians, equipment and maintenance requests on top of
+whatever is there (names, serials and e-mails carry a 'Bench' marker so
+--clear can remove them again). Migrations are applied first, rows go in
+with multi-row INSERTs in chunks, and the data is deterministic for a given
+--seed. Point it at a scratch database, never production:
+
+    cd backend && python -m benchmarks.seed --requests 1000000
+    cd backend && python -m benchmarks.seed --clear
+
+Restart the API afterwards: the dashboard snapshot is built once per process.
+"""
+import argparse
+import random
+import time
+from datetime import date, datetime, timedelta
+
+import schema_migrations
+from flask_server import bump_versions, get_db_connection
+
+MARKER = 'Bench'
+
+DEPARTMENTS = ('Production', 'Power', 'IT', 'Logistics', 'Facilities', 'Quality', 'Packaging', 'R&D')
+MACHINES = ('CNC Machine', 'Lathe', 'Generator', 'Server Rack', 'Air Compressor', 'Conveyor',
+            'Forklift', 'Boiler', 'Chiller', 'Press', 'Welder', 'Pump')
+SUBJECTS = ('Oil leak', 'Routine inspection', 'Belt replacement', 'Overheating', 'Noise from bearing',
+            'Firmware update', 'Filter change', 'Calibration', 'Sensor fault', 'Lubrication')
+# (status, weight): most history is closed work
+STATUS_WEIGHTS = (('Repaired', 70), ('In Progress', 15), ('New', 13), ('Scrap', 2))
+
+
+def chunked_insert(connection, sql, rows, chunk_size):
+    cursor = connection.cursor()
+    try:
+        for start in range(0, len(rows), chunk_size):
+            cursor.executemany(sql, rows[start:start + chunk_size])
+            connection.commit()
+    finally:
+        cursor.close()
+
+
+def fetch_ids(connection, sql, params=()):
+    cursor = connection.cursor()
+    try:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+
+def seed_reference_data(connection, args, rng):
+    chunk_size = args.chunk_size
+    chunked_insert(connection, "INSERT IGNORE INTO maintenance_teams (team_name, description) VALUES (%s, %s)",
+                   [(f'{MARKER} Team {i}', f'Benchmark team {i}') for i in range(args.teams)], chunk_size)
+    team_ids = fetch_ids(connection, "SELECT id FROM maintenance_teams WHERE team_name LIKE %s ORDER BY id",
+                         (f'{MARKER} Team %',))
+
+    chunked_insert(connection, "INSERT IGNORE INTO technicians (name, email, team_id) VALUES (%s, %s, %s)",
+                   [(f'{MARKER} Technician {i}', f'tech{i}@bench.gearguard.com', team_ids[i % len(team_ids)])
+                    for i in range(args.technicians)], chunk_size)
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SELECT id, team_id FROM technicians WHERE email LIKE %s", ('%@bench.gearguard.com',))
+        technicians = {}
+        for technician_id, team_id in cursor.fetchall():
+            technicians.setdefault(team_id, []).append(technician_id)
+    finally:
+        cursor.close()
+
+    today = date.today()
+    equipment = []
+    for i in range(args.equipment):
+        purchased = today - timedelta(days=rng.randint(30, 365 * 8))
+        equipment.append((
+            f'{rng.choice(MACHINES)} {i}', f'BENCH-{i:07d}', rng.choice(DEPARTMENTS),
+            f'{MARKER} Employee {rng.randint(1, 2000)}', f'Building {rng.randint(1, 12)} - Zone {rng.randint(1, 20)}',
+            purchased, purchased + timedelta(days=365 * rng.randint(1, 5)),
+            rng.choice(team_ids), rng.random() < 0.03,
+        ))
+    chunked_insert(connection, """
+        INSERT IGNORE INTO equipment (name, serial_number, department, assigned_employee,
+                                      location, purchase_date, warranty_end, maintenance_team_id, is_scrapped)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """, equipment, chunk_size)
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SELECT id, maintenance_team_id FROM equipment WHERE serial_number LIKE %s", ('BENCH-%',))
+        equipment_teams = cursor.fetchall()
+    finally:
+        cursor.close()
+    return equipment_teams, technicians
+
+
+def request_rows(count, equipment_teams, technicians, years, rng):
+    """Generate request rows lazily, oldest first"""
+    statuses = [status for status, _ in STATUS_WEIGHTS]
+    weights = [weight for _, weight in STATUS_WEIGHTS]
+    now = datetime.now().replace(microsecond=0)
+    span = years * 365 * 86400
+    for i in range(count):
+        equipment_id, team_id = rng.choice(equipment_teams)
+        status = rng.choices(statuses, weights)[0]
+        request_type = 'Preventive' if rng.random() < 0.4 else 'Corrective'
+        created_at = now - timedelta(seconds=span - span * i // count)
+        scheduled = None
+        if request_type == 'Preventive':
+            scheduled = (created_at + timedelta(days=rng.randint(0, 60))).date()
+        team_technicians = technicians.get(team_id)
+        technician_id = rng.choice(team_technicians) if team_technicians and rng.random() < 0.8 else None
+        duration = round(rng.uniform(0.5, 16), 2) if status == 'Repaired' else None
+        yield (f'{rng.choice(SUBJECTS)} #{i}', equipment_id, team_id, technician_id, request_type,
+               scheduled, duration, status, created_at, created_at)
+
+
+def seed_requests(connection, args, equipment_teams, technicians, rng):
+    sql = """
+        INSERT INTO maintenance_requests (subject, equipment_id, team_id, technician_id, request_type,
+                                          scheduled_date, duration_hours, status, created_at, updated_at)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """
+    cursor = connection.cursor()
+    started = time.perf_counter()
+    batch = []
+    done = 0
+    try:
+        for row in request_rows(args.requests, equipment_teams, technicians, args.years, rng):
+            batch.append(row)
+            if len(batch) == args.chunk_size:
+                cursor.executemany(sql, batch)
+                connection.commit()
+                done += len(batch)
+                batch.clear()
+                if done % (args.chunk_size * 20) == 0:
+                    print(f"  {done} requests ({done / (time.perf_counter() - started):.0f} rows/s)")
+        if batch:
+            cursor.executemany(sql, batch)
+            connection.commit()
+            done += len(batch)
+    finally:
+        cursor.close()
+    return done
+
+
+def clear(connection):
+    cursor = connection.cursor()
+    try:
+        # Requests cascade from their equipment
+        cursor.execute("DELETE FROM equipment WHERE serial_number LIKE %s", ('BENCH-%',))
+        cursor.execute("DELETE FROM technicians WHERE email LIKE %s", ('%@bench.gearguard.com',))
+        cursor.execute("DELETE FROM maintenance_teams WHERE team_name LIKE %s", (f'{MARKER} Team %',))
+        bump_versions(connection, 'maintenance_teams', 'technicians', 'equipment', 'maintenance_requests')
+        connection.commit()
+    finally:
+        cursor.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--teams', type=int, default=20)
+    parser.add_argument('--technicians', type=int, default=300)
+    parser.add_argument('--equipment', type=int, default=10000)
+    parser.add_argument('--requests', type=int, default=1000000)
+    parser.add_argument('--years', type=int, default=3, help='spread request history over this many years')
+    parser.add_argument('--chunk-size', type=int, default=5000, help='rows per multi-row INSERT')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--clear', action='store_true', help='remove previously seeded rows and exit')
+    args = parser.parse_args()
+
+    with get_db_connection() as connection:
+        schema_migrations.migrate(connection)
+        if args.clear:
+            clear(connection)
+            print("Removed benchmark rows")
+            return
+
+        rng = random.Random(args.seed)
+        started = time.perf_counter()
+        equipment_teams, technicians = seed_reference_data(connection, args, rng)
+        print(f"{len(equipment_teams)} equipment, {sum(map(len, technicians.values()))} technicians")
+        done = seed_requests(connection, args, equipment_teams, technicians, rng)
+        bump_versions(connection, 'maintenance_teams', 'technicians', 'equipment', 'maintenance_requests')
+        connection.commit()
+        elapsed = time.perf_counter() - started
+        print(f"Seeded {done} requests in {elapsed:.1f}s ({done / elapsed:.0f} rows/s)")
+
+
+if __name__ == '__main__':
+    main()
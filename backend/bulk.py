@@ -0,0 +1,165 @@
+"""Validation and batched writes behind the /bulk endpoints.
+
+Each item is validated on its own; invalid items are reported by index and
+the valid ones are written together in one transaction.
+"""
+import uuid
+from datetime import date
+
+from mysql.connector import Error
+
+from query_args import REQUEST_STATUSES, REQUEST_TYPES
+
+# Upper bound on items per bulk call
+MAX_BULK_ITEMS = 1000
+
+
+class ItemError(ValueError):
+    """An item failed validation; reported in that item's result"""
+
+
+def bulk_items(body):
+    """The item list of a bulk body: a JSON array or {'items': [...]}"""
+    items = body.get('items') if isinstance(body, dict) else body
+    if not isinstance(items, list):
+        raise ItemError('Body must be a JSON array or an object with an items array')
+    if len(items) > MAX_BULK_ITEMS:
+        raise ItemError(f'At most {MAX_BULK_ITEMS} items per request')
+    return items
+
+
+def _required_text(item, field):
+    value = item.get(field)
+    if not isinstance(value, str) or not value.strip():
+        raise ItemError(f'{field} is required')
+    return value
+
+
+def _optional_int(item, field):
+    value = item.get(field)
+    if value in (None, ''):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ItemError(f'{field} must be an integer')
+
+
+def _optional_date(item, field):
+    value = item.get(field)
+    if value in (None, ''):
+        return None
+    try:
+        return date.fromisoformat(value).isoformat()
+    except (TypeError, ValueError):
+        raise ItemError(f'{field} must be a date (YYYY-MM-DD)')
+
+
+def _optional_hours(item, field):
+    value = item.get(field)
+    if value in (None, ''):
+        return None
+    try:
+        hours = float(value)
+    except (TypeError, ValueError):
+        raise ItemError(f'{field} must be a number')
+    if hours < 0:
+        raise ItemError(f'{field} must not be negative')
+    return hours
+
+
+def _flag(item, field):
+    value = item.get(field)
+    if isinstance(value, str):
+        # CSV imports carry booleans as text, e.g. the True/False of an export
+        return value.strip().lower() in ('1', 'true', 'yes')
+    return bool(value)
+
+
+def _choice(item, field, choices, default=None):
+    value = item.get(field, default)
+    if value not in choices:
+        raise ItemError(f"{field} must be one of: {', '.join(choices)}")
+    return value
+
+
+def _check_repaired(status, duration_hours):
+    if status == 'Repaired' and not duration_hours:
+        raise ItemError('Duration is required before marking as Repaired')
+
+
+def validate_request(item):
+    """Normalized fields of a new maintenance request (team_id filled in later)"""
+    if not isinstance(item, dict):
+        raise ItemError('Item must be an object')
+    equipment_id = _optional_int(item, 'equipment_id')
+    if equipment_id is None:
+        raise ItemError('equipment_id is required')
+    status = _choice(item, 'status', REQUEST_STATUSES, 'New')
+    duration_hours = _optional_hours(item, 'duration_hours')
+    _check_repaired(status, duration_hours)
+    return {
+        'subject': _required_text(item, 'subject'),
+        'equipment_id': equipment_id,
+        'team_id': _optional_int(item, 'team_id'),
+        'technician_id': _optional_int(item, 'technician_id'),
+        'request_type': _choice(item, 'request_type', REQUEST_TYPES),
+        'scheduled_date': _optional_date(item, 'scheduled_date'),
+        'duration_hours': duration_hours,
+        'status': status,
+    }
+
+
+def validate_status_move(item):
+    """(id, status, duration_hours) of a status change"""
+    if not isinstance(item, dict):
+        raise ItemError('Item must be an object')
+    request_id = _optional_int(item, 'id')
+    if request_id is None:
+        raise ItemError('id is required')
+    return request_id, _choice(item, 'status', REQUEST_STATUSES), _optional_hours(item, 'duration_hours')
+
+
+def validate_equipment(item):
+    """Normalized fields of a new equipment record"""
+    if not isinstance(item, dict):
+        raise ItemError('Item must be an object')
+    return {
+        'name': _required_text(item, 'name'),
+        'serial_number': _required_text(item, 'serial_number').strip(),
+        'department': item.get('department') or None,
+        'assigned_employee': item.get('assigned_employee') or None,
+        'location': item.get('location') or None,
+        'purchase_date': _optional_date(item, 'purchase_date'),
+        'warranty_end': _optional_date(item, 'warranty_end'),
+        'maintenance_team_id': _optional_int(item, 'maintenance_team_id'),
+        'is_scrapped': _flag(item, 'is_scrapped'),
+    }
+
+
+def insert_rows(connection, sql, ids_sql, rows):
+    """Insert rows with one multi-row INSERT and return their new ids in row order.
+
+    sql takes each row plus a batch key as its last value; ids_sql reads
+    the ids back by that key. The ids of one INSERT increase in row order
+    but are only guaranteed consecutive for innodb_autoinc_lock_mode 0 and
+    1, not mode 2 (the MySQL 8 default), so they are never derived from
+    lastrowid.
+    """
+    batch_key = uuid.uuid4().hex
+    cursor = connection.cursor()
+    try:
+        # executemany rewrites a plain INSERT ... VALUES into one multi-row statement
+        cursor.executemany(sql, [tuple(row) + (batch_key,) for row in rows])
+        cursor.execute(ids_sql, (batch_key,))
+        ids = [row[0] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+    if len(ids) != len(rows):
+        raise Error(msg=f'Inserted {len(rows)} rows but read back {len(ids)} ids')
+    return ids
+
+
+def results_status(results, success=201):
+    """success when any item was written, otherwise 400"""
+    return success if any('error' not in result for result in results) else 400
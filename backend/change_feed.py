@@ -0,0 +1,182 @@
+"""Change feed for maintenance requests, fanned out to Server-Sent Events clients.
+
+Write handlers ``publish()`` small delta events after they commit; every
+open ``/api/requests/stream`` connection holds a ``Subscription`` and
+receives them in order. Each event gets an increasing id, and the last
+``history`` events are kept so a reconnecting client (EventSource sends
+Last-Event-ID) replays what it missed. A client that fell too far behind
+gets a 'reset' event and refetches instead.
+
+Every open stream pins a server thread for as long as the client stays
+connected, so a feed takes at most ``max_subscribers`` of them per worker;
+``subscribe()`` raises FeedFull beyond that and the endpoint answers 503
+with Retry-After instead of starving ordinary requests.
+
+Without a broker the bus only spans one worker process. With
+CHANGE_FEED_URL=redis://... events go through Redis pub/sub (ids from a
+shared INCR), so clients see writes handled by any worker. That needs the
+optional ``redis`` package; gunicorn.conf.py refuses to start more than
+one worker without it.
+"""
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+try:
+    import redis
+except ImportError:  # optional, only needed for the broker-backed bus
+    redis = None
+
+RESET = {'type': 'reset'}
+
+
+class FeedFull(Exception):
+    """The worker already serves max_subscribers streams"""
+
+
+class Subscription:
+    """One client's queue of pending events"""
+
+    def __init__(self, feed, max_pending):
+        self._feed = feed
+        self._queue = queue.Queue(max_pending)
+        self.overflowed = False
+
+    def get(self, timeout):
+        """Next event, or None when nothing arrived within timeout seconds"""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def _offer(self, event):
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            # A stalled client must not hold events for ever: tell it to refetch
+            self.overflowed = True
+
+    def close(self):
+        self._feed._unsubscribe(self)
+
+
+class ChangeFeed:
+    def __init__(self, history=1000, max_pending=1000, broker_url=None, channel='gearguard:requests',
+                 max_subscribers=None):
+        self.max_pending = max_pending
+        self.max_subscribers = max_subscribers
+        self.rejected = 0
+        self.channel = channel
+        self._lock = threading.Lock()
+        self._history = deque(maxlen=history)
+        self._subscribers = set()
+        self._next_id = 1
+        self.published = 0
+        self._redis = None
+        self._listener = None
+        if broker_url:
+            if redis is None:
+                raise RuntimeError('CHANGE_FEED_URL is set but the redis package is not installed')
+            self._redis = redis.Redis.from_url(broker_url)
+
+    def publish(self, event_type, **fields):
+        """Send an event to every subscriber; call after the write commits"""
+        event = {'type': event_type, 'at': time.time(), **fields}
+        try:
+            if self._redis is not None:
+                event['id'] = self._redis.incr(self.channel + ':id')
+                self._redis.publish(self.channel, json.dumps(event, default=str))
+            else:
+                self._dispatch(event)
+        except Exception as e:
+            # The write already committed; a lost event only delays other boards
+            print(f"Error publishing change event: {e}")
+
+    def subscribe(self, last_event_id=None):
+        """New subscription, primed with the events after last_event_id"""
+        self._start_listener()
+        subscription = Subscription(self, self.max_pending)
+        with self._lock:
+            if self.max_subscribers is not None and len(self._subscribers) >= self.max_subscribers:
+                self.rejected += 1
+                raise FeedFull(f'At most {self.max_subscribers} streams per worker')
+            if last_event_id is not None:
+                oldest = self._history[0]['id'] if self._history else None
+                if oldest is not None and oldest > last_event_id + 1:
+                    subscription._offer(RESET)
+                else:
+                    for event in self._history:
+                        if event['id'] > last_event_id:
+                            subscription._offer(event)
+            self._subscribers.add(subscription)
+        return subscription
+
+    def stats(self):
+        with self._lock:
+            return {
+                'subscribers': len(self._subscribers),
+                'max_subscribers': self.max_subscribers,
+                'rejected': self.rejected,
+                'published': self.published,
+                'history': len(self._history),
+                'broker': 'redis' if self._redis is not None else 'local',
+            }
+
+    def _unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def _dispatch(self, event):
+        with self._lock:
+            if 'id' not in event:
+                event['id'] = self._next_id
+                self._next_id += 1
+            self.published += 1
+            self._history.append(event)
+            for subscription in self._subscribers:
+                subscription._offer(event)
+
+    def _start_listener(self):
+        # Started lazily so each forked worker gets its own thread.
+        if self._redis is None or self._listener is not None:
+            return
+        with self._lock:
+            if self._listener is not None:
+                return
+            self._listener = threading.Thread(target=self._listen, name='change-feed', daemon=True)
+            self._listener.start()
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                for message in pubsub.listen():
+                    self._dispatch(json.loads(message['data']))
+            except Exception as e:
+                print(f"Error reading change feed: {e}")
+                time.sleep(1)
+
+
+def stream_limit():
+    """Streams one worker may hold: SSE_MAX_STREAMS, else half of GUNICORN_THREADS.
+
+    Every stream pins a thread, so the default leaves the other half of
+    the worker's threads (gunicorn.conf.py reads the same variable) for
+    ordinary requests.
+    """
+    if os.environ.get('SSE_MAX_STREAMS'):
+        return int(os.environ['SSE_MAX_STREAMS'])
+    return int(os.environ.get('GUNICORN_THREADS', 4)) // 2
+
+
+def feed_from_env():
+    """ChangeFeed configured from CHANGE_FEED_URL / CHANGE_FEED_HISTORY and stream_limit()"""
+    return ChangeFeed(
+        history=int(os.environ.get('CHANGE_FEED_HISTORY', 1000)),
+        broker_url=os.environ.get('CHANGE_FEED_URL'),
+        max_subscribers=stream_limit()
+    )
@@ -0,0 +1,130 @@
+"""Single-flight coalescing for expensive GET handlers.
+
+Concurrent identical requests (same path, query string and ETag) within a
+worker share one execution of the view and its serialized body:
+
+- the first request becomes the leader and runs the view;
+- requests arriving while it runs wait for its result instead of running
+  the same query again;
+- the result is reused for ``fresh_for`` seconds, and for a further
+  ``stale_for`` seconds it is served immediately to everyone except the one
+  request that recomputes it (stale-while-revalidate).
+
+Only plain 200 responses are shared; streamed responses and errors pass
+through untouched.
+"""
+import functools
+import threading
+import time
+
+from flask import Response, g, request
+
+
+class _Entry:
+    __slots__ = ('result', 'finished_at', 'inflight')
+
+    def __init__(self):
+        self.result = None       # (body bytes, mimetype) of the last successful run
+        self.finished_at = None
+        self.inflight = None     # Event set when the running leader finishes
+
+
+class SingleFlight:
+    """View decorator coalescing identical concurrent GETs (see module docstring)"""
+
+    def __init__(self, fresh_for=1.0, stale_for=5.0, wait_timeout=30.0, max_keys=256):
+        self.fresh_for = fresh_for
+        self.stale_for = stale_for
+        self.wait_timeout = wait_timeout
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._entries = {}
+        self.executions = 0
+        self.coalesced = 0
+        self.stale_served = 0
+
+    def __call__(self, view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.args.get('stream'):
+                return view(*args, **kwargs)
+            # The ETag set by @conditional ties shared bodies to the data version
+            key = (request.path, request.query_string, g.get('etag'))
+            return self._run(key, view, args, kwargs)
+        return wrapper
+
+    def _run(self, key, view, args, kwargs):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._prune(now)
+                entry = self._entries[key] = _Entry()
+            age = now - entry.finished_at if entry.result is not None else None
+            if age is not None and age <= self.fresh_for:
+                self.coalesced += 1
+                return self._replay(entry.result)
+            if entry.inflight is None:
+                entry.inflight = threading.Event()
+                leader = True
+            elif age is not None and age <= self.fresh_for + self.stale_for:
+                self.stale_served += 1
+                return self._replay(entry.result)
+            else:
+                self.coalesced += 1
+                leader = False
+            inflight = entry.inflight
+            seen = entry.finished_at
+
+        if not leader:
+            inflight.wait(self.wait_timeout)
+            with self._lock:
+                result = entry.result if entry.finished_at != seen else None
+            if result is not None:
+                return self._replay(result)
+            # The leader failed or is stuck: compute independently
+            return view(*args, **kwargs)
+
+        result = None
+        try:
+            response = view(*args, **kwargs)
+            result = self._capture(response)
+            return response
+        finally:
+            with self._lock:
+                self.executions += 1
+                if result is not None:
+                    entry.result = result
+                    entry.finished_at = time.monotonic()
+                entry.inflight = None
+            inflight.set()
+
+    @staticmethod
+    def _capture(response):
+        if isinstance(response, tuple):
+            return None
+        if not isinstance(response, Response) or response.status_code != 200 or response.is_streamed:
+            return None
+        return response.get_data(), response.mimetype
+
+    @staticmethod
+    def _replay(result):
+        body, mimetype = result
+        return Response(body, mimetype=mimetype)
+
+    def _prune(self, now):
+        if len(self._entries) < self.max_keys:
+            return
+        horizon = self.fresh_for + self.stale_for
+        for key in [key for key, entry in self._entries.items()
+                    if entry.inflight is None and (entry.finished_at is None or now - entry.finished_at > horizon)]:
+            del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'executions': self.executions,
+                'coalesced': self.coalesced,
+                'stale_served': self.stale_served,
+                'keys': len(self._entries),
+            }
@@ -0,0 +1,195 @@
+"""In-process dashboard summary kept current by the write handlers."""
+import heapq
+import threading
+import time
+
+# Statuses counted as open / completed on the dashboard
+OPEN_STATUSES = ('New', 'In Progress')
+COMPLETED_STATUSES = ('Repaired',)
+
+# Number of entries in requests_by_equipment
+TOP_EQUIPMENT = 5
+
+
+class DashboardSummary:
+    """Dashboard counters served from memory.
+
+    ``loader`` returns a full snapshot from the database (see
+    ``load_snapshot``). Write handlers apply small deltas after they commit,
+    so reads never touch MySQL. A background thread reloads the snapshot
+    every ``reconcile_interval`` seconds to repair drift caused by writes
+    from other workers or from outside the API.
+    """
+
+    def __init__(self, loader, reconcile_interval=60):
+        self._loader = loader
+        self.reconcile_interval = reconcile_interval
+        self._lock = threading.Lock()
+        self._state = None
+        self._rendered = None
+        self._loaded_at = None
+        self._reconciler = None
+
+    def get(self, fresh=False):
+        """Return the dashboard payload, loading it on first use or when fresh=True"""
+        self._start_reconciler()
+        with self._lock:
+            if self._state is not None and not fresh:
+                if self._rendered is None:
+                    self._rendered = self._render(self._state)
+                return self._rendered
+        self.reload()
+        with self._lock:
+            if self._rendered is None:
+                self._rendered = self._render(self._state)
+            return self._rendered
+
+    def reload(self):
+        state = self._loader()
+        with self._lock:
+            self._state = state
+            self._rendered = None
+            self._loaded_at = time.time()
+
+    def invalidate(self):
+        """Drop the snapshot; the next read reloads it"""
+        with self._lock:
+            self._state = None
+            self._rendered = None
+
+    # ---- deltas applied by the write handlers after commit ----
+
+    def team_created(self, team_id, team_name):
+        with self._lock:
+            state = self._state
+            if state is None:
+                return
+            state['teams'][team_id] = team_name
+            state['team_counts'].setdefault(team_id, 0)
+            self._rendered = None
+
+    def equipment_saved(self, equipment_id, name, is_scrapped):
+        with self._lock:
+            state = self._state
+            if state is None:
+                return
+            state['equipment'][equipment_id] = (name, bool(is_scrapped))
+            state['equipment_counts'].setdefault(equipment_id, 0)
+            self._rendered = None
+
+    def equipment_scrapped(self, equipment_id):
+        with self._lock:
+            state = self._state
+            if state is None or equipment_id not in state['equipment']:
+                return
+            name, _ = state['equipment'][equipment_id]
+            state['equipment'][equipment_id] = (name, True)
+            self._rendered = None
+
+    def request_created(self, team_id, equipment_id, status):
+        with self._lock:
+            state = self._state
+            if state is None:
+                return
+            state['team_counts'][team_id] = state['team_counts'].get(team_id, 0) + 1
+            state['equipment_counts'][equipment_id] = state['equipment_counts'].get(equipment_id, 0) + 1
+            self._count_status(state, status, 1)
+            self._rendered = None
+
+    def request_status_changed(self, old_status, new_status):
+        if old_status == new_status:
+            return
+        with self._lock:
+            state = self._state
+            if state is None:
+                return
+            self._count_status(state, old_status, -1)
+            self._count_status(state, new_status, 1)
+            self._rendered = None
+
+    @staticmethod
+    def _count_status(state, status, delta):
+        if status in OPEN_STATUSES:
+            state['open_requests'] += delta
+        elif status in COMPLETED_STATUSES:
+            state['completed_requests'] += delta
+
+    @staticmethod
+    def _render(state):
+        teams = state['teams']
+        team_counts = state['team_counts']
+        equipment = state['equipment']
+        equipment_counts = state['equipment_counts']
+        by_team = sorted(
+            ({'team': name, 'count': team_counts.get(team_id, 0)} for team_id, name in teams.items()),
+            key=lambda item: item['count'],
+            reverse=True
+        )
+        top_equipment = heapq.nlargest(
+            TOP_EQUIPMENT, equipment, key=lambda equipment_id: equipment_counts.get(equipment_id, 0)
+        )
+        return {
+            'total_equipment': sum(1 for _, is_scrapped in equipment.values() if not is_scrapped),
+            'total_teams': len(teams),
+            'open_requests': state['open_requests'],
+            'completed_requests': state['completed_requests'],
+            'requests_by_team': by_team,
+            'requests_by_equipment': [
+                {'equipment': equipment[equipment_id][0], 'count': equipment_counts.get(equipment_id, 0)}
+                for equipment_id in top_equipment
+            ]
+        }
+
+    def _start_reconciler(self):
+        # Started lazily so each forked worker gets its own thread.
+        if self._reconciler is not None or not self.reconcile_interval:
+            return
+        with self._lock:
+            if self._reconciler is not None:
+                return
+            self._reconciler = threading.Thread(target=self._reconcile_loop, name='dashboard-reconcile', daemon=True)
+            self._reconciler.start()
+
+    def _reconcile_loop(self):
+        while True:
+            time.sleep(self.reconcile_interval)
+            try:
+                self.reload()
+            except Exception as e:
+                print(f"Error reconciling dashboard summary: {e}")
+
+
+def load_snapshot(cursor):
+    """Build a summary snapshot with one pass over maintenance_requests"""
+    cursor.execute("SELECT id, team_name FROM maintenance_teams")
+    teams = {team_id: name for team_id, name in cursor.fetchall()}
+
+    cursor.execute("SELECT id, name, is_scrapped FROM equipment")
+    equipment = {equipment_id: (name, bool(is_scrapped)) for equipment_id, name, is_scrapped in cursor.fetchall()}
+
+    # Conditional aggregation: every counter comes out of a single scan
+    cursor.execute("""
+        SELECT team_id, equipment_id, COUNT(*),
+               SUM(status IN ('New', 'In Progress')),
+               SUM(status = 'Repaired')
+        FROM maintenance_requests
+        GROUP BY team_id, equipment_id
+    """)
+    team_counts = dict.fromkeys(teams, 0)
+    equipment_counts = dict.fromkeys(equipment, 0)
+    open_requests = 0
+    completed_requests = 0
+    for team_id, equipment_id, total, open_count, completed_count in cursor.fetchall():
+        team_counts[team_id] = team_counts.get(team_id, 0) + total
+        equipment_counts[equipment_id] = equipment_counts.get(equipment_id, 0) + total
+        open_requests += int(open_count or 0)
+        completed_requests += int(completed_count or 0)
+
+    return {
+        'teams': teams,
+        'team_counts': team_counts,
+        'equipment': equipment,
+        'equipment_counts': equipment_counts,
+        'open_requests': open_requests,
+        'completed_requests': completed_requests
+    }
@@ -0,0 +1,262 @@
+"""Thread-safe MySQL connection pool used by the GearGuard Flask API."""
+import threading
+import time
+from collections import deque
+
+import mysql.connector
+from mysql.connector import Error
+
+
+# Prepared statements kept open per connection before the oldest is closed
+MAX_PREPARED_STATEMENTS = 64
+
+
+class PoolError(Exception):
+    """Raised when a connection cannot be checked out of the pool"""
+
+
+class _ConnectionRecord:
+    __slots__ = ('connection', 'created_at', 'last_used', 'statements')
+
+    def __init__(self, connection):
+        now = time.monotonic()
+        self.connection = connection
+        self.created_at = now
+        self.last_used = now
+        # sql -> prepared cursor; lives and dies with the connection
+        self.statements = {}
+
+
+class PooledConnection:
+    """Proxy around a raw connection; close() hands it back to the pool.
+
+    Usable as a context manager so handlers always return their connection,
+    even when the body raises.
+    """
+
+    def __init__(self, pool, record):
+        self._pool = pool
+        self._record = record
+
+    def __getattr__(self, name):
+        record = self.__dict__.get('_record')
+        if record is None:
+            raise PoolError('Connection has already been returned to the pool')
+        return getattr(record.connection, name)
+
+    def cursor(self, *args, **kwargs):
+        record = self._record
+        if record is None:
+            raise PoolError('Connection has already been returned to the pool')
+        return self._observe(record.connection.cursor(*args, **kwargs))
+
+    def prepared_cursor(self, sql):
+        """Server-side prepared cursor for sql, cached for the life of the connection"""
+        record = self._record
+        if record is None:
+            raise PoolError('Connection has already been returned to the pool')
+        statements = record.statements
+        cursor = statements.get(sql)
+        if cursor is None:
+            if len(statements) >= MAX_PREPARED_STATEMENTS:
+                oldest = next(iter(statements))
+                statements.pop(oldest).close()
+            cursor = statements[sql] = record.connection.cursor(prepared=True)
+        return self._observe(cursor)
+
+    def _observe(self, cursor):
+        observer = self._pool.observer
+        return observer.cursor(cursor) if observer is not None else cursor
+
+    def close(self):
+        record, self._record = self._record, None
+        if record is not None:
+            self._pool._release(record)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+class ConnectionPool:
+    """Fixed-size pool with bounded overflow.
+
+    - ``size`` connections are kept idle between requests; up to
+      ``max_overflow`` extra connections are opened under load and closed
+      again when they are returned.
+    - Connections idle for longer than ``ping_interval`` seconds are pinged
+      (and reconnected) on checkout; connections older than ``recycle`` or
+      idle for longer than ``idle_timeout`` seconds are replaced.
+    - Callers block for at most ``timeout`` seconds waiting for a free slot.
+    - An optional ``observer`` (see metrics.Metrics) is told each checkout's
+      wait and may wrap every cursor handed out, e.g. to time queries.
+    """
+
+    def __init__(self, db_config, size=10, max_overflow=10, timeout=30,
+                 recycle=3600, ping_interval=30, idle_timeout=600, observer=None):
+        self.db_config = dict(db_config)
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.ping_interval = ping_interval
+        self.idle_timeout = idle_timeout
+        self.observer = observer
+
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._idle = deque()
+        self._total = 0
+        self._in_use = 0
+        self._waiters = 0
+        self._checkouts = 0
+        self._timeouts = 0
+        self._recycled = 0
+        self._reconnects = 0
+        self._checkout_time_total = 0.0
+        self._checkout_time_max = 0.0
+
+    def connect(self):
+        """Check a connection out of the pool"""
+        started = time.monotonic()
+        deadline = started + self.timeout
+        stale = []
+        record = None
+        with self._lock:
+            while True:
+                record = self._pop_idle(stale)
+                if record is not None:
+                    break
+                if self._total < self.size + self.max_overflow:
+                    self._total += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    self._close_all(stale)
+                    raise PoolError(f'Timed out after {self.timeout}s waiting for a connection')
+                self._waiters += 1
+                try:
+                    self._available.wait(remaining)
+                finally:
+                    self._waiters -= 1
+        self._close_all(stale)
+
+        try:
+            record = self._prepare(record)
+        except Error as e:
+            with self._lock:
+                self._total -= 1
+                self._available.notify()
+            raise PoolError(str(e)) from e
+
+        elapsed = time.monotonic() - started
+        with self._lock:
+            self._in_use += 1
+            self._checkouts += 1
+            self._checkout_time_total += elapsed
+            if elapsed > self._checkout_time_max:
+                self._checkout_time_max = elapsed
+        if self.observer is not None:
+            self.observer.checkout(elapsed)
+        return PooledConnection(self, record)
+
+    def stats(self):
+        """Return a snapshot of pool usage counters"""
+        with self._lock:
+            checkouts = self._checkouts
+            return {
+                'size': self.size,
+                'max_overflow': self.max_overflow,
+                'open': self._total,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'overflow': max(0, self._total - self.size),
+                'waiters': self._waiters,
+                'checkouts': checkouts,
+                'timeouts': self._timeouts,
+                'recycled': self._recycled,
+                'reconnects': self._reconnects,
+                'checkout_ms_avg': round(self._checkout_time_total / checkouts * 1000, 3) if checkouts else 0.0,
+                'checkout_ms_max': round(self._checkout_time_max * 1000, 3),
+            }
+
+    def dispose(self):
+        """Close every idle connection; checked-out ones close on return"""
+        with self._lock:
+            records = list(self._idle)
+            self._idle.clear()
+            self._total -= len(records)
+            self._available.notify_all()
+        self._close_all(records)
+
+    def _pop_idle(self, stale):
+        # Most recently used first, so surplus connections age out at the left.
+        now = time.monotonic()
+        while self._idle and now - self._idle[0].last_used > self.idle_timeout:
+            stale.append(self._idle.popleft())
+            self._total -= 1
+            self._recycled += 1
+        if self._idle:
+            return self._idle.pop()
+        return None
+
+    def _prepare(self, record):
+        if record is None:
+            return _ConnectionRecord(mysql.connector.connect(**self.db_config))
+
+        now = time.monotonic()
+        if now - record.created_at > self.recycle:
+            self._close_quietly(record.connection)
+            with self._lock:
+                self._recycled += 1
+            return _ConnectionRecord(mysql.connector.connect(**self.db_config))
+
+        if now - record.last_used > self.ping_interval:
+            try:
+                record.connection.ping(reconnect=False)
+            except Error:
+                self._close_quietly(record.connection)
+                with self._lock:
+                    self._reconnects += 1
+                return _ConnectionRecord(mysql.connector.connect(**self.db_config))
+        return record
+
+    def _release(self, record):
+        connection = record.connection
+        healthy = True
+        try:
+            # Never hand the next caller an open transaction or a stale snapshot.
+            if connection.unread_result:
+                connection.consume_results()
+            if connection.in_transaction:
+                connection.rollback()
+        except Error:
+            healthy = False
+
+        with self._lock:
+            self._in_use -= 1
+            if healthy and len(self._idle) < self.size:
+                record.last_used = time.monotonic()
+                self._idle.append(record)
+                connection = None
+            else:
+                self._total -= 1
+            self._available.notify()
+        if connection is not None:
+            self._close_quietly(connection)
+
+    def _close_all(self, records):
+        for record in records:
+            self._close_quietly(record.connection)
+        records.clear()
+
+    @staticmethod
+    def _close_quietly(connection):
+        try:
+            connection.close()
+        except Error:
+            pass
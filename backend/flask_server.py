@@ -1,16 +1,47 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
 from flask_cors import CORS
-import mysql.connector
 from mysql.connector import Error
-from datetime import datetime, date
+import csv
+import functools
+import hashlib
+import io
+import itertools
 import os
+import threading
+import time
+import click
 from dotenv import load_dotenv
+import bulk
+import maintenance_plans
+from change_feed import FeedFull, feed_from_env
+from coalesce import SingleFlight
+from db_pool import ConnectionPool, PoolError
+from metrics import Metrics
+from dashboard_stats import DashboardSummary, load_snapshot
+from workload import TechnicianWorkload, load_workload
+from serializers import FastJSONProvider, row_serializer
+import repository
+import schema_migrations
+from reference_cache import cache_from_env, versioned_key
+from query_args import (
+    BOOTSTRAP_LISTS, QueryArgError, bootstrap_lookup_query, calendar_query, decode_cursor,
+    equipment_list_query, export_query, kanban_board, kanban_board_query, kanban_column_query,
+    kanban_column_status, kanban_limit, open_request_counts_query, paginated_response, parse_date_arg,
+    parse_export_format, parse_fields_arg, parse_flag_arg, parse_id_list, parse_int_arg, parse_search_args,
+    plan_list_query, request_list_query, search_queries
+)
 
 load_dotenv()
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 CORS(app, resources={r"/api/*": {"origins": "*"}})
 
+# Per-route latency, DB time and serialization time, served at /api/metrics;
+# statements slower than SLOW_QUERY_MS are logged with their SQL shape
+metrics = Metrics(slow_query_seconds=float(os.environ.get('SLOW_QUERY_MS', 200)) / 1000)
+metrics.init_app(app)
+
 # MySQL Configuration
 DB_CONFIG = {
     'host': 'localhost',
@@ -19,327 +50,467 @@ DB_CONFIG = {
     'database': 'gearguard'
 }
 
+# Connection pool configuration (all values overridable from the environment)
+db_pool = ConnectionPool(
+    DB_CONFIG,
+    size=int(os.environ.get('DB_POOL_SIZE', 10)),
+    max_overflow=int(os.environ.get('DB_POOL_MAX_OVERFLOW', 10)),
+    timeout=float(os.environ.get('DB_POOL_TIMEOUT', 30)),
+    recycle=float(os.environ.get('DB_POOL_RECYCLE', 3600)),
+    ping_interval=float(os.environ.get('DB_POOL_PING_INTERVAL', 30)),
+    idle_timeout=float(os.environ.get('DB_POOL_IDLE_TIMEOUT', 600)),
+    observer=metrics
+)
+
 def get_db_connection():
-    """Create and return a database connection"""
+    """Check a connection out of the pool.
+
+    Use the result as a context manager so it always goes back to the pool.
+    Raises PoolError when no connection can be obtained.
+    """
+    return db_pool.connect()
+
+@app.errorhandler(PoolError)
+def handle_pool_error(e):
+    print(f"Error connecting to MySQL: {e}")
+    return jsonify({'error': 'Database connection failed'}), 500
+
+# Tables whose change counters feed the ETags of the read endpoints
+VERSIONED_TABLES = ('maintenance_teams', 'technicians', 'equipment', 'maintenance_requests')
+
+def init_database():
+    """Apply pending schema migrations (see schema_migrations.py).
+
+    Not run at import: use `flask --app flask_server init-db`,
+    `python schema_migrations.py upgrade` (what the gunicorn start and
+    reload hooks run), or the dev entry point below. When the schema is
+    current this is a single version lookup.
+    """
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
-        return connection
-    except Error as e:
+        connection = get_db_connection()
+    except PoolError as e:
         print(f"Error connecting to MySQL: {e}")
+        return False
+    
+    with connection:
+        try:
+            applied = schema_migrations.migrate(connection)
+        except (Error, schema_migrations.MigrationError) as e:
+            print(f"Error initializing database: {e}")
+            return False
+    if applied:
+        print(f"Database schema migrated to version {applied[-1]}")
+    return True
+
+@app.cli.command('init-db')
+def init_db_command():
+    """Apply pending schema migrations"""
+    if not init_database():
+        raise SystemExit(1)
+
+# ============== QUERY ARGUMENT ERRORS ==============
+
+@app.errorhandler(QueryArgError)
+def handle_query_arg_error(e):
+    return jsonify({'error': str(e)}), 400
+
+def wants_total():
+    return parse_flag_arg(request.args, 'include_total')
+
+# ============== STREAMING HELPERS ==============
+
+# Rows fetched from the server per round trip when streaming
+STREAM_BATCH_SIZE = 500
+
+STREAM_MIMETYPES = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+def parse_stream_arg():
+    """Return 'json', 'ndjson' or None from the ?stream= argument"""
+    mode = request.args.get('stream')
+    if mode in (None, '', '0', 'false'):
         return None
+    if mode in ('1', 'true', 'json'):
+        return 'json'
+    if mode == 'ndjson':
+        return 'ndjson'
+    raise QueryArgError("stream must be 'json' or 'ndjson'")
 
-def init_database():
-    """Initialize database with tables"""
+def stream_rows(sql, params, mode, filename=None, booleans=()):
+    """Stream a query result as a JSON array, NDJSON or CSV without materializing it.
+
+    The query runs on an unbuffered cursor and rows are pulled with
+    fetchmany, so memory stays flat and the first chunk is sent while the
+    server is still producing rows. The connection is held until the
+    response is closed. With a filename the body is sent as an attachment.
+    booleans are the query's TINYINT(1) columns, as for repository.fetch_all.
+    """
     connection = get_db_connection()
-    if not connection:
-        return False
-    
-    cursor = connection.cursor()
-    
     try:
-        # Create maintenance_teams table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS maintenance_teams (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                team_name VARCHAR(255) NOT NULL UNIQUE,
-                description TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Create technicians table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS technicians (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                name VARCHAR(255) NOT NULL,
-                email VARCHAR(255) NOT NULL UNIQUE,
-                team_id INT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (team_id) REFERENCES maintenance_teams(id) ON DELETE CASCADE
-            )
-        """)
-        
-        # Create equipment table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS equipment (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                name VARCHAR(255) NOT NULL,
-                serial_number VARCHAR(255) NOT NULL UNIQUE,
-                department VARCHAR(255),
-                assigned_employee VARCHAR(255),
-                location VARCHAR(255),
-                purchase_date DATE,
-                warranty_end DATE,
-                maintenance_team_id INT,
-                is_scrapped BOOLEAN DEFAULT FALSE,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (maintenance_team_id) REFERENCES maintenance_teams(id)
-            )
-        """)
-        
-        # Create maintenance_requests table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS maintenance_requests (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                subject VARCHAR(255) NOT NULL,
-                equipment_id INT NOT NULL,
-                team_id INT NOT NULL,
-                technician_id INT,
-                request_type ENUM('Corrective', 'Preventive') NOT NULL,
-                scheduled_date DATE,
-                duration_hours DECIMAL(5,2),
-                status ENUM('New', 'In Progress', 'Repaired', 'Scrap') DEFAULT 'New',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                FOREIGN KEY (equipment_id) REFERENCES equipment(id) ON DELETE CASCADE,
-                FOREIGN KEY (team_id) REFERENCES maintenance_teams(id),
-                FOREIGN KEY (technician_id) REFERENCES technicians(id)
-            )
-        """)
-        
-        connection.commit()
-        print("Database tables created successfully")
-        
-        # Insert seed data if tables are empty
-        cursor.execute("SELECT COUNT(*) FROM maintenance_teams")
-        if cursor.fetchone()[0] == 0:
-            # Seed teams
-            teams = [
-                ('Mechanics', 'Mechanical equipment maintenance'),
-                ('Electricians', 'Electrical systems maintenance'),
-                ('IT Support', 'Computer and network maintenance')
-            ]
-            cursor.executemany(
-                "INSERT INTO maintenance_teams (team_name, description) VALUES (%s, %s)",
-                teams
-            )
-            
-            # Seed technicians
-            technicians = [
-                ('John Smith', 'john.smith@gearguard.com', 1),
-                ('Mike Johnson', 'mike.j@gearguard.com', 1),
-                ('Sarah Williams', 'sarah.w@gearguard.com', 2),
-                ('Emily Brown', 'emily.b@gearguard.com', 2),
-                ('David Lee', 'david.l@gearguard.com', 3),
-                ('Lisa Chen', 'lisa.c@gearguard.com', 3)
-            ]
-            cursor.executemany(
-                "INSERT INTO technicians (name, email, team_id) VALUES (%s, %s, %s)",
-                technicians
-            )
-            
-            # Seed equipment
-            equipment = [
-                ('CNC Machine A1', 'CNC-001', 'Production', 'Tom Hardy', 'Floor 1 - Zone A', '2022-01-15', '2025-01-15', 1, False),
-                ('Lathe Machine', 'LTH-002', 'Production', 'Jane Doe', 'Floor 1 - Zone B', '2021-06-10', '2024-06-10', 1, False),
-                ('Generator Unit', 'GEN-003', 'Power', 'Bob Smith', 'Basement', '2020-03-20', '2025-03-20', 2, False),
-                ('Server Rack', 'SRV-004', 'IT', 'Alice Johnson', 'Data Center', '2023-05-12', '2026-05-12', 3, False),
-                ('Air Compressor', 'CMP-005', 'Production', 'Charlie Brown', 'Floor 2', '2021-11-30', '2024-11-30', 1, False)
-            ]
-            cursor.executemany(
-                """INSERT INTO equipment (name, serial_number, department, assigned_employee, 
-                location, purchase_date, warranty_end, maintenance_team_id, is_scrapped) 
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)""",
-                equipment
-            )
-            
-            connection.commit()
-            print("Seed data inserted successfully")
-        
-        return True
-    except Error as e:
-        print(f"Error initializing database: {e}")
-        connection.rollback()
-        return False
-    finally:
-        cursor.close()
+        cursor = connection.cursor()
+        cursor.execute(sql, params)
+    except BaseException:
         connection.close()
+        raise
+    serialize = row_serializer(cursor, booleans)
+    dumps = app.json.dumps
+    
+    def csv_chunks():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(column[0] for column in cursor.description)
+        while True:
+            rows = cursor.fetchmany(STREAM_BATCH_SIZE)
+            if not rows:
+                break
+            writer.writerows(serialize(row).values() for row in rows)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+    
+    def json_chunks():
+        separator = ',' if mode == 'json' else '\n'
+        if mode == 'json':
+            yield '['
+        first = True
+        while True:
+            rows = cursor.fetchmany(STREAM_BATCH_SIZE)
+            if not rows:
+                break
+            chunk = separator.join(dumps(serialize(row)) for row in rows)
+            if mode == 'json':
+                yield chunk if first else ',' + chunk
+            else:
+                yield chunk + '\n'
+            first = False
+        if mode == 'json':
+            yield ']'
+    
+    def generate():
+        try:
+            yield from csv_chunks() if mode == 'csv' else json_chunks()
+        finally:
+            cursor.close()
+            connection.close()
+    
+    response = Response(generate(), mimetype=STREAM_MIMETYPES[mode])
+    # Also fires when the client disconnects before the generator starts
+    response.call_on_close(connection.close)
+    response.headers['X-Accel-Buffering'] = 'no'
+    if filename:
+        response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+# ============== CONDITIONAL GET HELPERS ==============
 
-# Initialize database on startup
-init_database()
+def bump_versions(connection, *tables):
+    """Advance the change counters of tables; call before the write commits"""
+    for table in tables:
+        repository.execute(connection, repository.TABLE_VERSION_BUMP, (table,))
 
-# Helper function to serialize dates
-def serialize_row(row, columns):
-    result = {}
-    for i, col in enumerate(columns):
-        value = row[i]
-        if isinstance(value, (date, datetime)):
-            result[col] = value.isoformat()
+def table_versions(connection=None):
+    """Change counters of the versioned tables, read once per request.
+
+    Pass the connection a handler already holds so no second one is checked out.
+    """
+    if 'table_versions' not in g:
+        if connection is None:
+            with get_db_connection() as connection:
+                g.table_versions = dict(repository.fetch_raw(connection, repository.TABLE_VERSIONS))
         else:
-            result[col] = value
-    return result
+            g.table_versions = dict(repository.fetch_raw(connection, repository.TABLE_VERSIONS))
+    return g.table_versions
+
+def current_etag(tables):
+    """Weak ETag for the current versions of tables and this request's query string"""
+    versions = table_versions()
+    state = ';'.join(f"{table}={versions.get(table, 0)}" for table in tables)
+    digest = hashlib.sha1(f"{request.path}?{request.query_string.decode()}|{state}".encode()).hexdigest()
+    return digest[:20]
+
+def conditional(*tables):
+    """Answer If-None-Match with 304 when none of tables changed.
+
+    The check costs one primary-key lookup on table_versions, so an
+    unchanged list never runs its JOIN. Responses carry a weak ETag and
+    Cache-Control: no-cache so clients always revalidate.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            etag = g.etag = current_etag(tables)
+            if request.if_none_match.contains_weak(etag):
+                response = Response(status=304)
+            else:
+                response = app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag, weak=True)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorator
+
+# ============== REQUEST COALESCING ==============
+
+# Identical concurrent Kanban and calendar reads share one run and its JSON
+# body; a result is reused for COALESCE_FRESH_SECONDS and then served stale
+# for up to COALESCE_STALE_SECONDS more while one request refreshes it.
+single_flight = SingleFlight(
+    fresh_for=float(os.environ.get('COALESCE_FRESH_SECONDS', 1)),
+    stale_for=float(os.environ.get('COALESCE_STALE_SECONDS', 5))
+)
+
+# ============== REFERENCE DATA CACHE ==============
+
+# Teams, technicians and equipment -> team lookups change a few times a
+# week. Keys carry the versions of the tables an entry was read from, so a
+# write in any worker (which bumps table_versions) makes every worker miss,
+# and a body cached under an old version is never served with a newer ETag.
+# The write handlers still invalidate locally to free the old entries early.
+reference_cache = cache_from_env()
+
+def reference_key(namespace, key, connection=None):
+    """key qualified with the versions of the namespace's tables.
+
+    A conditional GET has already read this request's versions, so its
+    cached body always matches its ETag. Elsewhere (create_request) the
+    worker-wide copy is used while it is younger than REF_CACHE_VERSION_TTL,
+    so a cache hit costs no table_versions query.
+    """
+    if 'table_versions' not in g:
+        versions = reference_cache.table_versions()
+        if versions is not None:
+            return versioned_key(namespace, key, versions)
+    return versioned_key(namespace, key, reference_cache.remember_versions(table_versions(connection)))
+
+def cached_rows(namespace, key, sql, params=()):
+    """Rows of a fixed-shape query, read through reference_cache"""
+    def load():
+        with get_db_connection() as connection:
+            return repository.fetch_all(connection, sql, params)
+    return reference_cache.get(namespace, reference_key(namespace, key), load)
+
+# ============== WRITE RESPONSE HELPERS ==============
+
+def prefers_minimal():
+    """True when the client sent `Prefer: return=minimal` (RFC 7240).
+
+    Write endpoints then answer with the values they just wrote plus the new
+    id instead of re-reading the joined row.
+    """
+    return 'return=minimal' in request.headers.get('Prefer', '')
+
+def minimal_response(record, status=200):
+    response = jsonify(record)
+    response.status_code = status
+    response.headers['Preference-Applied'] = 'return=minimal'
+    return response
 
 # ============== MAINTENANCE TEAMS ENDPOINTS ==============
 
 @app.route('/api/teams', methods=['GET'])
+@conditional('maintenance_teams')
 def get_teams():
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({'error': 'Database connection failed'}), 500
-    
-    cursor = connection.cursor()
-    cursor.execute("SELECT id, team_name, description, created_at FROM maintenance_teams ORDER BY team_name")
-    columns = ['id', 'team_name', 'description', 'created_at']
-    teams = [serialize_row(row, columns) for row in cursor.fetchall()]
-    
-    cursor.close()
-    connection.close()
-    return jsonify(teams)
+    return jsonify(cached_rows('teams', 'all', repository.TEAM_LIST))
 
 @app.route('/api/teams', methods=['POST'])
 def create_team():
     data = request.json
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({'error': 'Database connection failed'}), 500
-    
-    cursor = connection.cursor()
-    try:
-        cursor.execute(
-            "INSERT INTO maintenance_teams (team_name, description) VALUES (%s, %s)",
-            (data['team_name'], data.get('description', ''))
-        )
-        connection.commit()
-        team_id = cursor.lastrowid
-        
-        cursor.execute("SELECT id, team_name, description, created_at FROM maintenance_teams WHERE id = %s", (team_id,))
-        columns = ['id', 'team_name', 'description', 'created_at']
-        team = serialize_row(cursor.fetchone(), columns)
-        
-        return jsonify(team), 201
-    except Error as e:
-        connection.rollback()
-        return jsonify({'error': str(e)}), 400
-    finally:
-        cursor.close()
-        connection.close()
+    with get_db_connection() as connection:
+        try:
+            team_id = repository.execute(
+                connection, repository.TEAM_INSERT,
+                (data['team_name'], data.get('description', ''))
+            )
+            bump_versions(connection, 'maintenance_teams')
+            connection.commit()
+            reference_cache.invalidate('teams', 'technicians')
+            dashboard_summary.team_created(team_id, data['team_name'])
+            
+            if prefers_minimal():
+                return minimal_response({'id': team_id, 'team_name': data['team_name'],
+                                         'description': data.get('description', '')}, 201)
+            team = repository.fetch_one(connection, repository.TEAM_BY_ID, (team_id,))
+            return jsonify(team), 201
+        except Error as e:
+            connection.rollback()
+            return jsonify({'error': str(e)}), 400
 
 @app.route('/api/teams/<int:team_id>/technicians', methods=['GET'])
+@conditional('technicians')
 def get_team_technicians(team_id):
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({'error': 'Database connection failed'}), 500
-    
-    cursor = connection.cursor()
-    cursor.execute(
-        "SELECT id, name, email, team_id FROM technicians WHERE team_id = %s ORDER BY name",
-        (team_id,)
-    )
-    columns = ['id', 'name', 'email', 'team_id']
-    technicians = [serialize_row(row, columns) for row in cursor.fetchall()]
-    
-    cursor.close()
-    connection.close()
-    return jsonify(technicians)
+    return jsonify(cached_rows('team_technicians', team_id, repository.TEAM_TECHNICIANS, (team_id,)))
 
 # ============== TECHNICIANS ENDPOINTS ==============
 
 @app.route('/api/technicians', methods=['GET'])
+@conditional('technicians', 'maintenance_teams')
 def get_technicians():
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({'error': 'Database connection failed'}), 500
+    mode = parse_stream_arg()
+    if mode:
+        return stream_rows(repository.TECHNICIAN_LIST, (), mode)
     
-    cursor = connection.cursor()
-    cursor.execute("""
-        SELECT t.id, t.name, t.email, t.team_id, mt.team_name 
-        FROM technicians t 
-        LEFT JOIN maintenance_teams mt ON t.team_id = mt.id
-        ORDER BY t.name
-    """)
-    columns = ['id', 'name', 'email', 'team_id', 'team_name']
-    technicians = [serialize_row(row, columns) for row in cursor.fetchall()]
-    
-    cursor.close()
-    connection.close()
-    return jsonify(technicians)
+    return jsonify(cached_rows('technicians', 'all', repository.TECHNICIAN_LIST))
 
 @app.route('/api/technicians', methods=['POST'])
 def create_technician():
     data = request.json
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({'error': 'Database connection failed'}), 500
-    
+    with get_db_connection() as connection:
+        try:
+            tech_id = repository.execute(
+                connection, repository.TECHNICIAN_INSERT,
+                (data['name'], data['email'], data['team_id'])
+            )
+            bump_versions(connection, 'technicians')
+            connection.commit()
+            reference_cache.invalidate('technicians', 'team_technicians')
+            technician_workload.technician_added(tech_id, data['team_id'])
+            
+            if prefers_minimal():
+                return minimal_response({'id': tech_id, 'name': data['name'], 'email': data['email'],
+                                         'team_id': data['team_id']}, 201)
+            technician = repository.fetch_one(connection, repository.TECHNICIAN_BY_ID, (tech_id,))
+            return jsonify(technician), 201
+        except Error as e:
+            connection.rollback()
+            return jsonify({'error': str(e)}), 400
+
+# ============== TECHNICIAN WORKLOAD ==============
+
+def load_workload_snapshot(connection=None):
+    """Workload index rows, read on the caller's connection when it holds one"""
+    if connection is None:
+        with get_db_connection() as connection:
+            return load_workload_snapshot(connection)
     cursor = connection.cursor()
     try:
-        cursor.execute(
-            "INSERT INTO technicians (name, email, team_id) VALUES (%s, %s, %s)",
-            (data['name'], data['email'], data['team_id'])
-        )
-        connection.commit()
-        tech_id = cursor.lastrowid
-        
-        cursor.execute("""
-            SELECT t.id, t.name, t.email, t.team_id, mt.team_name 
-            FROM technicians t 
-            LEFT JOIN maintenance_teams mt ON t.team_id = mt.id
-            WHERE t.id = %s
-        """, (tech_id,))
-        columns = ['id', 'name', 'email', 'team_id', 'team_name']
-        technician = serialize_row(cursor.fetchone(), columns)
-        
-        return jsonify(technician), 201
-    except Error as e:
-        connection.rollback()
-        return jsonify({'error': str(e)}), 400
+        return load_workload(cursor)
     finally:
         cursor.close()
-        connection.close()
+
+# Open requests and scheduled hours per technician, kept in memory like the
+# dashboard counters; picks the assignee when a request asks for auto_assign
+technician_workload = TechnicianWorkload(
+    load_workload_snapshot,
+    reconcile_interval=float(os.environ.get('WORKLOAD_RECONCILE_SECONDS', 60)),
+    daily_hours=float(os.environ.get('TECHNICIAN_DAILY_HOURS', 8))
+)
+
+# Assign every new request that arrives without a technician, not only auto_assign ones
+AUTO_ASSIGN_REQUESTS = os.environ.get('AUTO_ASSIGN_REQUESTS', '0') in ('1', 'true')
+
+@app.route('/api/teams/<int:team_id>/workload', methods=['GET'])
+def get_team_workload(team_id):
+    """Open requests and scheduled hours per technician of a team, least loaded first.
+
+    'suggested_technician_id' is who auto-assignment would pick for a
+    request on ?scheduled_date= lasting ?duration_hours=.
+    """
+    scheduled_date = parse_date_arg(request.args, 'scheduled_date')
+    duration_hours = request.args.get('duration_hours', type=float)
+    return jsonify({
+        'team_id': team_id,
+        'technicians': technician_workload.team_workload(team_id),
+        'suggested_technician_id': technician_workload.pick(team_id, scheduled_date, duration_hours),
+    })
+
+@app.route('/api/teams/<int:team_id>/rebalance', methods=['POST'])
+def rebalance_team(team_id):
+    """Spread a team's New requests evenly over its technicians.
+
+    Unassigned New requests are assigned first, then the newest New
+    requests move from the busiest to the least busy technicians until
+    open counts differ by at most one. In Progress work never moves.
+    ?dry_run=1 returns the moves without applying them.
+    """
+    dry_run = parse_flag_arg(request.args, 'dry_run')
+    with get_db_connection() as connection:
+        backlog = repository.fetch_raw(connection, repository.TEAM_NEW_BACKLOG, (team_id,))
+        moves = technician_workload.rebalance(team_id, [row[:2] for row in backlog], connection=connection)
+        applied = moves
+        if moves and not dry_run:
+            cases = ' '.join(['WHEN %s THEN %s'] * len(moves))
+            placeholders = ', '.join(['%s'] * len(moves))
+            params = tuple(value for request_id, _, technician_id in moves for value in (request_id, technician_id))
+            try:
+                # One statement for the whole plan; status = 'New' skips anything picked up meanwhile
+                repository.execute(
+                    connection,
+                    f"UPDATE maintenance_requests SET technician_id = CASE id {cases} END "
+                    f"WHERE id IN ({placeholders}) AND status = 'New'",
+                    params + tuple(request_id for request_id, _, _ in moves), prepared=False
+                )
+                # Read back (under the row locks just taken) which moves the UPDATE applied
+                current = {row[0]: row[1:] for row in repository.fetch_raw(
+                    connection,
+                    f"SELECT id, technician_id, status, scheduled_date, duration_hours "
+                    f"FROM maintenance_requests WHERE id IN ({placeholders})",
+                    tuple(request_id for request_id, _, _ in moves), prepared=False
+                )}
+                applied = [move for move in moves
+                           if move[0] in current and current[move[0]][:2] == (move[2], 'New')]
+                if applied:
+                    bump_versions(connection, 'maintenance_requests')
+                connection.commit()
+            except Error as e:
+                connection.rollback()
+                return jsonify({'error': str(e)}), 400
+            
+            if len(applied) < len(moves):
+                # Some requests changed under the plan: rebuild the index from what is stored
+                technician_workload.reload(connection)
+            else:
+                for request_id, _, technician_id in applied:
+                    technician_workload.request_saved(request_id, technician_id, 'New', *current[request_id][2:])
+            if applied:
+                change_feed.publish('reset')
+        workload = technician_workload.team_workload(team_id, connection=connection)
+    
+    return jsonify({
+        'dry_run': dry_run,
+        'moves': [{'id': request_id, 'from': source, 'to': target} for request_id, source, target in applied],
+        'technicians': workload,
+    })
 
 # ============== EQUIPMENT ENDPOINTS ==============
 
 @app.route('/api/equipment', methods=['GET'])
+@conditional('equipment', 'maintenance_teams', 'maintenance_requests')
 def get_equipment():
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({'error': 'Database connection failed'}), 500
+    """List equipment ordered by name, with each machine's open request count.
+
+    Filters: team_id, department (comma-separated), is_scrapped.
+    Passing limit and/or cursor switches to keyset pagination on (name, id)
+    and returns {'items', 'next_cursor'}, plus 'total' when include_total=1.
+    stream=json|ndjson streams the rows instead of building the list.
+    """
+    mode = parse_stream_arg()
+    query = equipment_list_query(request.args, lookahead=not mode)
+    if mode:
+        return stream_rows(query.sql, query.params, mode, booleans=repository.EQUIPMENT_BOOLEANS)
     
-    cursor = connection.cursor()
-    cursor.execute("""
-        SELECT e.id, e.name, e.serial_number, e.department, e.assigned_employee, 
-               e.location, e.purchase_date, e.warranty_end, e.maintenance_team_id, 
-               e.is_scrapped, mt.team_name
-        FROM equipment e
-        LEFT JOIN maintenance_teams mt ON e.maintenance_team_id = mt.id
-        ORDER BY e.name
-    """)
-    columns = ['id', 'name', 'serial_number', 'department', 'assigned_employee', 
-               'location', 'purchase_date', 'warranty_end', 'maintenance_team_id', 
-               'is_scrapped', 'team_name']
-    equipment_list = [serialize_row(row, columns) for row in cursor.fetchall()]
-    
-    cursor.close()
-    connection.close()
+    with get_db_connection() as connection:
+        equipment_list = repository.fetch_all(connection, query.sql, query.params, prepared=False,
+                                              booleans=repository.EQUIPMENT_BOOLEANS)
+        total = None
+        if query.limit and wants_total():
+            total = repository.fetch_raw(connection, query.count_sql, query.count_params, prepared=False)[0][0]
+    
+    if query.limit:
+        return jsonify(paginated_response(equipment_list, query.limit, ('name', 'id'), total))
     return jsonify(equipment_list)
 
 @app.route('/api/equipment/<int:equipment_id>', methods=['GET'])
+@conditional('equipment', 'maintenance_teams')
 def get_equipment_by_id(equipment_id):
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({'error': 'Database connection failed'}), 500
-    
-    cursor = connection.cursor()
-    cursor.execute("""
-        SELECT e.id, e.name, e.serial_number, e.department, e.assigned_employee, 
-               e.location, e.purchase_date, e.warranty_end, e.maintenance_team_id, 
-               e.is_scrapped, mt.team_name
-        FROM equipment e
-        LEFT JOIN maintenance_teams mt ON e.maintenance_team_id = mt.id
-        WHERE e.id = %s
-    """, (equipment_id,))
-    result = cursor.fetchone()
-    
-    if result:
-        columns = ['id', 'name', 'serial_number', 'department', 'assigned_employee', 
-                   'location', 'purchase_date', 'warranty_end', 'maintenance_team_id', 
-                   'is_scrapped', 'team_name']
-        equipment = serialize_row(result, columns)
-    else:
-        equipment = None
-    
-    cursor.close()
-    connection.close()
+    with get_db_connection() as connection:
+        equipment = repository.fetch_one(connection, repository.EQUIPMENT_BY_ID, (equipment_id,),
+                                         booleans=repository.EQUIPMENT_BOOLEANS)
     
     if equipment:
         return jsonify(equipment)
@@ -348,410 +519,912 @@ def get_equipment_by_id(equipment_id):
 @app.route('/api/equipment', methods=['POST'])
 def create_equipment():
     data = request.json
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({'error': 'Database connection failed'}), 500
-    
-    cursor = connection.cursor()
-    try:
-        cursor.execute("""
-            INSERT INTO equipment (name, serial_number, department, assigned_employee, 
-                                   location, purchase_date, warranty_end, maintenance_team_id, is_scrapped)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """, (
-            data['name'],
-            data['serial_number'],
-            data.get('department'),
-            data.get('assigned_employee'),
-            data.get('location'),
-            data.get('purchase_date'),
-            data.get('warranty_end'),
-            data.get('maintenance_team_id'),
-            data.get('is_scrapped', False)
-        ))
-        connection.commit()
-        equipment_id = cursor.lastrowid
-        
-        cursor.execute("""
-            SELECT e.id, e.name, e.serial_number, e.department, e.assigned_employee, 
-                   e.location, e.purchase_date, e.warranty_end, e.maintenance_team_id, 
-                   e.is_scrapped, mt.team_name
-            FROM equipment e
-            LEFT JOIN maintenance_teams mt ON e.maintenance_team_id = mt.id
-            WHERE e.id = %s
-        """, (equipment_id,))
-        columns = ['id', 'name', 'serial_number', 'department', 'assigned_employee', 
-                   'location', 'purchase_date', 'warranty_end', 'maintenance_team_id', 
-                   'is_scrapped', 'team_name']
-        equipment = serialize_row(cursor.fetchone(), columns)
-        
-        return jsonify(equipment), 201
-    except Error as e:
-        connection.rollback()
-        return jsonify({'error': str(e)}), 400
-    finally:
-        cursor.close()
-        connection.close()
+    with get_db_connection() as connection:
+        try:
+            written = repository.values(data, repository.EQUIPMENT_FIELDS, {'is_scrapped': False})
+            equipment_id = repository.execute(connection, repository.EQUIPMENT_INSERT, written)
+            bump_versions(connection, 'equipment')
+            connection.commit()
+            reference_cache.invalidate('equipment_team')
+            dashboard_summary.equipment_saved(equipment_id, data['name'], data.get('is_scrapped', False))
+            
+            if prefers_minimal():
+                return minimal_response({'id': equipment_id, **dict(zip(repository.EQUIPMENT_FIELDS, written))}, 201)
+            equipment = repository.fetch_one(connection, repository.EQUIPMENT_BY_ID, (equipment_id,),
+                                             booleans=repository.EQUIPMENT_BOOLEANS)
+            return jsonify(equipment), 201
+        except Error as e:
+            connection.rollback()
+            return jsonify({'error': str(e)}), 400
 
 @app.route('/api/equipment/<int:equipment_id>', methods=['PUT'])
 def update_equipment(equipment_id):
     data = request.json
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({'error': 'Database connection failed'}), 500
-    
-    cursor = connection.cursor()
-    try:
-        cursor.execute("""
-            UPDATE equipment 
-            SET name = %s, serial_number = %s, department = %s, assigned_employee = %s,
-                location = %s, purchase_date = %s, warranty_end = %s, 
-                maintenance_team_id = %s, is_scrapped = %s
-            WHERE id = %s
-        """, (
-            data['name'],
-            data['serial_number'],
-            data.get('department'),
-            data.get('assigned_employee'),
-            data.get('location'),
-            data.get('purchase_date'),
-            data.get('warranty_end'),
-            data.get('maintenance_team_id'),
-            data.get('is_scrapped', False),
-            equipment_id
-        ))
-        connection.commit()
-        
-        cursor.execute("""
-            SELECT e.id, e.name, e.serial_number, e.department, e.assigned_employee, 
-                   e.location, e.purchase_date, e.warranty_end, e.maintenance_team_id, 
-                   e.is_scrapped, mt.team_name
-            FROM equipment e
-            LEFT JOIN maintenance_teams mt ON e.maintenance_team_id = mt.id
-            WHERE e.id = %s
-        """, (equipment_id,))
-        columns = ['id', 'name', 'serial_number', 'department', 'assigned_employee', 
-                   'location', 'purchase_date', 'warranty_end', 'maintenance_team_id', 
-                   'is_scrapped', 'team_name']
-        equipment = serialize_row(cursor.fetchone(), columns)
-        
-        return jsonify(equipment)
-    except Error as e:
-        connection.rollback()
-        return jsonify({'error': str(e)}), 400
-    finally:
-        cursor.close()
-        connection.close()
+    with get_db_connection() as connection:
+        try:
+            written = repository.values(data, repository.EQUIPMENT_FIELDS, {'is_scrapped': False})
+            repository.execute(connection, repository.EQUIPMENT_UPDATE, written + (equipment_id,))
+            bump_versions(connection, 'equipment')
+            connection.commit()
+            reference_cache.invalidate('equipment_team')
+            dashboard_summary.equipment_saved(equipment_id, data['name'], data.get('is_scrapped', False))
+            
+            if prefers_minimal():
+                return minimal_response({'id': equipment_id, **dict(zip(repository.EQUIPMENT_FIELDS, written))})
+            equipment = repository.fetch_one(connection, repository.EQUIPMENT_BY_ID, (equipment_id,),
+                                             booleans=repository.EQUIPMENT_BOOLEANS)
+            return jsonify(equipment)
+        except Error as e:
+            connection.rollback()
+            return jsonify({'error': str(e)}), 400
 
 @app.route('/api/equipment/<int:equipment_id>/maintenance_count', methods=['GET'])
 def get_maintenance_count(equipment_id):
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({'error': 'Database connection failed'}), 500
-    
-    cursor = connection.cursor()
-    cursor.execute("""
-        SELECT COUNT(*) FROM maintenance_requests 
-        WHERE equipment_id = %s AND status IN ('New', 'In Progress')
-    """, (equipment_id,))
-    count = cursor.fetchone()[0]
-    
-    cursor.close()
-    connection.close()
+    with get_db_connection() as connection:
+        count = repository.fetch_raw(connection, repository.EQUIPMENT_OPEN_COUNT, (equipment_id,))[0][0]
     return jsonify({'count': count})
 
+# Upper bound on ids accepted by the batch count endpoint
+MAX_BATCH_IDS = 1000
+
+@app.route('/api/equipment/maintenance_counts', methods=['GET'])
+def get_maintenance_counts():
+    """Open request counts for many equipment ids in one query (?ids=1,2,3)"""
+    ids = parse_id_list(request.args.get('ids'), MAX_BATCH_IDS)
+    counts = {str(equipment_id): 0 for equipment_id in ids}
+    if not ids:
+        return jsonify({'counts': counts})
+    
+    sql, params = open_request_counts_query(ids)
+    with get_db_connection() as connection:
+        rows = repository.fetch_raw(connection, sql, params, prepared=False)
+    for equipment_id, count in rows:
+        counts[str(equipment_id)] = count
+    return jsonify({'counts': counts})
+
 # ============== MAINTENANCE REQUESTS ENDPOINTS ==============
 
 @app.route('/api/requests', methods=['GET'])
+@conditional(*VERSIONED_TABLES)
 def get_requests():
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({'error': 'Database connection failed'}), 500
+    """List maintenance requests, newest first.
+
+    Filters: status and request_type (comma-separated), team_id,
+    technician_id, equipment_id, created_from/created_to and
+    scheduled_from/scheduled_to (YYYY-MM-DD, inclusive).
+    Passing limit and/or cursor switches to keyset pagination on
+    (created_at, id) and returns {'items', 'next_cursor'}, plus 'total'
+    when include_total=1. Without them the full filtered list is returned.
+    stream=json|ndjson streams the rows instead of building the list.
+    """
+    mode = parse_stream_arg()
+    query = request_list_query(request.args, lookahead=not mode)
+    if mode:
+        return stream_rows(query.sql, query.params, mode)
     
-    cursor = connection.cursor()
-    cursor.execute("""
-        SELECT mr.id, mr.subject, mr.equipment_id, mr.team_id, mr.technician_id,
-               mr.request_type, mr.scheduled_date, mr.duration_hours, mr.status,
-               mr.created_at, mr.updated_at,
-               e.name as equipment_name, e.serial_number,
-               mt.team_name,
-               t.name as technician_name, t.email as technician_email
-        FROM maintenance_requests mr
-        LEFT JOIN equipment e ON mr.equipment_id = e.id
-        LEFT JOIN maintenance_teams mt ON mr.team_id = mt.id
-        LEFT JOIN technicians t ON mr.technician_id = t.id
-        ORDER BY mr.created_at DESC
-    """)
-    columns = ['id', 'subject', 'equipment_id', 'team_id', 'technician_id',
-               'request_type', 'scheduled_date', 'duration_hours', 'status',
-               'created_at', 'updated_at', 'equipment_name', 'serial_number',
-               'team_name', 'technician_name', 'technician_email']
-    requests = [serialize_row(row, columns) for row in cursor.fetchall()]
-    
-    cursor.close()
-    connection.close()
+    with get_db_connection() as connection:
+        requests = repository.fetch_all(connection, query.sql, query.params, prepared=False)
+        total = None
+        if query.limit and wants_total():
+            total = repository.fetch_raw(connection, query.count_sql, query.count_params, prepared=False)[0][0]
+    
+    if query.limit:
+        return jsonify(paginated_response(requests, query.limit, ('created_at', 'id'), total))
     return jsonify(requests)
 
+def equipment_team(connection, equipment_id):
+    result = repository.fetch_raw(connection, repository.EQUIPMENT_TEAM, (equipment_id,))
+    return result[0][0] if result else None
+
 @app.route('/api/requests', methods=['POST'])
 def create_request():
     data = request.json
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({'error': 'Database connection failed'}), 500
+    with get_db_connection() as connection:
+        try:
+            # Get equipment's team_id for auto-fill
+            team_id = reference_cache.get(
+                'equipment_team', reference_key('equipment_team', data['equipment_id'], connection),
+                lambda: equipment_team(connection, data['equipment_id'])
+            )
+            if team_id is None:
+                team_id = data.get('team_id')
+            if not data.get('technician_id') and (data.get('auto_assign') or AUTO_ASSIGN_REQUESTS):
+                data = {**data, 'technician_id': technician_workload.pick(
+                    team_id, data.get('scheduled_date'), data.get('duration_hours'), connection=connection)}
+            
+            written = repository.values(
+                {**data, 'team_id': team_id}, repository.REQUEST_FIELDS, {'status': 'New'}
+            )
+            request_id = repository.execute(connection, repository.REQUEST_INSERT, written)
+            bump_versions(connection, 'maintenance_requests')
+            connection.commit()
+            fields = dict(zip(repository.REQUEST_FIELDS, written))
+            dashboard_summary.request_created(team_id, int(data['equipment_id']), fields['status'])
+            technician_workload.request_saved(request_id, fields['technician_id'], fields['status'],
+                                              fields['scheduled_date'], fields['duration_hours'])
+            change_feed.publish('created', request_id=request_id, status=fields['status'], changes=fields)
+            
+            if prefers_minimal():
+                return minimal_response({'id': request_id, **dict(zip(repository.REQUEST_FIELDS, written))}, 201)
+            new_request = repository.fetch_one(connection, repository.REQUEST_BY_ID, (request_id,))
+            return jsonify(new_request), 201
+        except Error as e:
+            connection.rollback()
+            return jsonify({'error': str(e)}), 400
+
+@app.route('/api/requests/<int:request_id>', methods=['PUT'])
+def update_request(request_id):
+    data = request.json
+    # Validation: Duration required before marking as Repaired
+    if data.get('status') == 'Repaired' and not data.get('duration_hours'):
+        return jsonify({'error': 'Duration is required before marking as Repaired'}), 400
     
-    cursor = connection.cursor()
+    with get_db_connection() as connection:
+        try:
+            previous = repository.fetch_raw(connection, repository.REQUEST_STATE, (request_id,))
+            
+            # Update request
+            written = repository.values(data, repository.REQUEST_UPDATE_FIELDS)
+            repository.execute(connection, repository.REQUEST_UPDATE, written + (request_id,))
+            
+            # If status is Scrap, mark equipment as scrapped
+            if data.get('status') == 'Scrap':
+                repository.execute(connection, repository.REQUEST_SCRAP_EQUIPMENT, (request_id,))
+                bump_versions(connection, 'maintenance_requests', 'equipment')
+            else:
+                bump_versions(connection, 'maintenance_requests')
+            
+            connection.commit()
+            technician_workload.request_saved(request_id, data.get('technician_id'), data.get('status'),
+                                              data.get('scheduled_date'), data.get('duration_hours'))
+            if previous:
+                old_status, equipment_id = previous[0]
+                dashboard_summary.request_status_changed(old_status, data.get('status'))
+                if data.get('status') == 'Scrap':
+                    dashboard_summary.equipment_scrapped(equipment_id)
+                change_feed.publish('updated', request_id=request_id, equipment_id=equipment_id,
+                                    old_status=old_status, status=data.get('status'),
+                                    changes=dict(zip(repository.REQUEST_UPDATE_FIELDS, written)))
+            
+            if prefers_minimal():
+                return minimal_response({'id': request_id, **dict(zip(repository.REQUEST_UPDATE_FIELDS, written))})
+            updated_request = repository.fetch_one(connection, repository.REQUEST_BY_ID, (request_id,))
+            return jsonify(updated_request)
+        except Error as e:
+            connection.rollback()
+            return jsonify({'error': str(e)}), 400
+
+# ============== BULK ENDPOINTS ==============
+
+def bulk_body():
     try:
-        # Get equipment's team_id for auto-fill
-        cursor.execute("SELECT maintenance_team_id FROM equipment WHERE id = %s", (data['equipment_id'],))
-        result = cursor.fetchone()
-        team_id = result[0] if result else data.get('team_id')
-        
-        cursor.execute("""
-            INSERT INTO maintenance_requests (subject, equipment_id, team_id, technician_id,
-                                              request_type, scheduled_date, duration_hours, status)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-        """, (
-            data['subject'],
-            data['equipment_id'],
-            team_id,
-            data.get('technician_id'),
-            data['request_type'],
-            data.get('scheduled_date'),
-            data.get('duration_hours'),
-            data.get('status', 'New')
-        ))
+        return bulk.bulk_items(request.get_json(silent=True))
+    except bulk.ItemError as e:
+        raise QueryArgError(str(e))
+
+def validate_items(items, validate):
+    """Per-item results (errors filled in) and the (index, value) pairs that passed"""
+    results = [{'index': index} for index in range(len(items))]
+    valid = []
+    for index, item in enumerate(items):
+        try:
+            valid.append((index, validate(item)))
+        except bulk.ItemError as e:
+            results[index]['error'] = str(e)
+    return results, valid
+
+def existing_ids(connection, sql, ids):
+    """{id: value} of the ids that exist, from sql with a {} slot for the IN list"""
+    if not ids:
+        return {}
+    ids = sorted(ids)
+    return dict(repository.fetch_raw(connection, sql.format(', '.join(['%s'] * len(ids))),
+                                     tuple(ids), prepared=False))
+
+def write_requests(connection, valid, results, notify=True):
+    """Insert validated (index, fields) requests in one transaction and return how many were created.
+
+    Teams are filled in from one lookup of all referenced equipment, and
+    the teams and technicians the items name are checked with one IN query
+    each, so a bad reference fails its own item instead of the whole
+    INSERT. The rows go in as a single multi-row INSERT. Rejected items get
+    an error in results; a database error rolls back and propagates.
+    notify=False skips the per-request change events (callers then publish
+    one 'reset').
+    """
+    equipment_teams = existing_ids(
+        connection, "SELECT id, maintenance_team_id FROM equipment WHERE id IN ({})",
+        {fields['equipment_id'] for _, fields in valid}
+    )
+    for _, fields in valid:
+        if fields['equipment_id'] in equipment_teams:
+            fields['team_id'] = equipment_teams[fields['equipment_id']] or fields['team_id']
+    teams = existing_ids(connection, "SELECT id, id FROM maintenance_teams WHERE id IN ({})",
+                         {fields['team_id'] for _, fields in valid if fields['team_id'] is not None})
+    technicians = existing_ids(connection, "SELECT id, id FROM technicians WHERE id IN ({})",
+                               {fields['technician_id'] for _, fields in valid if fields['technician_id'] is not None})
+    rows = []
+    for index, fields in valid:
+        if fields['equipment_id'] not in equipment_teams:
+            results[index]['error'] = 'Equipment not found'
+        elif fields['team_id'] is None:
+            results[index]['error'] = 'Equipment has no maintenance team; give team_id'
+        elif fields['team_id'] not in teams:
+            results[index]['error'] = 'Team not found'
+        elif fields['technician_id'] is not None and fields['technician_id'] not in technicians:
+            results[index]['error'] = 'Technician not found'
+        else:
+            rows.append((index, fields))
+    if not rows:
+        return 0
+    
+    try:
+        ids = bulk.insert_rows(
+            connection, repository.REQUEST_BULK_INSERT, repository.REQUEST_IDS_BY_BATCH,
+            [tuple(fields[field] for field in repository.REQUEST_FIELDS) for _, fields in rows]
+        )
+        bump_versions(connection, 'maintenance_requests')
         connection.commit()
-        request_id = cursor.lastrowid
-        
-        cursor.execute("""
-            SELECT mr.id, mr.subject, mr.equipment_id, mr.team_id, mr.technician_id,
-                   mr.request_type, mr.scheduled_date, mr.duration_hours, mr.status,
-                   mr.created_at, mr.updated_at,
-                   e.name as equipment_name, e.serial_number,
-                   mt.team_name,
-                   t.name as technician_name, t.email as technician_email
-            FROM maintenance_requests mr
-            LEFT JOIN equipment e ON mr.equipment_id = e.id
-            LEFT JOIN maintenance_teams mt ON mr.team_id = mt.id
-            LEFT JOIN technicians t ON mr.technician_id = t.id
-            WHERE mr.id = %s
-        """, (request_id,))
-        columns = ['id', 'subject', 'equipment_id', 'team_id', 'technician_id',
-                   'request_type', 'scheduled_date', 'duration_hours', 'status',
-                   'created_at', 'updated_at', 'equipment_name', 'serial_number',
-                   'team_name', 'technician_name', 'technician_email']
-        new_request = serialize_row(cursor.fetchone(), columns)
-        
-        return jsonify(new_request), 201
-    except Error as e:
+    except Error:
         connection.rollback()
-        return jsonify({'error': str(e)}), 400
-    finally:
-        cursor.close()
-        connection.close()
+        raise
+    for (index, fields), request_id in zip(rows, ids):
+        results[index]['id'] = request_id
+        dashboard_summary.request_created(fields['team_id'], fields['equipment_id'], fields['status'])
+        technician_workload.request_saved(request_id, fields['technician_id'], fields['status'],
+                                          fields['scheduled_date'], fields['duration_hours'])
+        if notify:
+            change_feed.publish('created', request_id=request_id, status=fields['status'],
+                                changes={field: fields[field] for field in repository.REQUEST_FIELDS})
+    return len(rows)
 
-@app.route('/api/requests/<int:request_id>', methods=['PUT'])
-def update_request(request_id):
-    data = request.json
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({'error': 'Database connection failed'}), 500
+def write_equipment(connection, valid, results):
+    """Insert validated (index, fields) equipment in one transaction and return how many were created.
+
+    Serial numbers already in use, or repeated within the batch, are
+    reported per item; the rest go in as a single multi-row INSERT.
+    """
+    serials = sorted({fields['serial_number'] for _, fields in valid})
+    taken = set()
+    if serials:
+        placeholders = ', '.join(['%s'] * len(serials))
+        taken = {row[0] for row in repository.fetch_raw(
+            connection, f"SELECT serial_number FROM equipment WHERE serial_number IN ({placeholders})",
+            tuple(serials), prepared=False
+        )}
+    rows = []
+    batch = set()
+    for index, fields in valid:
+        if fields['serial_number'] in taken:
+            results[index]['error'] = f"Serial number {fields['serial_number']} already exists"
+            continue
+        if fields['serial_number'] in batch:
+            results[index]['error'] = f"Serial number {fields['serial_number']} is repeated in this batch"
+            continue
+        batch.add(fields['serial_number'])
+        rows.append((index, fields))
+    if not rows:
+        return 0
     
-    cursor = connection.cursor()
     try:
-        # Validation: Duration required before marking as Repaired
-        if data.get('status') == 'Repaired' and not data.get('duration_hours'):
-            return jsonify({'error': 'Duration is required before marking as Repaired'}), 400
-        
-        # Update request
-        cursor.execute("""
-            UPDATE maintenance_requests 
-            SET subject = %s, technician_id = %s, scheduled_date = %s, 
-                duration_hours = %s, status = %s
-            WHERE id = %s
-        """, (
-            data.get('subject'),
-            data.get('technician_id'),
-            data.get('scheduled_date'),
-            data.get('duration_hours'),
-            data.get('status'),
-            request_id
-        ))
-        
-        # If status is Scrap, mark equipment as scrapped
-        if data.get('status') == 'Scrap':
-            cursor.execute("""
-                UPDATE equipment e
-                INNER JOIN maintenance_requests mr ON e.id = mr.equipment_id
-                SET e.is_scrapped = TRUE
-                WHERE mr.id = %s
-            """, (request_id,))
-        
+        ids = bulk.insert_rows(
+            connection, repository.EQUIPMENT_BULK_INSERT, repository.EQUIPMENT_IDS_BY_BATCH,
+            [tuple(fields[field] for field in repository.EQUIPMENT_FIELDS) for _, fields in rows]
+        )
+        bump_versions(connection, 'equipment')
         connection.commit()
-        
-        cursor.execute("""
-            SELECT mr.id, mr.subject, mr.equipment_id, mr.team_id, mr.technician_id,
-                   mr.request_type, mr.scheduled_date, mr.duration_hours, mr.status,
-                   mr.created_at, mr.updated_at,
-                   e.name as equipment_name, e.serial_number,
-                   mt.team_name,
-                   t.name as technician_name, t.email as technician_email
-            FROM maintenance_requests mr
-            LEFT JOIN equipment e ON mr.equipment_id = e.id
-            LEFT JOIN maintenance_teams mt ON mr.team_id = mt.id
-            LEFT JOIN technicians t ON mr.technician_id = t.id
-            WHERE mr.id = %s
-        """, (request_id,))
-        columns = ['id', 'subject', 'equipment_id', 'team_id', 'technician_id',
-                   'request_type', 'scheduled_date', 'duration_hours', 'status',
-                   'created_at', 'updated_at', 'equipment_name', 'serial_number',
-                   'team_name', 'technician_name', 'technician_email']
-        updated_request = serialize_row(cursor.fetchone(), columns)
-        
-        return jsonify(updated_request)
-    except Error as e:
+    except Error:
         connection.rollback()
-        return jsonify({'error': str(e)}), 400
-    finally:
-        cursor.close()
-        connection.close()
+        raise
+    reference_cache.invalidate('equipment_team')
+    for (index, fields), equipment_id in zip(rows, ids):
+        results[index]['id'] = equipment_id
+        dashboard_summary.equipment_saved(equipment_id, fields['name'], fields['is_scrapped'])
+    return len(rows)
+
+@app.route('/api/requests/bulk', methods=['POST'])
+def bulk_create_requests():
+    """Create many requests in one transaction.
+
+    Body: a JSON array of request objects (or {'items': [...]}). Returns
+    {'results': [{'index', 'id'} or {'index', 'error'}], 'created',
+    'failed'}; 201 when anything was created, 400 otherwise.
+    """
+    items = bulk_body()
+    results, valid = validate_items(items, bulk.validate_request)
+    
+    with get_db_connection() as connection:
+        try:
+            created = write_requests(connection, valid, results)
+        except Error as e:
+            return jsonify({'error': str(e)}), 400
+    
+    return jsonify({'results': results, 'created': created, 'failed': len(items) - created}), \
+        bulk.results_status(results)
+
+@app.route('/api/requests/bulk', methods=['PATCH'])
+def bulk_move_requests():
+    """Change the status of many requests in one transaction.
+
+    Body: [{'id', 'status', 'duration_hours'?}, ...]. A missing
+    duration_hours keeps the stored one; Repaired still requires a
+    duration and Scrap still scraps the equipment. Returns per-item
+    results like POST /api/requests/bulk, with 200 on success.
+    """
+    items = bulk_body()
+    results, valid = validate_items(items, bulk.validate_status_move)
+    # One move per request: a repeated id would double its deltas and events
+    seen = set()
+    for index, (request_id, _, _) in valid:
+        if request_id in seen:
+            results[index]['error'] = 'Duplicate id in this request'
+        seen.add(request_id)
+    valid = [(index, move) for index, move in valid if 'error' not in results[index]]
+    
+    with get_db_connection() as connection:
+        request_ids = sorted({request_id for _, (request_id, _, _) in valid})
+        previous = {}
+        if request_ids:
+            placeholders = ', '.join(['%s'] * len(request_ids))
+            previous = {row[0]: row[1:] for row in repository.fetch_raw(
+                connection,
+                f"SELECT id, status, equipment_id, duration_hours, technician_id, scheduled_date "
+                f"FROM maintenance_requests WHERE id IN ({placeholders})",
+                tuple(request_ids), prepared=False
+            )}
+        moves = []
+        for index, (request_id, status, duration_hours) in valid:
+            if request_id not in previous:
+                results[index]['error'] = 'Request not found'
+                continue
+            old_status, equipment_id, stored_hours, _, _ = previous[request_id]
+            if status == 'Repaired' and not (duration_hours or stored_hours):
+                results[index]['error'] = 'Duration is required before marking as Repaired'
+                continue
+            moves.append((index, request_id, status, duration_hours, old_status, equipment_id))
+        
+        if moves:
+            scrapped = sorted({move[5] for move in moves if move[2] == 'Scrap'})
+            cursor = connection.cursor()
+            try:
+                cursor.executemany(
+                    "UPDATE maintenance_requests SET status = %s, duration_hours = COALESCE(%s, duration_hours) WHERE id = %s",
+                    [(status, duration_hours, request_id) for _, request_id, status, duration_hours, _, _ in moves]
+                )
+                if scrapped:
+                    placeholders = ', '.join(['%s'] * len(scrapped))
+                    cursor.execute(f"UPDATE equipment SET is_scrapped = TRUE WHERE id IN ({placeholders})",
+                                   tuple(scrapped))
+                    bump_versions(connection, 'maintenance_requests', 'equipment')
+                else:
+                    bump_versions(connection, 'maintenance_requests')
+                connection.commit()
+            except Error as e:
+                connection.rollback()
+                return jsonify({'error': str(e)}), 400
+            finally:
+                cursor.close()
+            
+            for index, request_id, status, duration_hours, old_status, equipment_id in moves:
+                results[index]['id'] = request_id
+                dashboard_summary.request_status_changed(old_status, status)
+                # Saved rather than status-changed, so reopening a closed request re-adds its load
+                _, _, stored_hours, technician_id, scheduled_date = previous[request_id]
+                technician_workload.request_saved(request_id, technician_id, status, scheduled_date,
+                                                  stored_hours if duration_hours is None else duration_hours)
+                changes = {'status': status}
+                if duration_hours is not None:
+                    changes['duration_hours'] = duration_hours
+                change_feed.publish('updated', request_id=request_id, equipment_id=equipment_id,
+                                    old_status=old_status, status=status, changes=changes)
+            for equipment_id in scrapped:
+                dashboard_summary.equipment_scrapped(equipment_id)
+    
+    updated = len(moves)
+    return jsonify({'results': results, 'updated': updated, 'failed': len(items) - updated}), \
+        bulk.results_status(results, 200)
+
+@app.route('/api/equipment/bulk', methods=['POST'])
+def bulk_create_equipment():
+    """Create many equipment records in one transaction.
+
+    Body: a JSON array of equipment objects (or {'items': [...]}). Returns
+    per-item results like POST /api/requests/bulk.
+    """
+    items = bulk_body()
+    results, valid = validate_items(items, bulk.validate_equipment)
+    
+    with get_db_connection() as connection:
+        try:
+            created = write_equipment(connection, valid, results)
+        except Error as e:
+            return jsonify({'error': str(e)}), 400
+    
+    return jsonify({'results': results, 'created': created, 'failed': len(items) - created}), \
+        bulk.results_status(results)
+
+# ============== EXPORT / IMPORT ENDPOINTS ==============
+
+# Rows validated and inserted per transaction while importing
+IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', 500))
+# Row errors listed in an import report (the failed count covers all of them)
+IMPORT_MAX_ERRORS = 100
+
+EXPORT_KINDS = ('equipment', 'requests')
+
+@app.route('/api/export/<kind>', methods=['GET'])
+def export_rows(kind):
+    """Download every equipment record or request as CSV or NDJSON.
+
+    Accepts the list filters of /api/equipment or /api/requests plus
+    ?format=csv (default) or ndjson. Rows come off an unbuffered cursor in
+    id order, so memory use does not grow with the table.
+    """
+    if kind not in EXPORT_KINDS:
+        return jsonify({'error': f"Unknown export '{kind}'"}), 404
+    export_format = parse_export_format(request.args)
+    sql, params = export_query(kind, request.args)
+    booleans = repository.EQUIPMENT_BOOLEANS if kind == 'equipment' else ()
+    return stream_rows(sql, params, export_format, filename=f"{kind}.{export_format}", booleans=booleans)
+
+def import_stream():
+    """Text stream over the uploaded CSV: a multipart 'file' field or the raw body"""
+    upload = request.files.get('file')
+    raw = upload.stream if upload else request.stream
+    return io.TextIOWrapper(raw, encoding='utf-8-sig', newline='')
+
+@app.route('/api/import/<kind>', methods=['POST'])
+def import_rows(kind):
+    """Load equipment or requests from CSV with the same columns as the export.
+
+    The upload is parsed as it is read, IMPORT_BATCH_SIZE rows at a time;
+    each batch is validated like a bulk call and committed with one
+    multi-row INSERT, so an import is never held in memory. Unknown
+    columns (id, team_name, ...) are ignored. Returns {'imported',
+    'failed', 'errors': [{'row', 'error'}], 'seconds', 'rows_per_second'}.
+    """
+    if kind == 'equipment':
+        validate, write = bulk.validate_equipment, write_equipment
+    elif kind == 'requests':
+        validate, write = bulk.validate_request, functools.partial(write_requests, notify=False)
+    else:
+        return jsonify({'error': f"Unknown import '{kind}'"}), 404
+    
+    reader = csv.DictReader(import_stream())
+    imported = failed = 0
+    errors = []
+    started = time.perf_counter()
+    
+    def report(status, **extra):
+        seconds = time.perf_counter() - started
+        return jsonify({
+            'imported': imported,
+            'failed': failed,
+            'errors': errors,
+            'seconds': round(seconds, 3),
+            'rows_per_second': round((imported + failed) / seconds) if seconds else None,
+            **extra
+        }), status
+    
+    with get_db_connection() as connection:
+        offset = 0
+        try:
+            while True:
+                chunk = list(itertools.islice(reader, IMPORT_BATCH_SIZE))
+                if not chunk:
+                    break
+                results, valid = validate_items(chunk, validate)
+                try:
+                    created = write(connection, valid, results)
+                except Error as e:
+                    created = 0
+                    for result in results:
+                        result.setdefault('error', str(e))
+                imported += created
+                failed += len(chunk) - created
+                for result in results:
+                    if 'error' in result and len(errors) < IMPORT_MAX_ERRORS:
+                        errors.append({'row': offset + result['index'] + 1, 'error': result['error']})
+                offset += len(chunk)
+        except (csv.Error, UnicodeDecodeError) as e:
+            # Batches before the malformed row are already committed
+            return report(400, error=f"Invalid CSV after row {offset}: {e}")
+        finally:
+            if imported and kind == 'requests':
+                change_feed.publish('reset')
+    
+    if reader.fieldnames is None:
+        return jsonify({'error': 'CSV upload is empty'}), 400
+    return report(201 if imported else 400)
 
 @app.route('/api/requests/kanban', methods=['GET'])
+@conditional(*VERSIONED_TABLES)
+@single_flight
 def get_kanban_requests():
-    """Get requests grouped by status for Kanban board"""
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({'error': 'Database connection failed'}), 500
+    """Get requests grouped by status for Kanban board.
+
+    Returns the newest `limit` cards (default KANBAN_PAGE_SIZE) of every
+    column as {status: [cards]}. With meta=1 the response also carries
+    'counts' (cards per column) and 'next_cursors' (per column, null when
+    exhausted). status=<column>&cursor=<token> returns the next page of a
+    single column as {'items', 'next_cursor'}.
+    """
+    limit = kanban_limit(request.args)
+    status = kanban_column_status(request.args)
+    if status is not None:
+        sql, params = kanban_column_query(status, limit, decode_cursor(request.args.get('cursor')))
+        with get_db_connection() as connection:
+            cards = repository.fetch_all(connection, sql, tuple(params))
+        return jsonify(paginated_response(cards, limit, ('created_at', 'id')))
     
-    cursor = connection.cursor()
-    cursor.execute("""
-        SELECT mr.id, mr.subject, mr.equipment_id, mr.team_id, mr.technician_id,
-               mr.request_type, mr.scheduled_date, mr.duration_hours, mr.status,
-               mr.created_at, mr.updated_at,
-               e.name as equipment_name, e.serial_number,
-               mt.team_name,
-               t.name as technician_name, t.email as technician_email
-        FROM maintenance_requests mr
-        LEFT JOIN equipment e ON mr.equipment_id = e.id
-        LEFT JOIN maintenance_teams mt ON mr.team_id = mt.id
-        LEFT JOIN technicians t ON mr.technician_id = t.id
-        ORDER BY mr.created_at DESC
-    """)
-    columns = ['id', 'subject', 'equipment_id', 'team_id', 'technician_id',
-               'request_type', 'scheduled_date', 'duration_hours', 'status',
-               'created_at', 'updated_at', 'equipment_name', 'serial_number',
-               'team_name', 'technician_name', 'technician_email']
-    all_requests = [serialize_row(row, columns) for row in cursor.fetchall()]
-    
-    # Group by status
-    kanban_data = {
-        'New': [],
-        'In Progress': [],
-        'Repaired': [],
-        'Scrap': []
-    }
-    
-    for req in all_requests:
-        status = req['status']
-        if status in kanban_data:
-            kanban_data[status].append(req)
-    
-    cursor.close()
-    connection.close()
-    return jsonify(kanban_data)
+    sql, params = kanban_board_query(limit)
+    with get_db_connection() as connection:
+        rows = repository.fetch_all(connection, sql, params)
+        status_counts = None
+        if parse_flag_arg(request.args, 'meta'):
+            status_counts = repository.fetch_raw(connection, repository.REQUEST_STATUS_COUNTS)
+    return jsonify(kanban_board(rows, limit, status_counts))
 
 @app.route('/api/requests/calendar', methods=['GET'])
+@conditional('maintenance_requests', 'equipment', 'technicians')
+@single_flight
 def get_calendar_requests():
-    """Get preventive maintenance requests for calendar view"""
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({'error': 'Database connection failed'}), 500
+    """Get preventive maintenance requests for calendar view.
+
+    start/end (YYYY-MM-DD) restrict the result to scheduled dates in
+    [start, end), which is a range scan on idx_requests_type_scheduled.
+    """
+    sql, params = calendar_query(request.args)
+    mode = parse_stream_arg()
+    if mode:
+        return stream_rows(sql, params, mode)
     
-    cursor = connection.cursor()
-    cursor.execute("""
-        SELECT mr.id, mr.subject, mr.equipment_id, mr.team_id, mr.technician_id,
-               mr.request_type, mr.scheduled_date, mr.duration_hours, mr.status,
-               mr.created_at,
-               e.name as equipment_name,
-               t.name as technician_name
-        FROM maintenance_requests mr
-        LEFT JOIN equipment e ON mr.equipment_id = e.id
-        LEFT JOIN technicians t ON mr.technician_id = t.id
-        WHERE mr.request_type = 'Preventive' AND mr.scheduled_date IS NOT NULL
-        ORDER BY mr.scheduled_date
-    """)
-    columns = ['id', 'subject', 'equipment_id', 'team_id', 'technician_id',
-               'request_type', 'scheduled_date', 'duration_hours', 'status',
-               'created_at', 'equipment_name', 'technician_name']
-    requests = [serialize_row(row, columns) for row in cursor.fetchall()]
-    
-    cursor.close()
-    connection.close()
+    # At most three shapes (with/without start and end), so prepare it
+    with get_db_connection() as connection:
+        requests = repository.fetch_all(connection, sql, params)
     return jsonify(requests)
 
+# ============== SEARCH ENDPOINT ==============
+
+@app.route('/api/search', methods=['GET'])
+@conditional('equipment', 'maintenance_requests')
+def search():
+    """Ranked type-ahead over equipment and request subjects.
+
+    ?q= (required), ?types=equipment,requests (default both), ?limit=
+    (per type, default 10, max 50). Equipment matches name, serial number,
+    location, department and assigned employee; see search_queries for
+    how short queries are handled. Returns {'query', 'equipment', 'requests'}
+    with a 'score' on every row.
+    """
+    q, types, limit = parse_search_args(request.args)
+    body = {'query': q}
+    with get_db_connection() as connection:
+        for name, query in search_queries(q, types, limit).items():
+            body[name] = repository.fetch_all(connection, *query, prepared=False,
+                                              booleans=repository.EQUIPMENT_BOOLEANS) if query else []
+    return jsonify(body)
+
+# ============== BOOTSTRAP ENDPOINTS ==============
+
+@app.route('/api/bootstrap/kanban', methods=['GET'])
+@conditional(*VERSIONED_TABLES)
+@single_flight
+def get_kanban_bootstrap():
+    """Everything the Kanban page loads, in one response and on one connection.
+
+    Returns {'board': <GET /api/requests/kanban?meta=1>, 'equipment',
+    'teams', 'technicians'}, where the lookup lists carry only the columns
+    the page uses. ?fields=equipment.location,teams.description,... picks
+    other columns per list (id is always included). Teams and technicians
+    come from the reference cache.
+    """
+    limit = kanban_limit(request.args)
+    fields = parse_fields_arg(request.args)
+    sql, params = kanban_board_query(limit)
+    with get_db_connection() as connection:
+        rows = repository.fetch_all(connection, sql, params)
+        status_counts = repository.fetch_raw(connection, repository.REQUEST_STATUS_COUNTS)
+        body = {'board': kanban_board(rows, limit, status_counts)}
+        for name, columns in fields.items():
+            # The default projection is fixed, so it is worth preparing
+            load = functools.partial(
+                repository.fetch_all, connection, bootstrap_lookup_query(name, columns),
+                prepared=columns == BOOTSTRAP_LISTS[name]['default'],
+                booleans=repository.EQUIPMENT_BOOLEANS if name == 'equipment' else ()
+            )
+            if name == 'equipment':
+                body[name] = load()
+            else:
+                key = reference_key(name, 'bootstrap:' + ','.join(columns), connection)
+                body[name] = reference_cache.get(name, key, load)
+    return jsonify(body)
+
+# ============== MAINTENANCE PLANS ==============
+
+# How far ahead plan occurrences are generated, and how often (seconds, 0 = off)
+PLAN_HORIZON_DAYS = int(os.environ.get('PLAN_HORIZON_DAYS', 90))
+PLAN_SCHEDULER_INTERVAL = float(os.environ.get('PLAN_SCHEDULER_INTERVAL', 3600))
+# How long a plan write waits for a running expansion before answering locked
+PLAN_LOCK_WAIT_SECONDS = 5
+
+def run_plan_expansion(horizon_days=None, plan_id=None, lock_timeout=0):
+    """Expand due plans into requests (see maintenance_plans.py) and return the stats"""
+    if horizon_days is None:
+        horizon_days = PLAN_HORIZON_DAYS
+    with get_db_connection() as connection:
+        stats = maintenance_plans.expand_plans(connection, horizon_days, plan_id=plan_id,
+                                               lock_timeout=lock_timeout)
+    if stats['created']:
+        # A batch of new requests: recount the dashboard and have boards refetch
+        dashboard_summary.invalidate()
+        # Reloaded here (the scheduler thread, or an admin call) rather than
+        # on the next request that wants an assignee
+        technician_workload.reload()
+        change_feed.publish('reset')
+    return stats
+
+def start_plan_scheduler(interval=None):
+    """Run plan expansion every interval seconds in a daemon thread; started per worker"""
+    if interval is None:
+        interval = PLAN_SCHEDULER_INTERVAL
+    if interval <= 0:
+        return None
+    
+    def loop():
+        while True:
+            try:
+                stats = run_plan_expansion()
+                if stats['created']:
+                    print(f"Generated {stats['created']} preventive requests from {stats['plans']} plans")
+            except (Error, PoolError) as e:
+                print(f"Error expanding maintenance plans: {e}")
+            time.sleep(interval)
+    
+    thread = threading.Thread(target=loop, name='plan-scheduler', daemon=True)
+    thread.start()
+    return thread
+
+@app.cli.command('expand-plans')
+@click.option('--horizon-days', type=int, default=None, help='Generate occurrences this many days ahead')
+def expand_plans_command(horizon_days):
+    """Generate the missing requests of due maintenance plans"""
+    stats = run_plan_expansion(horizon_days)
+    print(f"{stats['created']} requests from {stats['plans']} plans up to {stats['horizon_end']}"
+          + (' (another expansion is running)' if stats['locked'] else ''))
+
+def plan_body(existing=None):
+    """Validated plan fields from the JSON body, merged over existing for updates"""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        raise QueryArgError('Body must be a JSON object')
+    try:
+        return maintenance_plans.validate_plan({**(existing or {}), **data})
+    except bulk.ItemError as e:
+        raise QueryArgError(str(e))
+
+@app.route('/api/plans', methods=['GET'])
+@conditional('maintenance_plans', 'equipment', 'maintenance_teams', 'technicians')
+def get_plans():
+    """Maintenance plans ordered by next due date; filters: equipment_id, active"""
+    sql, params = plan_list_query(request.args)
+    with get_db_connection() as connection:
+        plans = repository.fetch_all(connection, sql, params, prepared=False,
+                                     booleans=repository.PLAN_BOOLEANS)
+    return jsonify(plans)
+
+@app.route('/api/plans/<int:plan_id>', methods=['GET'])
+@conditional('maintenance_plans', 'equipment', 'maintenance_teams', 'technicians')
+def get_plan(plan_id):
+    with get_db_connection() as connection:
+        plan = repository.fetch_one(connection, repository.PLAN_BY_ID, (plan_id,),
+                                    booleans=repository.PLAN_BOOLEANS)
+    
+    if plan:
+        return jsonify(plan)
+    return jsonify({'error': 'Plan not found'}), 404
+
+@app.route('/api/plans', methods=['POST'])
+def create_plan():
+    """Create a plan and generate its occurrences within the horizon right away.
+
+    Body: equipment_id, subject, interval_days or interval_hours (with
+    run_hours_per_day, default 8), optional team_id (defaults to the
+    equipment's team), technician_id, duration_hours, next_due (first
+    occurrence, default today) and active. 'generated' counts the requests
+    created; 'locked' is true when another expansion kept the lock past
+    PLAN_LOCK_WAIT_SECONDS, and the occurrences then come with the next
+    scheduled run.
+    """
+    fields = plan_body()
+    with get_db_connection() as connection:
+        try:
+            plan_id = repository.execute(
+                connection, repository.PLAN_INSERT, tuple(fields[field] for field in repository.PLAN_FIELDS)
+            )
+            bump_versions(connection, 'maintenance_plans')
+            connection.commit()
+        except Error as e:
+            connection.rollback()
+            return jsonify({'error': str(e)}), 400
+    
+    stats = run_plan_expansion(plan_id=plan_id, lock_timeout=PLAN_LOCK_WAIT_SECONDS)
+    with get_db_connection() as connection:
+        plan = repository.fetch_one(connection, repository.PLAN_BY_ID, (plan_id,),
+                                    booleans=repository.PLAN_BOOLEANS)
+    return jsonify({**plan, 'generated': stats['created'], 'locked': stats['locked']}), 201
+
+@app.route('/api/plans/<int:plan_id>', methods=['PUT'])
+def update_plan(plan_id):
+    """Update a plan; omitted fields keep their values.
+
+    Requests already generated are left alone; the new settings apply from
+    next_due on. Set active=false to pause a plan; to switch between
+    interval_days and interval_hours, send the other one as null.
+    'generated' and 'locked' are as for POST /api/plans.
+    """
+    with get_db_connection() as connection:
+        existing = repository.fetch_one(connection, repository.PLAN_BY_ID, (plan_id,),
+                                        booleans=repository.PLAN_BOOLEANS)
+        if not existing:
+            return jsonify({'error': 'Plan not found'}), 404
+        fields = plan_body({field: existing[field] for field in repository.PLAN_FIELDS})
+        try:
+            repository.execute(
+                connection, repository.PLAN_UPDATE,
+                tuple(fields[field] for field in repository.PLAN_FIELDS) + (plan_id,)
+            )
+            bump_versions(connection, 'maintenance_plans')
+            connection.commit()
+        except Error as e:
+            connection.rollback()
+            return jsonify({'error': str(e)}), 400
+    
+    stats = run_plan_expansion(plan_id=plan_id, lock_timeout=PLAN_LOCK_WAIT_SECONDS)
+    with get_db_connection() as connection:
+        plan = repository.fetch_one(connection, repository.PLAN_BY_ID, (plan_id,),
+                                    booleans=repository.PLAN_BOOLEANS)
+    return jsonify({**plan, 'generated': stats['created'], 'locked': stats['locked']})
+
+@app.route('/api/plans/expand', methods=['POST'])
+def expand_plans():
+    """Run the plan expansion now (?horizon_days=N, default PLAN_HORIZON_DAYS)"""
+    horizon_days = parse_int_arg(request.args, 'horizon_days')
+    if horizon_days is not None and not 0 <= horizon_days <= 3660:
+        raise QueryArgError('horizon_days must be between 0 and 3660')
+    stats = run_plan_expansion(horizon_days)
+    return jsonify(stats), 409 if stats['locked'] else 200
+
+# ============== CHANGE FEED (SERVER-SENT EVENTS) ==============
+
+# create_request / update_request publish deltas here after they commit
+change_feed = feed_from_env()
+
+# Comment line sent on idle connections so proxies do not time them out
+SSE_HEARTBEAT_SECONDS = float(os.environ.get('SSE_HEARTBEAT_SECONDS', 15))
+# Retry-After of a stream refused because the worker is at its stream limit
+SSE_RETRY_AFTER_SECONDS = 30
+
+def sse_message(event):
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {app.json.dumps(event)}\n\n"
+
+@app.route('/api/requests/stream', methods=['GET'])
+def stream_request_changes():
+    """Server-Sent Events feed of request changes.
+
+    Events: 'created' (request_id, status, changes), 'updated' (request_id,
+    equipment_id, old_status, status, changes) and 'reset' (the client
+    missed events and should refetch). Reconnects resume from the
+    Last-Event-ID header. Each open stream holds a worker thread, so a
+    worker serves at most change_feed.stream_limit() of them and answers
+    503 with Retry-After beyond that (clients fall back to polling meanwhile).
+    """
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        raise QueryArgError('Last-Event-ID must be an integer')
+    try:
+        subscription = change_feed.subscribe(last_event_id)
+    except FeedFull as e:
+        response = jsonify({'error': str(e)})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(SSE_RETRY_AFTER_SECONDS)
+        return response
+    
+    def generate():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                event = subscription.get(SSE_HEARTBEAT_SECONDS)
+                if subscription.overflowed:
+                    yield "event: reset\ndata: {}\n\n"
+                    return
+                if event is None:
+                    yield ": keep-alive\n\n"
+                elif event['type'] == 'reset':
+                    yield "event: reset\ndata: {}\n\n"
+                else:
+                    yield sse_message(event)
+        finally:
+            subscription.close()
+    
+    response = Response(generate(), mimetype='text/event-stream')
+    response.call_on_close(subscription.close)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 # ============== DASHBOARD / STATS ENDPOINTS ==============
 
+def load_dashboard_snapshot():
+    with get_db_connection() as connection:
+        cursor = connection.cursor()
+        try:
+            return load_snapshot(cursor)
+        finally:
+            cursor.close()
+
+# Dashboard counters live in memory; writes apply deltas, a background
+# reload every DASHBOARD_RECONCILE_SECONDS repairs any drift.
+dashboard_summary = DashboardSummary(
+    load_dashboard_snapshot,
+    reconcile_interval=float(os.environ.get('DASHBOARD_RECONCILE_SECONDS', 60))
+)
+
 @app.route('/api/stats/dashboard', methods=['GET'])
 def get_dashboard_stats():
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({'error': 'Database connection failed'}), 500
-    
-    cursor = connection.cursor()
-    
-    # Total equipment
-    cursor.execute("SELECT COUNT(*) FROM equipment WHERE is_scrapped = FALSE")
-    total_equipment = cursor.fetchone()[0]
-    
-    # Total teams
-    cursor.execute("SELECT COUNT(*) FROM maintenance_teams")
-    total_teams = cursor.fetchone()[0]
-    
-    # Open requests
-    cursor.execute("SELECT COUNT(*) FROM maintenance_requests WHERE status IN ('New', 'In Progress')")
-    open_requests = cursor.fetchone()[0]
-    
-    # Completed requests
-    cursor.execute("SELECT COUNT(*) FROM maintenance_requests WHERE status = 'Repaired'")
-    completed_requests = cursor.fetchone()[0]
-    
-    # Requests by team
-    cursor.execute("""
-        SELECT mt.team_name, COUNT(mr.id) as request_count
-        FROM maintenance_teams mt
-        LEFT JOIN maintenance_requests mr ON mt.id = mr.team_id
-        GROUP BY mt.id, mt.team_name
-        ORDER BY request_count DESC
-    """)
-    requests_by_team = [{'team': row[0], 'count': row[1]} for row in cursor.fetchall()]
-    
-    # Requests by equipment
-    cursor.execute("""
-        SELECT e.name, COUNT(mr.id) as request_count
-        FROM equipment e
-        LEFT JOIN maintenance_requests mr ON e.id = mr.equipment_id
-        GROUP BY e.id, e.name
-        ORDER BY request_count DESC
-        LIMIT 5
-    """)
-    requests_by_equipment = [{'equipment': row[0], 'count': row[1]} for row in cursor.fetchall()]
-    
-    stats = {
-        'total_equipment': total_equipment,
-        'total_teams': total_teams,
-        'open_requests': open_requests,
-        'completed_requests': completed_requests,
-        'requests_by_team': requests_by_team,
-        'requests_by_equipment': requests_by_equipment
-    }
-    
-    cursor.close()
-    connection.close()
-    return jsonify(stats)
+    """Dashboard counters from the in-memory summary; ?fresh=1 recomputes from MySQL.
+
+    Not coalesced: the summary read is already cheap, and ?fresh=1 must
+    never be answered from another request's result.
+    """
+    fresh = parse_flag_arg(request.args, 'fresh')
+    return jsonify(dashboard_summary.get(fresh=fresh))
+
+@app.route('/api/stats/pool', methods=['GET'])
+def get_pool_stats():
+    """Connection pool usage: open/in-use/idle connections, waiters and checkout latency"""
+    return jsonify(db_pool.stats())
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Per-route request, DB and serialization metrics plus pool series, in Prometheus text format"""
+    pool = db_pool.stats()
+    extra = [
+        ('pool_open_connections', 'gauge', 'Connections currently open.', pool['open']),
+        ('pool_in_use_connections', 'gauge', 'Connections checked out.', pool['in_use']),
+        ('pool_waiters', 'gauge', 'Requests waiting for a connection.', pool['waiters']),
+        ('pool_timeouts_total', 'counter', 'Checkouts that timed out since start.', pool['timeouts']),
+    ]
+    return Response(metrics.render(extra), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/stats/slow-queries', methods=['GET'])
+def get_slow_queries():
+    """Most recent statements slower than SLOW_QUERY_MS, newest first"""
+    return jsonify({'threshold_ms': metrics.slow_query_seconds * 1000, 'queries': metrics.slow_queries()})
+
+@app.route('/api/stats/cache', methods=['GET'])
+def get_cache_stats():
+    """Reference data cache hits, misses, invalidations and size"""
+    return jsonify(reference_cache.stats())
+
+@app.route('/api/stats/feed', methods=['GET'])
+def get_feed_stats():
+    """Change feed subscribers and published event count"""
+    return jsonify(change_feed.stats())
+
+@app.route('/api/stats/coalescing', methods=['GET'])
+def get_coalescing_stats():
+    """Runs of the coalesced handlers vs requests answered from a shared result"""
+    return jsonify(single_flight.stats())
 
 @app.route('/api/', methods=['GET'])
 def health_check():
     return jsonify({'message': 'GearGuard API is running', 'status': 'healthy'})
 
 if __name__ == '__main__':
+    # Development server; production runs gunicorn with gunicorn.conf.py
+    init_database()
+    start_plan_scheduler()
     app.run(host='0.0.0.0', port=8001, debug=True)
\ No newline at end of file
@@ -0,0 +1,581 @@
+"""Async (ASGI) variant of the GearGuard API on an aiomysql pool.
+
+Serves the same /api endpoints as flask_server.py from a FastAPI router, so
+concurrent requests (the Kanban page fires four GETs at once) overlap their
+database round trips inside one worker instead of queueing behind each
+other. SQL shapes come from repository.py and query-string handling from
+query_args.py, so the endpoints served here return the same payloads as
+their Flask counterparts, and writes apply the same deltas to the dashboard
+summary, technician workload and reference cache. Bulk writes, import and
+export, plan writes, workload and rebalance, the change stream and
+``Prefer: return=minimal`` are Flask-only.
+
+Mount it with ``register(app)``; server.py does this for the FastAPI app.
+"""
+import asyncio
+import os
+
+import aiomysql
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional, falls back to the stdlib encoder
+    orjson = None
+
+import repository
+from change_feed import feed_from_env
+from dashboard_stats import DashboardSummary, load_snapshot
+from query_args import (
+    QueryArgError, bootstrap_lookup_query, calendar_query, decode_cursor, equipment_list_query,
+    kanban_board, kanban_board_query, kanban_column_query, kanban_column_status, kanban_limit,
+    open_request_counts_query, paginated_response, parse_fields_arg, parse_flag_arg, parse_id_list,
+    parse_search_args, plan_list_query, request_list_query, search_queries
+)
+from reference_cache import cache_from_env, versioned_key
+from serializers import row_serializer
+from workload import TechnicianWorkload, load_workload
+
+# Same database as flask_server.DB_CONFIG
+DB_CONFIG = {
+    'host': 'localhost',
+    'user': 'gearguard_user',
+    'password': 'gearguard_pass',
+    'database': 'gearguard'
+}
+
+# Upper bound on ids accepted by the batch count endpoint
+MAX_BATCH_IDS = 1000
+
+# Rows are already JSON-ready (see serializers), so skip jsonable_encoder
+APIResponse = ORJSONResponse if orjson is not None else JSONResponse
+
+router = APIRouter(prefix="/api")
+
+_pool = None
+# Event loop the pool lives on, for the blocking loaders below
+_loop = None
+
+
+async def open_pool():
+    """Create the aiomysql pool (sized from the same DB_POOL_* variables as the Flask pool)"""
+    global _pool, _loop
+    if _pool is None:
+        _loop = asyncio.get_running_loop()
+        _pool = await aiomysql.create_pool(
+            host=DB_CONFIG['host'],
+            user=DB_CONFIG['user'],
+            password=DB_CONFIG['password'],
+            db=DB_CONFIG['database'],
+            minsize=int(os.environ.get('DB_POOL_MIN_SIZE', 1)),
+            maxsize=int(os.environ.get('DB_POOL_SIZE', 10)) + int(os.environ.get('DB_POOL_MAX_OVERFLOW', 10)),
+            pool_recycle=int(float(os.environ.get('DB_POOL_RECYCLE', 3600))),
+            # Reads must not pin a snapshot; writes open their own transaction
+            autocommit=True
+        )
+    return _pool
+
+
+async def close_pool():
+    global _pool
+    pool, _pool = _pool, None
+    if pool is not None:
+        pool.close()
+        await pool.wait_closed()
+
+
+def register(app):
+    """Mount the GearGuard router on app, with its pool lifecycle and error handlers"""
+    app.include_router(router)
+    app.add_event_handler('startup', open_pool)
+    app.add_event_handler('shutdown', close_pool)
+    app.add_exception_handler(QueryArgError, handle_query_arg_error)
+    app.add_exception_handler(aiomysql.OperationalError, handle_connection_error)
+
+
+async def handle_query_arg_error(request, e):
+    return JSONResponse({'error': str(e)}, status_code=400)
+
+
+async def handle_connection_error(request, e):
+    print(f"Error connecting to MySQL: {e}")
+    return JSONResponse({'error': 'Database connection failed'}, status_code=500)
+
+
+# ============== QUERY HELPERS ==============
+
+async def fetch_all(connection, sql, params=(), booleans=()):
+    """Run a SELECT and return its rows as dicts; booleans: its TINYINT(1) columns"""
+    async with connection.cursor() as cursor:
+        await cursor.execute(sql, params)
+        rows = await cursor.fetchall()
+        serialize = row_serializer(cursor, booleans)
+        return [serialize(row) for row in rows]
+
+
+async def fetch_one(connection, sql, params=(), booleans=()):
+    """Run a SELECT and return its first row as a dict, or None"""
+    rows = await fetch_all(connection, sql, params, booleans)
+    return rows[0] if rows else None
+
+
+async def fetch_raw(connection, sql, params=()):
+    """Run a SELECT and return its rows as tuples"""
+    async with connection.cursor() as cursor:
+        await cursor.execute(sql, params)
+        return await cursor.fetchall()
+
+
+async def execute(connection, sql, params=()):
+    """Run a write statement and return the new row id (if any)"""
+    async with connection.cursor() as cursor:
+        await cursor.execute(sql, params)
+        return cursor.lastrowid
+
+
+async def bump_versions(connection, *tables):
+    """Advance the table_versions counters behind the Flask API's ETags"""
+    for table in tables:
+        await execute(connection, repository.TABLE_VERSION_BUMP, (table,))
+
+
+# Writes here invalidate the reference data namespaces the Flask workers
+# cache, which keeps them coherent when both share REF_CACHE_URL.
+reference_cache = cache_from_env()
+
+
+async def reference_key(connection, namespace, key):
+    """key qualified with the versions of the namespace's tables, as in flask_server.
+
+    The worker-wide copy is used while it is younger than REF_CACHE_VERSION_TTL.
+    """
+    versions = reference_cache.table_versions()
+    if versions is None:
+        versions = reference_cache.remember_versions(
+            dict(await fetch_raw(connection, repository.TABLE_VERSIONS))
+        )
+    return versioned_key(namespace, key, versions)
+
+
+async def cached_rows(namespace, key, sql, params=()):
+    """Rows of a fixed-shape query, read through reference_cache under flask_server's keys"""
+    async with _pool.acquire() as connection:
+        return await reference_cache.get_async(
+            namespace, await reference_key(connection, namespace, key),
+            lambda: fetch_all(connection, sql, params)
+        )
+
+
+# Request changes reach the Flask SSE clients when both share CHANGE_FEED_URL
+change_feed = feed_from_env()
+
+
+# ============== IN-MEMORY SUMMARIES ==============
+
+def _run(func, *args):
+    """Result of await func(*args), run on the pool's event loop from a worker thread"""
+    if _loop is None:
+        raise RuntimeError('The aiomysql pool is not open')
+    try:
+        on_loop = asyncio.get_running_loop() is _loop
+    except RuntimeError:
+        on_loop = False
+    if on_loop:
+        raise RuntimeError('Blocking loaders must not run on the event loop; use asyncio.to_thread')
+
+    async def wait():
+        return await func(*args)
+    return asyncio.run_coroutine_threadsafe(wait(), _loop).result()
+
+
+class _BlockingCursor:
+    """Synchronous face of an aiomysql cursor, for the load_snapshot / load_workload loaders"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, sql, params=()):
+        _run(self._cursor.execute, sql, params)
+
+    def fetchone(self):
+        return _run(self._cursor.fetchone)
+
+    def fetchall(self):
+        return _run(self._cursor.fetchall)
+
+    def close(self):
+        _run(self._cursor.close)
+
+
+def blocking_loader(load):
+    """loader(connection=None) running load(cursor) on the aiomysql pool.
+
+    DashboardSummary and TechnicianWorkload load synchronously (from
+    asyncio.to_thread or their reconcile threads), so each query is handed
+    to the event loop and waited for. A handler that holds a connection
+    passes it along instead of checking out a second one.
+    """
+    def loader(connection=None):
+        if connection is None:
+            connection = _run(_pool.acquire)
+            try:
+                return loader(connection)
+            finally:
+                _loop.call_soon_threadsafe(_pool.release, connection)
+        cursor = _BlockingCursor(_run(connection.cursor))
+        try:
+            return load(cursor)
+        finally:
+            cursor.close()
+    return loader
+
+
+dashboard_summary = DashboardSummary(
+    blocking_loader(load_snapshot),
+    reconcile_interval=float(os.environ.get('DASHBOARD_RECONCILE_SECONDS', 60))
+)
+
+# Same index and settings as flask_server.technician_workload
+technician_workload = TechnicianWorkload(
+    blocking_loader(load_workload),
+    reconcile_interval=float(os.environ.get('WORKLOAD_RECONCILE_SECONDS', 60)),
+    daily_hours=float(os.environ.get('TECHNICIAN_DAILY_HOURS', 8))
+)
+AUTO_ASSIGN_REQUESTS = os.environ.get('AUTO_ASSIGN_REQUESTS', '0') in ('1', 'true')
+
+
+# ============== MAINTENANCE TEAMS ==============
+
+@router.get("/teams")
+async def get_teams():
+    return APIResponse(await cached_rows('teams', 'all', repository.TEAM_LIST))
+
+
+@router.post("/teams")
+async def create_team(request: Request):
+    data = await request.json()
+    async with _pool.acquire() as connection:
+        await connection.begin()
+        try:
+            team_id = await execute(
+                connection, repository.TEAM_INSERT,
+                (data['team_name'], data.get('description', ''))
+            )
+            await bump_versions(connection, 'maintenance_teams')
+            await connection.commit()
+        except aiomysql.MySQLError as e:
+            await connection.rollback()
+            return JSONResponse({'error': str(e)}, status_code=400)
+        reference_cache.invalidate('teams', 'technicians')
+        dashboard_summary.team_created(team_id, data['team_name'])
+        team = await fetch_one(connection, repository.TEAM_BY_ID, (team_id,))
+    return APIResponse(team, status_code=201)
+
+
+@router.get("/teams/{team_id:int}/technicians")
+async def get_team_technicians(team_id: int):
+    return APIResponse(await cached_rows('team_technicians', team_id, repository.TEAM_TECHNICIANS, (team_id,)))
+
+
+# ============== TECHNICIANS ==============
+
+@router.get("/technicians")
+async def get_technicians():
+    return APIResponse(await cached_rows('technicians', 'all', repository.TECHNICIAN_LIST))
+
+
+@router.post("/technicians")
+async def create_technician(request: Request):
+    data = await request.json()
+    async with _pool.acquire() as connection:
+        await connection.begin()
+        try:
+            tech_id = await execute(
+                connection, repository.TECHNICIAN_INSERT,
+                (data['name'], data['email'], data['team_id'])
+            )
+            await bump_versions(connection, 'technicians')
+            await connection.commit()
+        except aiomysql.MySQLError as e:
+            await connection.rollback()
+            return JSONResponse({'error': str(e)}, status_code=400)
+        reference_cache.invalidate('technicians', 'team_technicians')
+        technician_workload.technician_added(tech_id, data['team_id'])
+        technician = await fetch_one(connection, repository.TECHNICIAN_BY_ID, (tech_id,))
+    return APIResponse(technician, status_code=201)
+
+
+# ============== EQUIPMENT ==============
+
+@router.get("/equipment")
+async def get_equipment(request: Request):
+    """Equipment list with open request counts; same filters and paging as the Flask endpoint"""
+    query = equipment_list_query(request.query_params)
+    async with _pool.acquire() as connection:
+        equipment_list = await fetch_all(connection, query.sql, query.params, repository.EQUIPMENT_BOOLEANS)
+        total = None
+        if query.limit and parse_flag_arg(request.query_params, 'include_total'):
+            total = (await fetch_raw(connection, query.count_sql, query.count_params))[0][0]
+
+    if query.limit:
+        return APIResponse(paginated_response(equipment_list, query.limit, ('name', 'id'), total))
+    return APIResponse(equipment_list)
+
+
+@router.get("/equipment/maintenance_counts")
+async def get_maintenance_counts(request: Request):
+    """Open request counts for many equipment ids in one query (?ids=1,2,3)"""
+    ids = parse_id_list(request.query_params.get('ids'), MAX_BATCH_IDS)
+    counts = {str(equipment_id): 0 for equipment_id in ids}
+    if ids:
+        sql, params = open_request_counts_query(ids)
+        async with _pool.acquire() as connection:
+            for equipment_id, count in await fetch_raw(connection, sql, params):
+                counts[str(equipment_id)] = count
+    return APIResponse({'counts': counts})
+
+
+@router.get("/equipment/{equipment_id:int}")
+async def get_equipment_by_id(equipment_id: int):
+    async with _pool.acquire() as connection:
+        equipment = await fetch_one(connection, repository.EQUIPMENT_BY_ID, (equipment_id,),
+                                    repository.EQUIPMENT_BOOLEANS)
+    if equipment:
+        return APIResponse(equipment)
+    return JSONResponse({'error': 'Equipment not found'}, status_code=404)
+
+
+async def _save_equipment(data, equipment_id=None):
+    written = repository.values(data, repository.EQUIPMENT_FIELDS, {'is_scrapped': False})
+    async with _pool.acquire() as connection:
+        await connection.begin()
+        try:
+            if equipment_id is None:
+                equipment_id = await execute(connection, repository.EQUIPMENT_INSERT, written)
+            else:
+                await execute(connection, repository.EQUIPMENT_UPDATE, written + (equipment_id,))
+            await bump_versions(connection, 'equipment')
+            await connection.commit()
+        except aiomysql.MySQLError as e:
+            await connection.rollback()
+            return None, JSONResponse({'error': str(e)}, status_code=400)
+        reference_cache.invalidate('equipment_team')
+        dashboard_summary.equipment_saved(equipment_id, data['name'], data.get('is_scrapped', False))
+        return await fetch_one(connection, repository.EQUIPMENT_BY_ID, (equipment_id,),
+                               repository.EQUIPMENT_BOOLEANS), None
+
+
+@router.post("/equipment")
+async def create_equipment(request: Request):
+    equipment, error = await _save_equipment(await request.json())
+    return error or APIResponse(equipment, status_code=201)
+
+
+@router.put("/equipment/{equipment_id:int}")
+async def update_equipment(equipment_id: int, request: Request):
+    equipment, error = await _save_equipment(await request.json(), equipment_id)
+    return error or APIResponse(equipment)
+
+
+@router.get("/equipment/{equipment_id:int}/maintenance_count")
+async def get_maintenance_count(equipment_id: int):
+    async with _pool.acquire() as connection:
+        count = (await fetch_raw(connection, repository.EQUIPMENT_OPEN_COUNT, (equipment_id,)))[0][0]
+    return APIResponse({'count': count})
+
+
+# ============== MAINTENANCE REQUESTS ==============
+
+@router.get("/requests")
+async def get_requests(request: Request):
+    """Request list, newest first; same filters and paging as the Flask endpoint"""
+    query = request_list_query(request.query_params)
+    async with _pool.acquire() as connection:
+        requests = await fetch_all(connection, query.sql, query.params)
+        total = None
+        if query.limit and parse_flag_arg(request.query_params, 'include_total'):
+            total = (await fetch_raw(connection, query.count_sql, query.count_params))[0][0]
+
+    if query.limit:
+        return APIResponse(paginated_response(requests, query.limit, ('created_at', 'id'), total))
+    return APIResponse(requests)
+
+
+async def equipment_team(connection, equipment_id):
+    result = await fetch_raw(connection, repository.EQUIPMENT_TEAM, (equipment_id,))
+    return result[0][0] if result else None
+
+
+@router.post("/requests")
+async def create_request(request: Request):
+    data = await request.json()
+    async with _pool.acquire() as connection:
+        await connection.begin()
+        try:
+            # Get equipment's team_id for auto-fill
+            team_id = await reference_cache.get_async(
+                'equipment_team', await reference_key(connection, 'equipment_team', data['equipment_id']),
+                lambda: equipment_team(connection, data['equipment_id'])
+            )
+            if team_id is None:
+                team_id = data.get('team_id')
+            if not data.get('technician_id') and (data.get('auto_assign') or AUTO_ASSIGN_REQUESTS):
+                # A (re)load of the index blocks, so pick off the event loop
+                data = {**data, 'technician_id': await asyncio.to_thread(
+                    technician_workload.pick, team_id, data.get('scheduled_date'),
+                    data.get('duration_hours'), connection=connection)}
+
+            written = repository.values(
+                {**data, 'team_id': team_id}, repository.REQUEST_FIELDS, {'status': 'New'}
+            )
+            request_id = await execute(connection, repository.REQUEST_INSERT, written)
+            await bump_versions(connection, 'maintenance_requests')
+            await connection.commit()
+        except aiomysql.MySQLError as e:
+            await connection.rollback()
+            return JSONResponse({'error': str(e)}, status_code=400)
+        fields = dict(zip(repository.REQUEST_FIELDS, written))
+        dashboard_summary.request_created(team_id, int(data['equipment_id']), fields['status'])
+        technician_workload.request_saved(request_id, fields['technician_id'], fields['status'],
+                                          fields['scheduled_date'], fields['duration_hours'])
+        change_feed.publish('created', request_id=request_id, status=fields['status'], changes=fields)
+        new_request = await fetch_one(connection, repository.REQUEST_BY_ID, (request_id,))
+    return APIResponse(new_request, status_code=201)
+
+
+@router.put("/requests/{request_id:int}")
+async def update_request(request_id: int, request: Request):
+    data = await request.json()
+    # Validation: Duration required before marking as Repaired
+    if data.get('status') == 'Repaired' and not data.get('duration_hours'):
+        return JSONResponse({'error': 'Duration is required before marking as Repaired'}, status_code=400)
+
+    async with _pool.acquire() as connection:
+        await connection.begin()
+        try:
+            previous = await fetch_raw(connection, repository.REQUEST_STATE, (request_id,))
+            written = repository.values(data, repository.REQUEST_UPDATE_FIELDS)
+            await execute(connection, repository.REQUEST_UPDATE, written + (request_id,))
+
+            # If status is Scrap, mark equipment as scrapped
+            if data.get('status') == 'Scrap':
+                await execute(connection, repository.REQUEST_SCRAP_EQUIPMENT, (request_id,))
+                await bump_versions(connection, 'maintenance_requests', 'equipment')
+            else:
+                await bump_versions(connection, 'maintenance_requests')
+            await connection.commit()
+        except aiomysql.MySQLError as e:
+            await connection.rollback()
+            return JSONResponse({'error': str(e)}, status_code=400)
+
+        technician_workload.request_saved(request_id, data.get('technician_id'), data.get('status'),
+                                          data.get('scheduled_date'), data.get('duration_hours'))
+        if previous:
+            old_status, equipment_id = previous[0]
+            dashboard_summary.request_status_changed(old_status, data.get('status'))
+            if data.get('status') == 'Scrap':
+                dashboard_summary.equipment_scrapped(equipment_id)
+            change_feed.publish('updated', request_id=request_id, equipment_id=equipment_id,
+                                old_status=old_status, status=data.get('status'),
+                                changes=dict(zip(repository.REQUEST_UPDATE_FIELDS, written)))
+        updated_request = await fetch_one(connection, repository.REQUEST_BY_ID, (request_id,))
+    return APIResponse(updated_request)
+
+
+@router.get("/requests/kanban")
+async def get_kanban_requests(request: Request):
+    """Kanban board (or one column page with ?status=&cursor=); same shape as the Flask endpoint"""
+    args = request.query_params
+    limit = kanban_limit(args)
+    status = kanban_column_status(args)
+    if status is not None:
+        sql, params = kanban_column_query(status, limit, decode_cursor(args.get('cursor')))
+        async with _pool.acquire() as connection:
+            cards = await fetch_all(connection, sql, tuple(params))
+        return APIResponse(paginated_response(cards, limit, ('created_at', 'id')))
+
+    sql, params = kanban_board_query(limit)
+    async with _pool.acquire() as connection:
+        rows = await fetch_all(connection, sql, params)
+        status_counts = None
+        if parse_flag_arg(args, 'meta'):
+            status_counts = await fetch_raw(connection, repository.REQUEST_STATUS_COUNTS)
+    return APIResponse(kanban_board(rows, limit, status_counts))
+
+
+@router.get("/bootstrap/kanban")
+async def get_kanban_bootstrap(request: Request):
+    """Board plus projected lookup lists; same shape as the Flask endpoint"""
+    args = request.query_params
+    limit = kanban_limit(args)
+    fields = parse_fields_arg(args)
+    sql, params = kanban_board_query(limit)
+    async with _pool.acquire() as connection:
+        rows = await fetch_all(connection, sql, params)
+        status_counts = await fetch_raw(connection, repository.REQUEST_STATUS_COUNTS)
+        body = {'board': kanban_board(rows, limit, status_counts)}
+        for name, columns in fields.items():
+            body[name] = await fetch_all(connection, bootstrap_lookup_query(name, columns),
+                                         booleans=repository.EQUIPMENT_BOOLEANS if name == 'equipment' else ())
+    return APIResponse(body)
+
+
+@router.get("/search")
+async def search(request: Request):
+    """Ranked type-ahead over equipment and request subjects; same shape as the Flask endpoint"""
+    q, types, limit = parse_search_args(request.query_params)
+    body = {'query': q}
+    async with _pool.acquire() as connection:
+        for name, query in search_queries(q, types, limit).items():
+            body[name] = await fetch_all(connection, *query, booleans=repository.EQUIPMENT_BOOLEANS) if query else []
+    return APIResponse(body)
+
+
+@router.get("/requests/calendar")
+async def get_calendar_requests(request: Request):
+    """Preventive requests scheduled in [start, end)"""
+    sql, params = calendar_query(request.query_params)
+    async with _pool.acquire() as connection:
+        requests = await fetch_all(connection, sql, params)
+    return APIResponse(requests)
+
+
+@router.get("/plans")
+async def get_plans(request: Request):
+    """Maintenance plans ordered by next due date (plans are written through the Flask API)"""
+    sql, params = plan_list_query(request.query_params)
+    async with _pool.acquire() as connection:
+        plans = await fetch_all(connection, sql, params, repository.PLAN_BOOLEANS)
+    return APIResponse(plans)
+
+
+@router.get("/plans/{plan_id:int}")
+async def get_plan(plan_id: int):
+    async with _pool.acquire() as connection:
+        plan = await fetch_one(connection, repository.PLAN_BY_ID, (plan_id,), repository.PLAN_BOOLEANS)
+    if plan:
+        return APIResponse(plan)
+    return JSONResponse({'error': 'Plan not found'}, status_code=404)
+
+
+# ============== STATS ==============
+
+@router.get("/stats/dashboard")
+async def get_dashboard_stats(request: Request):
+    """Dashboard counters from the in-memory summary; ?fresh=1 recomputes from MySQL"""
+    fresh = parse_flag_arg(request.query_params, 'fresh')
+    # A (re)load blocks on MySQL, so keep it off the event loop
+    return APIResponse(await asyncio.to_thread(dashboard_summary.get, fresh))
+
+
+@router.get("/stats/pool")
+async def get_pool_stats():
+    """aiomysql pool usage"""
+    return APIResponse({
+        'size': _pool.size,
+        'free': _pool.freesize,
+        'in_use': _pool.size - _pool.freesize,
+        'min_size': _pool.minsize,
+        'max_size': _pool.maxsize
+    })
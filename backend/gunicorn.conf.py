@@ -0,0 +1,98 @@
+"""Production gunicorn settings for the GearGuard API.
+
+Flask (threaded workers):
+    gunicorn -c gunicorn.conf.py flask_server:app
+Async FastAPI app (see gearguard_async.py):
+    GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker gunicorn -c gunicorn.conf.py server:app
+
+More than one worker needs CHANGE_FEED_URL (see change_feed.py), or the
+master refuses to start.
+
+Every setting can be overridden from the environment. Send HUP to the
+master for a graceful reload: new workers start, importing the current
+code, before the old ones finish their in-flight requests (up to
+graceful_timeout seconds). With GUNICORN_PRELOAD=1 the app is imported once
+in the master, so HUP only restarts workers on the old code; deploy with
+USR2 (start a new master) followed by WINCH and QUIT to the old one, or a
+full restart.
+"""
+import multiprocessing
+import os
+import subprocess
+import sys
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8001')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+# Threads per worker (gthread only); keep workers * threads within the DB pool budget.
+# Up to half of them (or SSE_MAX_STREAMS) serve /api/requests/stream; see change_feed.py
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+# Recycle workers periodically to cap slow leaks; jitter avoids restarting all at once
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 5000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 500))
+
+# Import the app once in the master so workers fork with it already loaded
+# (saves memory and startup time, but HUP then keeps the old code; see above)
+preload_app = os.environ.get('GUNICORN_PRELOAD', '0') in ('1', 'true')
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+errorlog = os.environ.get('GUNICORN_ERROR_LOG', '-')
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+# Apply schema migrations once per start and reload instead of in every worker
+init_database = os.environ.get('GEARGUARD_INIT_DB', '1') in ('1', 'true')
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def serves_flask(server):
+    """True when the master was started for flask_server:app"""
+    return getattr(server.app, 'app_uri', '').split(':')[0] == 'flask_server'
+
+
+def migrate_schema(server):
+    """Run `schema_migrations.py upgrade` in a child process.
+
+    The master never imports flask_server itself: that would pin the old
+    code (and a second connection pool) in it, so HUP could not reload.
+    """
+    if not init_database or not serves_flask(server):
+        return
+    result = subprocess.run([sys.executable, 'schema_migrations.py', 'upgrade'], cwd=BACKEND_DIR)
+    if result.returncode != 0:
+        server.log.error("Schema migration failed (exit status %s)", result.returncode)
+
+
+def check_change_feed(server):
+    """Refuse several workers without a change-feed broker.
+
+    A worker's local feed only carries its own writes, so Kanban boards
+    streaming from one worker would silently miss the others'.
+    """
+    if server.cfg.workers > 1 and not os.environ.get('CHANGE_FEED_URL'):
+        server.log.error("CHANGE_FEED_URL is not set but %s workers are configured: set "
+                         "CHANGE_FEED_URL=redis://... or GUNICORN_WORKERS=1", server.cfg.workers)
+        raise SystemExit(1)
+
+
+def on_starting(server):
+    check_change_feed(server)
+    migrate_schema(server)
+
+
+def on_reload(server):
+    # HUP may bring code that expects new migrations
+    migrate_schema(server)
+
+
+def post_worker_init(worker):
+    # Threads do not survive fork, so each Flask worker starts its own plan
+    # scheduler; the expansion lock lets one of them work at a time
+    flask_server = sys.modules.get('flask_server')
+    if flask_server is not None and worker.wsgi is flask_server.app:
+        flask_server.start_plan_scheduler()
@@ -0,0 +1,195 @@
+"""Recurring preventive-maintenance plans and their expansion into requests.
+
+A plan repeats every ``interval_days``, or every ``interval_hours`` of run
+time converted to calendar days with ``run_hours_per_day``. ``next_due`` is
+the first occurrence not generated yet, so expansion is incremental: it
+reads only the active plans due within the horizon, inserts their
+occurrences up to the horizon end as 'Preventive' requests and moves
+``next_due`` past them. Occurrences that fell in the past while a plan was
+paused or the scheduler was down are skipped, not back-filled.
+
+Overlapping runs (several workers, the CLI) take EXPANSION_LOCK; the unique
+(plan_id, scheduled_date) index keeps even an unlocked run from inserting
+an occurrence twice.
+"""
+import math
+import time
+from datetime import date, timedelta
+
+from bulk import ItemError, _flag, _optional_date, _optional_hours, _optional_int, _required_text
+import repository
+
+# Machines without a run_hours_per_day are assumed to run one shift a day
+DEFAULT_RUN_HOURS_PER_DAY = 8.0
+# Plans read (and occurrences committed) per round of the expansion
+PLAN_PAGE_SIZE = 500
+
+# Named MySQL lock serializing expansions across workers and hosts
+EXPANSION_LOCK = 'gearguard_plan_expansion'
+
+DUE_PLANS = """
+    SELECT p.id, p.equipment_id, p.subject, p.interval_days, p.interval_hours, p.run_hours_per_day,
+           COALESCE(p.team_id, e.maintenance_team_id), p.technician_id, p.duration_hours, p.next_due
+    FROM maintenance_plans p
+    INNER JOIN equipment e ON p.equipment_id = e.id
+    WHERE p.active = TRUE AND p.next_due <= %s AND e.is_scrapped = FALSE AND p.id > %s
+"""
+# Occurrences already present are filtered out first; the upsert covers a racing
+# writer. Affected rows are 1 per inserted row and 0 per duplicate left as is
+# (the pool connects without CLIENT_FOUND_ROWS), so rowcount is the rows created.
+OCCURRENCE_INSERT = """
+    INSERT INTO maintenance_requests (subject, equipment_id, team_id, technician_id, request_type,
+                                      scheduled_date, duration_hours, status, plan_id)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE id = id
+"""
+
+
+def validate_plan(item, today=None):
+    """Normalized fields of a maintenance plan, in repository.PLAN_FIELDS order"""
+    if not isinstance(item, dict):
+        raise ItemError('Plan must be an object')
+    equipment_id = _optional_int(item, 'equipment_id')
+    if equipment_id is None:
+        raise ItemError('equipment_id is required')
+
+    interval_days = _optional_int(item, 'interval_days')
+    interval_hours = _optional_hours(item, 'interval_hours')
+    if (interval_days is None) == (interval_hours is None):
+        raise ItemError('Give exactly one of interval_days or interval_hours')
+    if interval_days is not None and interval_days < 1:
+        raise ItemError('interval_days must be at least 1')
+    if interval_hours is not None and interval_hours <= 0:
+        raise ItemError('interval_hours must be positive')
+    run_hours_per_day = _optional_hours(item, 'run_hours_per_day')
+    if run_hours_per_day is not None and not 0 < run_hours_per_day <= 24:
+        raise ItemError('run_hours_per_day must be between 0 and 24')
+
+    next_due = _optional_date(item, 'next_due') or (today or date.today()).isoformat()
+    return {
+        'equipment_id': equipment_id,
+        'subject': _required_text(item, 'subject'),
+        'interval_days': interval_days,
+        'interval_hours': interval_hours,
+        'run_hours_per_day': run_hours_per_day if interval_hours is not None else None,
+        'team_id': _optional_int(item, 'team_id'),
+        'technician_id': _optional_int(item, 'technician_id'),
+        'duration_hours': _optional_hours(item, 'duration_hours'),
+        'next_due': next_due,
+        'active': _flag(item, 'active') if 'active' in item else True,
+    }
+
+
+def interval_in_days(interval_days, interval_hours, run_hours_per_day):
+    """Calendar days between occurrences (run-hour intervals rounded up)"""
+    if interval_days:
+        return int(interval_days)
+    per_day = float(run_hours_per_day or DEFAULT_RUN_HOURS_PER_DAY)
+    return max(1, math.ceil(float(interval_hours) / per_day))
+
+
+def occurrences(next_due, every, today, horizon_end):
+    """Due dates from next_due through horizon_end, and the next_due after them.
+
+    A next_due in the past first moves forward by whole intervals to the
+    first occurrence on or after today.
+    """
+    if next_due < today:
+        missed = -(-(today - next_due).days // every)
+        next_due += timedelta(days=missed * every)
+    dates = []
+    while next_due <= horizon_end:
+        dates.append(next_due)
+        next_due += timedelta(days=every)
+    return dates, next_due
+
+
+def _existing_occurrences(cursor, plan_ids, today, horizon_end):
+    """(plan_id, scheduled_date) pairs already generated in the window, via the unique index"""
+    placeholders = ', '.join(['%s'] * len(plan_ids))
+    cursor.execute(
+        f"SELECT plan_id, scheduled_date FROM maintenance_requests "
+        f"WHERE plan_id IN ({placeholders}) AND scheduled_date BETWEEN %s AND %s",
+        tuple(plan_ids) + (today, horizon_end)
+    )
+    return set(cursor.fetchall())
+
+
+def _advance_statement(count):
+    """One UPDATE moving next_due of count plans: params are (id, date) pairs, then the ids"""
+    cases = ' '.join(['WHEN %s THEN %s'] * count)
+    placeholders = ', '.join(['%s'] * count)
+    return f"UPDATE maintenance_plans SET next_due = CASE id {cases} END WHERE id IN ({placeholders})"
+
+
+def expand_plans(connection, horizon_days, today=None, plan_id=None, lock_timeout=0):
+    """Generate the missing occurrences of due plans up to today + horizon_days.
+
+    Works through the due plans PLAN_PAGE_SIZE at a time: one multi-row
+    INSERT of the page's occurrences, one UPDATE of their next_due and a
+    commit. plan_id limits the run to one plan. Returns a stats dict;
+    'locked' is True (and nothing is done) when another expansion still
+    holds EXPANSION_LOCK after lock_timeout seconds.
+    """
+    today = today or date.today()
+    horizon_end = today + timedelta(days=horizon_days)
+    stats = {'horizon_end': horizon_end.isoformat(), 'plans': 0, 'created': 0, 'skipped': 0, 'locked': False}
+    started = time.perf_counter()
+
+    sql = DUE_PLANS + (" AND p.id = %s" if plan_id is not None else '') + " ORDER BY p.id LIMIT %s"
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SELECT GET_LOCK(%s, %s)", (EXPANSION_LOCK, lock_timeout))
+        if cursor.fetchone()[0] != 1:
+            stats['locked'] = True
+            return stats
+        try:
+            last_id = 0
+            while True:
+                params = (horizon_end, last_id) + ((plan_id,) if plan_id is not None else ()) + (PLAN_PAGE_SIZE,)
+                cursor.execute(sql, params)
+                plans = cursor.fetchall()
+                if not plans:
+                    break
+                last_id = plans[-1][0]
+
+                rows, advanced = [], []
+                for (pid, equipment_id, subject, days, hours, per_day,
+                     team_id, technician_id, duration_hours, next_due) in plans:
+                    if team_id is None:
+                        # Requests need a team; the plan waits until its equipment has one
+                        stats['skipped'] += 1
+                        continue
+                    every = interval_in_days(days, hours, per_day)
+                    dates, following = occurrences(next_due, every, today, horizon_end)
+                    rows.extend((subject, equipment_id, team_id, technician_id, 'Preventive',
+                                 due, duration_hours, 'New', pid) for due in dates)
+                    advanced.append((pid, following))
+
+                if rows:
+                    existing = _existing_occurrences(cursor, [pid for pid, _ in advanced], today, horizon_end)
+                    rows = [row for row in rows if (row[8], row[5]) not in existing]
+                if rows:
+                    # executemany rewrites this into one multi-row INSERT
+                    cursor.executemany(OCCURRENCE_INSERT, rows)
+                    stats['created'] += cursor.rowcount
+                    repository.execute(connection, repository.TABLE_VERSION_BUMP, ('maintenance_requests',))
+                if advanced:
+                    cursor.execute(_advance_statement(len(advanced)),
+                                   tuple(value for pair in advanced for value in pair)
+                                   + tuple(pid for pid, _ in advanced))
+                    repository.execute(connection, repository.TABLE_VERSION_BUMP, ('maintenance_plans',))
+                connection.commit()
+                stats['plans'] += len(advanced)
+                if len(plans) < PLAN_PAGE_SIZE:
+                    break
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (EXPANSION_LOCK,))
+            cursor.fetchall()
+    finally:
+        cursor.close()
+    stats['seconds'] = round(time.perf_counter() - started, 3)
+    return stats
@@ -0,0 +1,280 @@
+"""Per-route request, database and serialization metrics in Prometheus text format.
+
+``Metrics.init_app(app)`` times every request and labels it with its URL
+rule (``/api/requests/<int:request_id>``, not the raw path), and the
+connection pool reports to the same object through its ``observer`` hook:
+
+- each checkout's wait time,
+- each ``execute``/``executemany`` and fetch through an InstrumentedCursor
+  (query count, time and rows returned),
+
+while the JSON provider's ``response`` is wrapped to time serialization.
+Cursors remember the route they were opened under, so rows fetched while a
+streamed response is being sent are still charged to that route.
+
+Statements slower than ``slow_query_seconds`` are printed with their SQL
+shape (whitespace collapsed, IN lists folded) and kept in a short ring for
+/api/stats/slow-queries.
+
+Counters live in the worker process; with several gunicorn workers each
+scrape sees the worker that answered it.
+"""
+import re
+import threading
+import time
+from collections import defaultdict, deque
+
+from flask import g, has_request_context, request
+
+# Upper bounds (seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Label for work done outside any request (boot, CLI, background threads)
+NO_ROUTE = ('', 'none')
+
+_WHITESPACE = re.compile(r'\s+')
+_PLACEHOLDER_LIST = re.compile(r'\(\s*%s(?:\s*,\s*%s)*\s*\)')
+
+
+def sql_shape(sql):
+    """SQL text with whitespace collapsed and IN (%s, %s, ...) lists folded to IN (...)"""
+    if isinstance(sql, bytes):
+        sql = sql.decode(errors='replace')
+    return _PLACEHOLDER_LIST.sub('(...)', _WHITESPACE.sub(' ', sql).strip())
+
+
+def current_route():
+    """(method, URL rule) of the request being handled, or NO_ROUTE outside a request"""
+    if not has_request_context():
+        return NO_ROUTE
+    rule = request.url_rule
+    return request.method, rule.rule if rule is not None else 'unmatched'
+
+
+class _RouteStats:
+    __slots__ = ('buckets', 'latency_sum', 'requests', 'db_queries', 'db_seconds', 'db_rows',
+                 'serialize_seconds', 'checkout_seconds', 'slow_queries')
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latency_sum = 0.0
+        self.requests = defaultdict(int)   # status code -> count
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.db_rows = 0
+        self.serialize_seconds = 0.0
+        self.checkout_seconds = 0.0
+        self.slow_queries = 0
+
+
+class InstrumentedCursor:
+    """Cursor proxy timing execute/executemany and the fetch calls"""
+
+    def __init__(self, cursor, metrics, route):
+        self._cursor = cursor
+        self._metrics = metrics
+        self._route = route
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._cursor.close()
+        return False
+
+    def execute(self, sql, params=None, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self._cursor.execute(sql, params, *args, **kwargs)
+        finally:
+            self._metrics.query(self._route, sql, time.perf_counter() - started)
+
+    def executemany(self, sql, seq_params, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self._cursor.executemany(sql, seq_params, *args, **kwargs)
+        finally:
+            self._metrics.query(self._route, sql, time.perf_counter() - started)
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = self._cursor.fetchone()
+        self._metrics.fetched(self._route, 0 if row is None else 1, time.perf_counter() - started)
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        started = time.perf_counter()
+        rows = self._cursor.fetchmany(*args, **kwargs)
+        self._metrics.fetched(self._route, len(rows), time.perf_counter() - started)
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = self._cursor.fetchall()
+        self._metrics.fetched(self._route, len(rows), time.perf_counter() - started)
+        return rows
+
+
+class Metrics:
+    """Thread-safe per-route counters; see the module docstring"""
+
+    def __init__(self, slow_query_seconds=0.2, slow_query_log_size=50, prefix='gearguard'):
+        self.slow_query_seconds = slow_query_seconds
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._routes = defaultdict(_RouteStats)
+        self._slow_log = deque(maxlen=slow_query_log_size)
+
+    def init_app(self, app):
+        """Time every request and every JSON body serialized by app.json"""
+        app.before_request(self._start_request)
+        app.after_request(self._record_status)
+        app.teardown_request(self._finish_request)
+
+        respond = app.json.response
+
+        def timed_response(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return respond(*args, **kwargs)
+            finally:
+                self.serialized(current_route(), time.perf_counter() - started)
+        app.json.response = timed_response
+
+    # ---- pool observer interface (see ConnectionPool.observer) ----
+
+    def cursor(self, cursor):
+        return InstrumentedCursor(cursor, self, current_route())
+
+    def checkout(self, seconds):
+        route = current_route()
+        with self._lock:
+            self._routes[route].checkout_seconds += seconds
+
+    # ---- recording ----
+
+    def query(self, route, sql, seconds):
+        slow = seconds >= self.slow_query_seconds
+        with self._lock:
+            stats = self._routes[route]
+            stats.db_queries += 1
+            stats.db_seconds += seconds
+            if slow:
+                stats.slow_queries += 1
+        if slow:
+            shape = sql_shape(sql)
+            route = ' '.join(route).strip()
+            self._slow_log.append({'route': route, 'ms': round(seconds * 1000, 1),
+                                   'sql': shape, 'at': time.time()})
+            print(f"Slow query ({seconds * 1000:.1f} ms, {route}): {shape}")
+
+    def fetched(self, route, rows, seconds):
+        with self._lock:
+            stats = self._routes[route]
+            stats.db_rows += rows
+            stats.db_seconds += seconds
+
+    def serialized(self, route, seconds):
+        with self._lock:
+            self._routes[route].serialize_seconds += seconds
+
+    def _start_request(self):
+        g.metrics_started = time.perf_counter()
+
+    def _record_status(self, response):
+        g.metrics_status = response.status_code
+        return response
+
+    def _finish_request(self, exc):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return
+        # Streamed bodies are timed until the view returns; their fetches still count
+        seconds = time.perf_counter() - started
+        status = g.pop('metrics_status', 500)
+        route = current_route()
+        with self._lock:
+            stats = self._routes[route]
+            stats.requests[status] += 1
+            stats.latency_sum += seconds
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    stats.buckets[i] += 1
+                    break
+            else:
+                stats.buckets[-1] += 1
+
+    # ---- reporting ----
+
+    def slow_queries(self):
+        """Most recent slow statements, newest first"""
+        return list(reversed(self._slow_log))
+
+    def render(self, extra=()):
+        """Everything in Prometheus text exposition format.
+
+        extra: (name, kind, help, value) series appended as-is, e.g. the pool's
+        gauges and counters; counter names end in _total.
+        """
+        with self._lock:
+            snapshot = sorted(
+                (route, dict(stats.requests), list(stats.buckets), stats.latency_sum,
+                 stats.db_queries, stats.db_seconds, stats.db_rows,
+                 stats.serialize_seconds, stats.checkout_seconds, stats.slow_queries)
+                for route, stats in self._routes.items()
+            )
+
+        p = self.prefix
+        lines = []
+
+        def family(name, kind, help_text):
+            lines.append(f"# HELP {p}_{name} {help_text}")
+            lines.append(f"# TYPE {p}_{name} {kind}")
+
+        family('http_requests_total', 'counter', 'Requests handled, by route and status.')
+        for route, requests, *_ in snapshot:
+            for status, count in sorted(requests.items()):
+                lines.append(f'{p}_http_requests_total{{{_labels(route)},status="{status}"}} {count}')
+
+        family('http_request_duration_seconds', 'histogram', 'Request latency (streams: until the view returns).')
+        for route, requests, buckets, latency_sum, *_ in snapshot:
+            labels = _labels(route)
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, buckets):
+                cumulative += count
+                lines.append(f'{p}_http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            total = cumulative + buckets[-1]
+            lines.append(f'{p}_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {total}')
+            lines.append(f'{p}_http_request_duration_seconds_sum{{{labels}}} {latency_sum:.6f}')
+            lines.append(f'{p}_http_request_duration_seconds_count{{{labels}}} {total}')
+
+        for index, name, kind, help_text in (
+            (4, 'db_queries_total', 'counter', 'Statements executed.'),
+            (5, 'db_seconds_total', 'counter', 'Time spent in execute and fetch calls.'),
+            (6, 'db_rows_total', 'counter', 'Rows fetched.'),
+            (7, 'serialize_seconds_total', 'counter', 'Time spent encoding JSON responses.'),
+            (8, 'pool_checkout_seconds_total', 'counter', 'Time spent waiting for a pooled connection.'),
+            (9, 'slow_queries_total', 'counter', 'Statements slower than the slow query threshold.'),
+        ):
+            family(name, kind, help_text)
+            for row in snapshot:
+                value = row[index]
+                value = f"{value:.6f}" if isinstance(value, float) else value
+                lines.append(f'{p}_{name}{{{_labels(row[0])}}} {value}')
+
+        for name, kind, help_text, value in extra:
+            family(name, kind, help_text)
+            lines.append(f"{p}_{name} {value}")
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(route):
+    method, rule = route
+    rule = rule.replace('\\', '\\\\').replace('"', '\\"')
+    return f'method="{method}",route="{rule}"'
@@ -0,0 +1,59 @@
+"""Core GearGuard tables."""
+
+
+def upgrade(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS maintenance_teams (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            team_name VARCHAR(255) NOT NULL UNIQUE,
+            description TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS technicians (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            email VARCHAR(255) NOT NULL UNIQUE,
+            team_id INT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (team_id) REFERENCES maintenance_teams(id) ON DELETE CASCADE
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS equipment (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            serial_number VARCHAR(255) NOT NULL UNIQUE,
+            department VARCHAR(255),
+            assigned_employee VARCHAR(255),
+            location VARCHAR(255),
+            purchase_date DATE,
+            warranty_end DATE,
+            maintenance_team_id INT,
+            is_scrapped BOOLEAN DEFAULT FALSE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (maintenance_team_id) REFERENCES maintenance_teams(id)
+        )
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS maintenance_requests (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            subject VARCHAR(255) NOT NULL,
+            equipment_id INT NOT NULL,
+            team_id INT NOT NULL,
+            technician_id INT,
+            request_type ENUM('Corrective', 'Preventive') NOT NULL,
+            scheduled_date DATE,
+            duration_hours DECIMAL(5,2),
+            status ENUM('New', 'In Progress', 'Repaired', 'Scrap') DEFAULT 'New',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            FOREIGN KEY (equipment_id) REFERENCES equipment(id) ON DELETE CASCADE,
+            FOREIGN KEY (team_id) REFERENCES maintenance_teams(id),
+            FOREIGN KEY (technician_id) REFERENCES technicians(id)
+        )
+    """)
@@ -0,0 +1,20 @@
+"""Composite indexes backing the filtered / keyset-paginated list endpoints."""
+from schema_migrations import ensure_index
+
+# (table, index name, columns)
+INDEXES = [
+    ('maintenance_requests', 'idx_requests_created', 'created_at, id'),
+    ('maintenance_requests', 'idx_requests_status_created', 'status, created_at, id'),
+    ('maintenance_requests', 'idx_requests_team_created', 'team_id, created_at, id'),
+    ('maintenance_requests', 'idx_requests_technician_created', 'technician_id, created_at, id'),
+    ('maintenance_requests', 'idx_requests_equipment_status', 'equipment_id, status'),
+    ('maintenance_requests', 'idx_requests_type_created', 'request_type, created_at, id'),
+    ('maintenance_requests', 'idx_requests_type_scheduled', 'request_type, scheduled_date'),
+    ('equipment', 'idx_equipment_name', 'name, id'),
+    ('equipment', 'idx_equipment_team_name', 'maintenance_team_id, name, id'),
+]
+
+
+def upgrade(cursor):
+    for table, index_name, index_columns in INDEXES:
+        ensure_index(cursor, table, index_name, index_columns)
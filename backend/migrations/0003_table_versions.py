@@ -0,0 +1,14 @@
+"""Per-table change counters behind the ETags of the read endpoints."""
+
+
+def upgrade(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS table_versions (
+            table_name VARCHAR(64) PRIMARY KEY,
+            version BIGINT NOT NULL DEFAULT 0
+        )
+    """)
+    cursor.executemany(
+        "INSERT IGNORE INTO table_versions (table_name, version) VALUES (%s, 0)",
+        [(table,) for table in ('maintenance_teams', 'technicians', 'equipment', 'maintenance_requests')]
+    )
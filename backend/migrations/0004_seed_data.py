@@ -0,0 +1,44 @@
+"""Demo teams, technicians and equipment for an empty database."""
+
+
+def upgrade(cursor):
+    cursor.execute("SELECT COUNT(*) FROM maintenance_teams")
+    if cursor.fetchone()[0] != 0:
+        return
+
+    teams = [
+        ('Mechanics', 'Mechanical equipment maintenance'),
+        ('Electricians', 'Electrical systems maintenance'),
+        ('IT Support', 'Computer and network maintenance')
+    ]
+    cursor.executemany(
+        "INSERT INTO maintenance_teams (team_name, description) VALUES (%s, %s)",
+        teams
+    )
+
+    technicians = [
+        ('John Smith', 'john.smith@gearguard.com', 1),
+        ('Mike Johnson', 'mike.j@gearguard.com', 1),
+        ('Sarah Williams', 'sarah.w@gearguard.com', 2),
+        ('Emily Brown', 'emily.b@gearguard.com', 2),
+        ('David Lee', 'david.l@gearguard.com', 3),
+        ('Lisa Chen', 'lisa.c@gearguard.com', 3)
+    ]
+    cursor.executemany(
+        "INSERT INTO technicians (name, email, team_id) VALUES (%s, %s, %s)",
+        technicians
+    )
+
+    equipment = [
+        ('CNC Machine A1', 'CNC-001', 'Production', 'Tom Hardy', 'Floor 1 - Zone A', '2022-01-15', '2025-01-15', 1, False),
+        ('Lathe Machine', 'LTH-002', 'Production', 'Jane Doe', 'Floor 1 - Zone B', '2021-06-10', '2024-06-10', 1, False),
+        ('Generator Unit', 'GEN-003', 'Power', 'Bob Smith', 'Basement', '2020-03-20', '2025-03-20', 2, False),
+        ('Server Rack', 'SRV-004', 'IT', 'Alice Johnson', 'Data Center', '2023-05-12', '2026-05-12', 3, False),
+        ('Air Compressor', 'CMP-005', 'Production', 'Charlie Brown', 'Floor 2', '2021-11-30', '2024-11-30', 1, False)
+    ]
+    cursor.executemany(
+        """INSERT INTO equipment (name, serial_number, department, assigned_employee,
+        location, purchase_date, warranty_end, maintenance_team_id, is_scrapped)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)""",
+        equipment
+    )
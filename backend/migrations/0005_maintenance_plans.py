@@ -0,0 +1,40 @@
+"""Recurring preventive-maintenance plans and the requests generated from them."""
+from mysql.connector import Error
+
+from schema_migrations import ensure_index
+
+
+def upgrade(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS maintenance_plans (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            equipment_id INT NOT NULL,
+            subject VARCHAR(255) NOT NULL,
+            interval_days INT,
+            interval_hours DECIMAL(8,2),
+            run_hours_per_day DECIMAL(5,2),
+            team_id INT,
+            technician_id INT,
+            duration_hours DECIMAL(5,2),
+            next_due DATE NOT NULL,
+            active BOOLEAN NOT NULL DEFAULT TRUE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            FOREIGN KEY (equipment_id) REFERENCES equipment(id) ON DELETE CASCADE,
+            FOREIGN KEY (team_id) REFERENCES maintenance_teams(id),
+            FOREIGN KEY (technician_id) REFERENCES technicians(id)
+        )
+    """)
+    # The scheduler only reads plans that are due within its horizon
+    ensure_index(cursor, 'maintenance_plans', 'idx_plans_active_due', 'active, next_due')
+
+    try:
+        cursor.execute("ALTER TABLE maintenance_requests ADD COLUMN plan_id INT NULL, ALGORITHM=INPLACE, LOCK=NONE")
+    except Error as e:
+        if e.errno != 1060:  # ER_DUP_FIELDNAME: already added
+            raise
+    # One request per plan occurrence, even if two schedulers overlap
+    ensure_index(cursor, 'maintenance_requests', 'uq_requests_plan_occurrence', 'plan_id, scheduled_date',
+                 unique=True)
+
+    cursor.execute("INSERT IGNORE INTO table_versions (table_name, version) VALUES ('maintenance_plans', 0)")
@@ -0,0 +1,13 @@
+"""FULLTEXT indexes behind the /api/search type-ahead."""
+from schema_migrations import ensure_index
+
+# Column lists must match the MATCH() clauses in query_args.search_queries
+INDEXES = [
+    ('equipment', 'ft_equipment_search', 'name, serial_number, location, department, assigned_employee'),
+    ('maintenance_requests', 'ft_requests_subject', 'subject'),
+]
+
+
+def upgrade(cursor):
+    for table, index_name, index_columns in INDEXES:
+        ensure_index(cursor, table, index_name, index_columns, fulltext=True)
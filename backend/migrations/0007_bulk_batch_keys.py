@@ -0,0 +1,19 @@
+"""batch_key columns through which bulk inserts read back their new ids."""
+from mysql.connector import Error
+
+from schema_migrations import ensure_index
+
+INDEXES = [
+    ('maintenance_requests', 'idx_requests_batch'),
+    ('equipment', 'idx_equipment_batch'),
+]
+
+
+def upgrade(cursor):
+    for table, index_name in INDEXES:
+        try:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN batch_key CHAR(32) NULL, ALGORITHM=INPLACE, LOCK=NONE")
+        except Error as e:
+            if e.errno != 1060:  # ER_DUP_FIELDNAME: already added
+                raise
+        ensure_index(cursor, table, index_name, 'batch_key')
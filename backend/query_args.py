@@ -0,0 +1,534 @@
+"""Query-string parsing and list query building shared by the Flask and async APIs.
+
+Every function takes the query arguments as a plain mapping (Flask's
+``request.args`` or Starlette's ``request.query_params``) and raises
+QueryArgError for malformed input, which both apps answer with a 400.
+"""
+import base64
+import json
+import re
+from datetime import datetime, date, timedelta
+
+import repository
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Cards returned per Kanban column per page
+KANBAN_PAGE_SIZE = 50
+
+REQUEST_STATUSES = ('New', 'In Progress', 'Repaired', 'Scrap')
+REQUEST_TYPES = ('Corrective', 'Preventive')
+
+
+class QueryArgError(ValueError):
+    """Raised for malformed query string arguments; answered with a 400"""
+
+
+def parse_int_arg(args, name):
+    value = args.get(name)
+    if value is None or value == '':
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise QueryArgError(f'{name} must be an integer')
+
+
+def parse_date_arg(args, name):
+    value = args.get(name)
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise QueryArgError(f'{name} must be a date (YYYY-MM-DD)')
+
+
+def parse_list_arg(args, name, allowed=None):
+    value = args.get(name)
+    if not value:
+        return []
+    items = [item.strip() for item in value.split(',') if item.strip()]
+    if allowed is not None:
+        invalid = [item for item in items if item not in allowed]
+        if invalid:
+            raise QueryArgError(f"Invalid {name}: {', '.join(invalid)}")
+    return items
+
+
+def parse_flag_arg(args, name):
+    return args.get(name) in ('1', 'true')
+
+
+def parse_page_args(args):
+    """Return (limit, cursor key) for keyset pagination, or (None, None) for a full list"""
+    limit = parse_int_arg(args, 'limit')
+    cursor_key = decode_cursor(args.get('cursor'))
+    if limit is None and cursor_key is None:
+        return None, None
+    if limit is None:
+        limit = DEFAULT_PAGE_SIZE
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise QueryArgError(f'limit must be between 1 and {MAX_PAGE_SIZE}')
+    return limit, cursor_key
+
+
+def encode_cursor(values):
+    """Opaque cursor for the sort key of the last row on a page"""
+    payload = [value.isoformat() if isinstance(value, (date, datetime)) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_cursor(token):
+    if not token:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token.encode()))
+    except ValueError:
+        raise QueryArgError('Invalid cursor')
+    if not isinstance(values, list) or len(values) != 2:
+        raise QueryArgError('Invalid cursor')
+    return values
+
+
+def where_clause(conditions):
+    return ('WHERE ' + ' AND '.join(conditions)) if conditions else ''
+
+
+def paginated_response(items, limit, cursor_fields, total=None):
+    """Trim the look-ahead row and build the {'items', 'next_cursor'} envelope"""
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        next_cursor = encode_cursor([last[field] for field in cursor_fields])
+    body = {'items': items, 'next_cursor': next_cursor}
+    if total is not None:
+        body['total'] = total
+    return body
+
+
+class ListQuery:
+    """A built list query: the page SQL, plus the COUNT(*) for include_total"""
+    __slots__ = ('sql', 'params', 'limit', 'count_sql', 'count_params')
+
+    def __init__(self, sql, params, limit, count_sql, count_params):
+        self.sql = sql
+        self.params = tuple(params)
+        self.limit = limit
+        self.count_sql = count_sql
+        self.count_params = tuple(count_params)
+
+
+# ---- equipment ----
+
+def equipment_filters(args):
+    """WHERE conditions shared by the equipment list and its total count"""
+    conditions = []
+    params = []
+    team_id = parse_int_arg(args, 'team_id')
+    if team_id is not None:
+        conditions.append("e.maintenance_team_id = %s")
+        params.append(team_id)
+    departments = parse_list_arg(args, 'department')
+    if departments:
+        conditions.append(f"e.department IN ({', '.join(['%s'] * len(departments))})")
+        params.extend(departments)
+    is_scrapped = args.get('is_scrapped')
+    if is_scrapped in ('0', '1', 'true', 'false'):
+        conditions.append("e.is_scrapped = %s")
+        params.append(is_scrapped in ('1', 'true'))
+    elif is_scrapped:
+        raise QueryArgError('is_scrapped must be 0 or 1')
+    return conditions, params
+
+
+def equipment_list_query(args, lookahead=True):
+    """Equipment ordered by (name, id), keyset-paginated when limit/cursor are given.
+
+    With lookahead the page fetches one extra row so paginated_response can
+    tell whether there is a next page; streaming callers pass False.
+    """
+    conditions, params = equipment_filters(args)
+    limit, cursor_key = parse_page_args(args)
+
+    page_conditions = list(conditions)
+    page_params = list(params)
+    if cursor_key:
+        try:
+            last_name = str(cursor_key[0])
+            last_id = int(cursor_key[1])
+        except (TypeError, ValueError):
+            raise QueryArgError('Invalid cursor')
+        page_conditions.append("(e.name > %s OR (e.name = %s AND e.id > %s))")
+        page_params.extend([last_name, last_name, last_id])
+
+    sql = f"{repository.EQUIPMENT_LIST_SELECT} {where_clause(page_conditions)} ORDER BY e.name, e.id"
+    if limit:
+        sql += " LIMIT %s"
+        page_params.append(limit + 1 if lookahead else limit)
+    count_sql = f"SELECT COUNT(*) FROM equipment e {where_clause(conditions)}"
+    return ListQuery(sql, page_params, limit, count_sql, params)
+
+
+# ---- maintenance requests ----
+
+def created_keyset_condition(cursor_key):
+    """Rows after a (created_at, id) cursor in newest-first order"""
+    try:
+        last_created_at = datetime.fromisoformat(cursor_key[0])
+        last_id = int(cursor_key[1])
+    except (TypeError, ValueError):
+        raise QueryArgError('Invalid cursor')
+    return ("(mr.created_at < %s OR (mr.created_at = %s AND mr.id < %s))",
+            [last_created_at, last_created_at, last_id])
+
+
+def request_filters(args):
+    """WHERE conditions shared by the request list and its total count"""
+    conditions = []
+    params = []
+    statuses = parse_list_arg(args, 'status', REQUEST_STATUSES)
+    if statuses:
+        conditions.append(f"mr.status IN ({', '.join(['%s'] * len(statuses))})")
+        params.extend(statuses)
+    request_types = parse_list_arg(args, 'request_type', REQUEST_TYPES)
+    if request_types:
+        conditions.append(f"mr.request_type IN ({', '.join(['%s'] * len(request_types))})")
+        params.extend(request_types)
+    for arg, column in (('team_id', 'mr.team_id'), ('technician_id', 'mr.technician_id'),
+                        ('equipment_id', 'mr.equipment_id')):
+        value = parse_int_arg(args, arg)
+        if value is not None:
+            conditions.append(f"{column} = %s")
+            params.append(value)
+    created_from = parse_date_arg(args, 'created_from')
+    if created_from:
+        conditions.append("mr.created_at >= %s")
+        params.append(created_from)
+    created_to = parse_date_arg(args, 'created_to')
+    if created_to:
+        conditions.append("mr.created_at < %s")
+        params.append(created_to + timedelta(days=1))
+    scheduled_from = parse_date_arg(args, 'scheduled_from')
+    if scheduled_from:
+        conditions.append("mr.scheduled_date >= %s")
+        params.append(scheduled_from)
+    scheduled_to = parse_date_arg(args, 'scheduled_to')
+    if scheduled_to:
+        conditions.append("mr.scheduled_date <= %s")
+        params.append(scheduled_to)
+    return conditions, params
+
+
+def request_list_query(args, lookahead=True):
+    """Requests newest first, keyset-paginated on (created_at, id) when limit/cursor are given"""
+    conditions, params = request_filters(args)
+    limit, cursor_key = parse_page_args(args)
+
+    page_conditions = list(conditions)
+    page_params = list(params)
+    if cursor_key:
+        condition, condition_params = created_keyset_condition(cursor_key)
+        page_conditions.append(condition)
+        page_params.extend(condition_params)
+
+    sql = f"{repository.REQUEST_SELECT} {where_clause(page_conditions)} {repository.REQUEST_ORDER}"
+    if limit:
+        sql += " LIMIT %s"
+        page_params.append(limit + 1 if lookahead else limit)
+    count_sql = f"SELECT COUNT(*) FROM maintenance_requests mr {where_clause(conditions)}"
+    return ListQuery(sql, page_params, limit, count_sql, params)
+
+
+def kanban_column_query(status, limit, cursor_key=None):
+    """Newest-first page of one column, served from idx_requests_status_created"""
+    conditions = ["mr.status = %s"]
+    params = [status]
+    if cursor_key:
+        condition, condition_params = created_keyset_condition(cursor_key)
+        conditions.append(condition)
+        params.extend(condition_params)
+    params.append(limit + 1)
+    sql = f"({repository.REQUEST_SELECT} {where_clause(conditions)} {repository.REQUEST_ORDER} LIMIT %s)"
+    return sql, params
+
+
+def kanban_limit(args):
+    limit = parse_int_arg(args, 'limit') or KANBAN_PAGE_SIZE
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise QueryArgError(f'limit must be between 1 and {MAX_PAGE_SIZE}')
+    return limit
+
+
+def kanban_column_status(args):
+    """The single column requested with ?status=, or None for the whole board"""
+    status = args.get('status')
+    if status is not None and status not in REQUEST_STATUSES:
+        raise QueryArgError(f'Invalid status: {status}')
+    return status
+
+
+def kanban_board_query(limit):
+    """One indexed LIMIT query per column, sent as a single UNION ALL"""
+    parts = [kanban_column_query(column, limit) for column in REQUEST_STATUSES]
+    sql = '\nUNION ALL\n'.join(part_sql for part_sql, _ in parts)
+    params = [param for _, part_params in parts for param in part_params]
+    return sql, tuple(params)
+
+
+def kanban_board(rows, limit, status_counts=None):
+    """Group board rows by status; with status_counts add 'counts' and 'next_cursors'"""
+    grouped = {column: [] for column in REQUEST_STATUSES}
+    for req in rows:
+        grouped[req['status']].append(req)
+
+    kanban_data = {}
+    next_cursors = {}
+    for column, cards in grouped.items():
+        page = paginated_response(cards, limit, ('created_at', 'id'))
+        kanban_data[column] = page['items']
+        next_cursors[column] = page['next_cursor']
+
+    if status_counts is not None:
+        counts = dict.fromkeys(REQUEST_STATUSES, 0)
+        for row_status, count in status_counts:
+            if row_status in counts:
+                counts[row_status] = count
+        kanban_data['counts'] = counts
+        kanban_data['next_cursors'] = next_cursors
+    return kanban_data
+
+
+def calendar_query(args):
+    """Preventive requests scheduled in [start, end), a range scan on idx_requests_type_scheduled"""
+    conditions = ["mr.request_type = 'Preventive'", "mr.scheduled_date IS NOT NULL"]
+    params = []
+    start = parse_date_arg(args, 'start')
+    if start:
+        conditions.append("mr.scheduled_date >= %s")
+        params.append(start)
+    end = parse_date_arg(args, 'end')
+    if end:
+        conditions.append("mr.scheduled_date < %s")
+        params.append(end)
+    if start and end and end <= start:
+        raise QueryArgError('end must be after start')
+    sql = f"{repository.CALENDAR_SELECT} {where_clause(conditions)} ORDER BY mr.scheduled_date"
+    return sql, tuple(params)
+
+
+def parse_id_list(value, max_ids):
+    """Integer ids from a comma-separated argument"""
+    try:
+        ids = [int(i) for i in (value or '').split(',') if i.strip()]
+    except ValueError:
+        raise QueryArgError('ids must be a comma-separated list of integers')
+    if len(ids) > max_ids:
+        raise QueryArgError(f'At most {max_ids} ids per request')
+    return ids
+
+
+def open_request_counts_query(ids):
+    """Open request counts per equipment id for a batch of ids"""
+    placeholders = ', '.join(['%s'] * len(ids))
+    sql = f"""
+        SELECT equipment_id, COUNT(*) FROM maintenance_requests
+        WHERE equipment_id IN ({placeholders}) AND status IN ('New', 'In Progress')
+        GROUP BY equipment_id
+    """
+    return sql, tuple(ids)
+
+
+# ---- maintenance plans ----
+
+def plan_list_query(args):
+    """Maintenance plans ordered by next due date; filters: equipment_id, active"""
+    conditions, params = [], []
+    equipment_id = parse_int_arg(args, 'equipment_id')
+    if equipment_id is not None:
+        conditions.append('p.equipment_id = %s')
+        params.append(equipment_id)
+    if args.get('active') not in (None, ''):
+        conditions.append('p.active = %s')
+        params.append(parse_flag_arg(args, 'active'))
+    return f"{repository.PLAN_SELECT} {where_clause(conditions)} ORDER BY p.next_due, p.id", tuple(params)
+
+
+EXPORT_FORMATS = ('csv', 'ndjson')
+
+
+def parse_export_format(args):
+    """'csv' (the default) or 'ndjson' from the ?format= argument"""
+    export_format = args.get('format') or 'csv'
+    if export_format not in EXPORT_FORMATS:
+        raise QueryArgError(f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+    return export_format
+
+
+def export_query(kind, args):
+    """Every equipment record or request matching the list filters, in id order.
+
+    Primary key order walks the clustered index, so the export is a single
+    range scan the server can start sending immediately.
+    """
+    if kind == 'equipment':
+        conditions, params = equipment_filters(args)
+        sql = f"{repository.EQUIPMENT_SELECT} {where_clause(conditions)} ORDER BY e.id"
+    else:
+        conditions, params = request_filters(args)
+        sql = f"{repository.REQUEST_SELECT} {where_clause(conditions)} ORDER BY mr.id"
+    return sql, tuple(params)
+
+
+# ---- search ----
+
+SEARCH_TYPES = ('equipment', 'requests')
+SEARCH_DEFAULT_LIMIT = 10
+SEARCH_MAX_LIMIT = 50
+SEARCH_MAX_LENGTH = 100
+# innodb_ft_min_token_size: shorter words are not in the FULLTEXT indexes
+FULLTEXT_MIN_WORD = 3
+
+# Must match the FULLTEXT index columns (migration 0006)
+EQUIPMENT_SEARCH_COLUMNS = 'name, serial_number, location, department, assigned_employee'
+EQUIPMENT_SEARCH_FIELDS = ('id, name, serial_number, department, location, assigned_employee, warranty_end, '
+                           'maintenance_team_id, is_scrapped')
+
+_WORD = re.compile(r'[^\W_]+')
+
+
+def parse_search_args(args):
+    """(q, types, limit) of a search request"""
+    q = (args.get('q') or '').strip()
+    if not q:
+        raise QueryArgError('q is required')
+    if len(q) > SEARCH_MAX_LENGTH:
+        raise QueryArgError(f'q must be at most {SEARCH_MAX_LENGTH} characters')
+    types = parse_list_arg(args, 'types', SEARCH_TYPES) or list(SEARCH_TYPES)
+    limit = parse_int_arg(args, 'limit')
+    if limit is None:
+        limit = SEARCH_DEFAULT_LIMIT
+    if not 1 <= limit <= SEARCH_MAX_LIMIT:
+        raise QueryArgError(f'limit must be between 1 and {SEARCH_MAX_LIMIT}')
+    return q, types, limit
+
+
+def fulltext_terms(q):
+    """BOOLEAN MODE query requiring every indexable word of q as a prefix, or None if q has none"""
+    words = [word for word in _WORD.findall(q.lower()) if len(word) >= FULLTEXT_MIN_WORD]
+    return ' '.join(f'+{word}*' for word in words) if words else None
+
+
+def like_prefix(q):
+    """LIKE pattern matching values that start with q"""
+    return q.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+
+def search_queries(q, types, limit):
+    """{type: (sql, params) or None} for the requested search types.
+
+    Equipment is matched through its FULLTEXT index, with values that
+    start with q (name or serial number) ranked first. Queries without a
+    word of FULLTEXT_MIN_WORD characters, typically the first keystrokes,
+    fall back to name/serial prefix lookups on their B-tree indexes.
+    Request subjects need such a word (None otherwise); they are ranked by
+    relevance alone so InnoDB can stop after the top rows.
+    """
+    terms = fulltext_terms(q)
+    prefix = like_prefix(q)
+    queries = {}
+    if 'equipment' in types:
+        if terms:
+            queries['equipment'] = (f"""
+                SELECT {EQUIPMENT_SEARCH_FIELDS},
+                       MATCH({EQUIPMENT_SEARCH_COLUMNS}) AGAINST (%s IN BOOLEAN MODE)
+                       + 2 * (name LIKE %s) + 2 * (serial_number LIKE %s) AS score
+                FROM equipment
+                WHERE MATCH({EQUIPMENT_SEARCH_COLUMNS}) AGAINST (%s IN BOOLEAN MODE)
+                ORDER BY score DESC, name, id
+                LIMIT %s
+            """, (terms, prefix, prefix, terms, limit))
+        else:
+            queries['equipment'] = (f"""
+                SELECT * FROM (
+                    (SELECT {EQUIPMENT_SEARCH_FIELDS}, 1 AS score FROM equipment
+                     WHERE name LIKE %s ORDER BY name, id LIMIT %s)
+                    UNION
+                    (SELECT {EQUIPMENT_SEARCH_FIELDS}, 1 AS score FROM equipment
+                     WHERE serial_number LIKE %s ORDER BY serial_number LIMIT %s)
+                ) matches
+                ORDER BY name, id
+                LIMIT %s
+            """, (prefix, limit, prefix, limit, limit))
+    if 'requests' in types:
+        queries['requests'] = None
+        if terms:
+            queries['requests'] = ("""
+                SELECT mr.id, mr.subject, mr.status, mr.request_type, mr.equipment_id, mr.created_at,
+                       e.name as equipment_name, mr.score
+                FROM (
+                    SELECT id, subject, status, request_type, equipment_id, created_at,
+                           MATCH(subject) AGAINST (%s IN BOOLEAN MODE) AS score
+                    FROM maintenance_requests
+                    WHERE MATCH(subject) AGAINST (%s IN BOOLEAN MODE)
+                    ORDER BY score DESC
+                    LIMIT %s
+                ) mr
+                LEFT JOIN equipment e ON mr.equipment_id = e.id
+                ORDER BY mr.score DESC, mr.created_at DESC, mr.id DESC
+            """, (terms, terms, limit))
+    return queries
+
+# ---- bootstrap ----
+
+# Columns each bootstrap lookup list may project, and the defaults the
+# Kanban page needs (ids plus what its dropdowns and card names show)
+BOOTSTRAP_LISTS = {
+    'equipment': {
+        'table': 'equipment',
+        'order': 'name, id',
+        'columns': ('id', 'name', 'serial_number', 'department', 'assigned_employee', 'location',
+                    'purchase_date', 'warranty_end', 'maintenance_team_id', 'is_scrapped'),
+        'default': ('id', 'name', 'serial_number', 'maintenance_team_id', 'is_scrapped'),
+    },
+    'teams': {
+        'table': 'maintenance_teams',
+        'order': 'team_name',
+        'columns': ('id', 'team_name', 'description', 'created_at'),
+        'default': ('id', 'team_name'),
+    },
+    'technicians': {
+        'table': 'technicians',
+        'order': 'name, id',
+        'columns': ('id', 'name', 'email', 'team_id'),
+        'default': ('id', 'name', 'team_id'),
+    },
+}
+
+
+def parse_fields_arg(args):
+    """{list name: column tuple} from ?fields=equipment.name,teams.team_name,...
+
+    Lists not named in the argument keep their default columns; 'id' is
+    always included so the client can key the rows.
+    """
+    requested = {}
+    for item in parse_list_arg(args, 'fields'):
+        name, _, column = item.partition('.')
+        spec = BOOTSTRAP_LISTS.get(name)
+        if spec is None:
+            raise QueryArgError(f"fields: unknown list '{name}' (use {', '.join(BOOTSTRAP_LISTS)})")
+        if column not in spec['columns']:
+            raise QueryArgError(f"fields: {name} has no field '{column}'")
+        requested.setdefault(name, ['id'])
+        if column not in requested[name]:
+            requested[name].append(column)
+    return {name: tuple(requested.get(name, spec['default'])) for name, spec in BOOTSTRAP_LISTS.items()}
+
+
+def bootstrap_lookup_query(name, columns):
+    """SELECT of just the projected columns of one lookup list"""
+    spec = BOOTSTRAP_LISTS[name]
+    return f"SELECT {', '.join(columns)} FROM {spec['table']} ORDER BY {spec['order']}"
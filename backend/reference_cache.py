@@ -0,0 +1,260 @@
+"""Read-through cache for slowly changing reference data (teams, technicians, lookups).
+
+Entries are grouped by namespace (e.g. 'teams', 'team_technicians') and
+keyed within it, so a write invalidates a whole namespace at once. Two
+backends share one interface:
+
+- LocalBackend: in-process LRU with a per-entry TTL. Each worker keeps its
+  own copy, so another worker's invalidation only reaches it after the TTL.
+- RedisBackend: one hash per namespace on a Redis-compatible server
+  (Redis, Valkey, KeyDB, ...). Every worker reads the same entries and an
+  invalidation is seen by all of them immediately. Needs the optional
+  ``redis`` package.
+
+Keys are qualified with table versions (versioned_key). Reading those
+costs a query, so the cache also keeps a worker-wide copy of the version
+vector for REF_CACHE_VERSION_TTL seconds: a hit then costs no query, and
+another worker's write is seen at most that late. A local invalidate()
+drops the copy, so a worker always sees its own writes.
+
+``cache_from_env()`` picks the backend: REF_CACHE_URL=redis://... for the
+shared one, otherwise local. REF_CACHE_TTL and REF_CACHE_MAX_ENTRIES tune it.
+"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import redis
+except ImportError:  # optional, only needed for the shared backend
+    redis = None
+
+_MISSING = object()
+_FAILED = object()
+
+# Tables each namespace is read from; versioned_key qualifies keys with their versions
+REFERENCE_TABLES = {
+    'teams': ('maintenance_teams',),
+    'technicians': ('technicians', 'maintenance_teams'),
+    'team_technicians': ('technicians',),
+    'equipment_team': ('equipment',),
+}
+
+
+class LocalBackend:
+    """Thread-safe LRU of (namespace, key) -> value with a per-entry TTL"""
+
+    name = 'local'
+
+    def __init__(self, max_entries=1024, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.evictions = 0
+
+    def get(self, namespace, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get((namespace, key))
+            if entry is None:
+                return _MISSING
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._entries[(namespace, key)]
+                return _MISSING
+            self._entries.move_to_end((namespace, key))
+            return value
+
+    def set(self, namespace, key, value):
+        with self._lock:
+            self._entries[(namespace, key)] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end((namespace, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, namespace):
+        with self._lock:
+            for entry_key in [entry_key for entry_key in self._entries if entry_key[0] == namespace]:
+                del self._entries[entry_key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def size(self):
+        return len(self._entries)
+
+
+class RedisBackend:
+    """Namespaces stored as Redis hashes of key -> JSON [stored_at, value].
+
+    Eviction is left to the server's maxmemory policy; the TTL is enforced
+    per entry on read and per namespace with EXPIRE.
+    """
+
+    name = 'redis'
+
+    def __init__(self, url, ttl=300, prefix='gearguard:ref:'):
+        if redis is None:
+            raise RuntimeError('REF_CACHE_URL is set but the redis package is not installed')
+        self._client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+        self.evictions = 0
+
+    def get(self, namespace, key):
+        raw = self._client.hget(self.prefix + namespace, str(key))
+        if raw is None:
+            return _MISSING
+        stored_at, value = json.loads(raw)
+        if time.time() - stored_at > self.ttl:
+            return _MISSING
+        return value
+
+    def set(self, namespace, key, value):
+        name = self.prefix + namespace
+        pipe = self._client.pipeline()
+        pipe.hset(name, str(key), json.dumps([time.time(), value]))
+        pipe.expire(name, int(self.ttl))
+        pipe.execute()
+
+    def invalidate(self, namespace):
+        self._client.delete(self.prefix + namespace)
+
+    def clear(self):
+        keys = list(self._client.scan_iter(match=self.prefix + '*'))
+        if keys:
+            self._client.delete(*keys)
+
+    def size(self):
+        return sum(self._client.hlen(name) for name in self._client.scan_iter(match=self.prefix + '*'))
+
+
+class ReferenceCache:
+    """Read-through front for a backend, with hit/miss counters.
+
+    Values must be JSON-serializable (rows from repository.fetch_all are),
+    so both backends return the same thing. Backend failures fall through
+    to the loader: the cache is never a reason for a request to fail.
+    """
+
+    def __init__(self, backend, versions_ttl=1.0):
+        self.backend = backend
+        self.versions_ttl = versions_ttl
+        self._lock = threading.Lock()
+        self._versions = None
+        self._versions_expire = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.errors = 0
+
+    def table_versions(self):
+        """The worker-wide {table: version} copy, or None once it is versions_ttl old"""
+        with self._lock:
+            if self._versions is not None and time.monotonic() < self._versions_expire:
+                return self._versions
+        return None
+
+    def remember_versions(self, versions):
+        """Keep versions, just read from table_versions, as the worker-wide copy"""
+        with self._lock:
+            self._versions = versions
+            self._versions_expire = time.monotonic() + self.versions_ttl
+        return versions
+
+    def get(self, namespace, key, loader):
+        """Cached value for (namespace, key), calling loader() on a miss"""
+        value = self._lookup(namespace, key)
+        if value is _FAILED:
+            return loader()
+        if value is _MISSING:
+            value = loader()
+            self._store(namespace, key, value)
+        return value
+
+    async def get_async(self, namespace, key, loader):
+        """get() for an async loader: awaits loader() on a miss"""
+        value = self._lookup(namespace, key)
+        if value is _FAILED:
+            return await loader()
+        if value is _MISSING:
+            value = await loader()
+            self._store(namespace, key, value)
+        return value
+
+    def invalidate(self, *namespaces):
+        """Drop every entry in namespaces; call after the write commits"""
+        with self._lock:
+            self._versions = None
+        for namespace in namespaces:
+            try:
+                self.backend.invalidate(namespace)
+            except Exception as e:
+                self._count('errors')
+                print(f"Error invalidating reference cache: {e}")
+            self._count('invalidations')
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {
+                'backend': self.backend.name,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'invalidations': self.invalidations,
+                'evictions': self.backend.evictions,
+                'errors': self.errors,
+                'ttl': self.backend.ttl,
+            }
+        try:
+            stats['entries'] = self.backend.size()
+        except Exception:
+            stats['entries'] = None
+        return stats
+
+    def _lookup(self, namespace, key):
+        """Cached value, _MISSING on a miss or _FAILED when the backend errored"""
+        try:
+            value = self.backend.get(namespace, key)
+        except Exception as e:
+            self._count('errors')
+            print(f"Error reading reference cache: {e}")
+            return _FAILED
+        self._count('misses' if value is _MISSING else 'hits')
+        return value
+
+    def _store(self, namespace, key, value):
+        try:
+            self.backend.set(namespace, key, value)
+        except Exception as e:
+            self._count('errors')
+            print(f"Error writing reference cache: {e}")
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+
+def versioned_key(namespace, key, versions):
+    """key qualified with the namespace's table versions ({table: version})"""
+    return f"{key}@" + '.'.join(str(versions.get(table, 0)) for table in REFERENCE_TABLES[namespace])
+
+
+def cache_from_env():
+    """ReferenceCache configured from REF_CACHE_URL / REF_CACHE_TTL /
+    REF_CACHE_MAX_ENTRIES / REF_CACHE_VERSION_TTL"""
+    ttl = float(os.environ.get('REF_CACHE_TTL', 300))
+    versions_ttl = float(os.environ.get('REF_CACHE_VERSION_TTL', 1))
+    url = os.environ.get('REF_CACHE_URL')
+    if url:
+        return ReferenceCache(RedisBackend(url, ttl=ttl), versions_ttl)
+    return ReferenceCache(LocalBackend(int(os.environ.get('REF_CACHE_MAX_ENTRIES', 1024)), ttl=ttl), versions_ttl)
@@ -0,0 +1,231 @@
+"""SQL shapes used by the GearGuard API, each defined once.
+
+Fixed-shape statements run as server-side prepared statements cached on the
+pooled connection (see PooledConnection.prepared_cursor), so MySQL parses and
+plans them once per connection instead of once per request. Dynamic list
+queries (variable filters and IN lists) build on the same SELECT bases and
+use the text protocol.
+"""
+from serializers import row_serializer
+
+# ---- table_versions ----
+
+TABLE_VERSIONS = "SELECT table_name, version FROM table_versions"
+TABLE_VERSION_BUMP = "UPDATE table_versions SET version = version + 1 WHERE table_name = %s"
+
+# ---- maintenance_teams ----
+
+TEAM_SELECT = "SELECT id, team_name, description, created_at FROM maintenance_teams"
+TEAM_LIST = TEAM_SELECT + " ORDER BY team_name"
+TEAM_BY_ID = TEAM_SELECT + " WHERE id = %s"
+TEAM_INSERT = "INSERT INTO maintenance_teams (team_name, description) VALUES (%s, %s)"
+
+# ---- technicians ----
+
+TECHNICIAN_SELECT = """
+    SELECT t.id, t.name, t.email, t.team_id, mt.team_name
+    FROM technicians t
+    LEFT JOIN maintenance_teams mt ON t.team_id = mt.id
+"""
+TECHNICIAN_LIST = TECHNICIAN_SELECT + " ORDER BY t.name"
+TECHNICIAN_BY_ID = TECHNICIAN_SELECT + " WHERE t.id = %s"
+TEAM_TECHNICIANS = "SELECT id, name, email, team_id FROM technicians WHERE team_id = %s ORDER BY name"
+TECHNICIAN_INSERT = "INSERT INTO technicians (name, email, team_id) VALUES (%s, %s, %s)"
+
+# ---- equipment ----
+
+EQUIPMENT_COLUMNS = """
+    e.id, e.name, e.serial_number, e.department, e.assigned_employee,
+    e.location, e.purchase_date, e.warranty_end, e.maintenance_team_id,
+    e.is_scrapped, mt.team_name
+"""
+EQUIPMENT_SELECT = f"""
+    SELECT {EQUIPMENT_COLUMNS}
+    FROM equipment e
+    LEFT JOIN maintenance_teams mt ON e.maintenance_team_id = mt.id
+"""
+# The correlated count is resolved from idx_requests_equipment_status for the
+# returned rows only, so paging does not scan all requests.
+EQUIPMENT_LIST_SELECT = f"""
+    SELECT {EQUIPMENT_COLUMNS},
+           (SELECT COUNT(*) FROM maintenance_requests mr
+            WHERE mr.equipment_id = e.id AND mr.status IN ('New', 'In Progress')) as open_request_count
+    FROM equipment e
+    LEFT JOIN maintenance_teams mt ON e.maintenance_team_id = mt.id
+"""
+EQUIPMENT_BY_ID = EQUIPMENT_SELECT + " WHERE e.id = %s"
+# TINYINT(1) columns of equipment rows, returned as booleans (pass as booleans=)
+EQUIPMENT_BOOLEANS = frozenset({'is_scrapped'})
+EQUIPMENT_TEAM = "SELECT maintenance_team_id FROM equipment WHERE id = %s"
+EQUIPMENT_OPEN_COUNT = """
+    SELECT COUNT(*) FROM maintenance_requests
+    WHERE equipment_id = %s AND status IN ('New', 'In Progress')
+"""
+# Written columns, in statement parameter order
+EQUIPMENT_FIELDS = ('name', 'serial_number', 'department', 'assigned_employee', 'location',
+                    'purchase_date', 'warranty_end', 'maintenance_team_id', 'is_scrapped')
+EQUIPMENT_INSERT = """
+    INSERT INTO equipment (name, serial_number, department, assigned_employee,
+                           location, purchase_date, warranty_end, maintenance_team_id, is_scrapped)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+# Bulk inserts tag their rows with a batch key and read the new ids back by it
+EQUIPMENT_BULK_INSERT = """
+    INSERT INTO equipment (name, serial_number, department, assigned_employee,
+                           location, purchase_date, warranty_end, maintenance_team_id, is_scrapped, batch_key)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+EQUIPMENT_IDS_BY_BATCH = "SELECT id FROM equipment WHERE batch_key = %s ORDER BY id"
+EQUIPMENT_UPDATE = """
+    UPDATE equipment
+    SET name = %s, serial_number = %s, department = %s, assigned_employee = %s,
+        location = %s, purchase_date = %s, warranty_end = %s,
+        maintenance_team_id = %s, is_scrapped = %s
+    WHERE id = %s
+"""
+
+# ---- maintenance_requests ----
+
+REQUEST_SELECT = """
+    SELECT mr.id, mr.subject, mr.equipment_id, mr.team_id, mr.technician_id,
+           mr.request_type, mr.scheduled_date, mr.duration_hours, mr.status,
+           mr.created_at, mr.updated_at,
+           e.name as equipment_name, e.serial_number,
+           mt.team_name,
+           t.name as technician_name, t.email as technician_email
+    FROM maintenance_requests mr
+    LEFT JOIN equipment e ON mr.equipment_id = e.id
+    LEFT JOIN maintenance_teams mt ON mr.team_id = mt.id
+    LEFT JOIN technicians t ON mr.technician_id = t.id
+"""
+REQUEST_BY_ID = REQUEST_SELECT + " WHERE mr.id = %s"
+REQUEST_ORDER = " ORDER BY mr.created_at DESC, mr.id DESC"
+REQUEST_STATUS_COUNTS = "SELECT status, COUNT(*) FROM maintenance_requests GROUP BY status"
+REQUEST_STATE = "SELECT status, equipment_id FROM maintenance_requests WHERE id = %s"
+# Movable backlog of a team for rebalancing, newest first
+TEAM_NEW_BACKLOG = """
+    SELECT id, technician_id, scheduled_date, duration_hours FROM maintenance_requests
+    WHERE team_id = %s AND status = 'New'
+    ORDER BY created_at DESC, id DESC
+"""
+REQUEST_FIELDS = ('subject', 'equipment_id', 'team_id', 'technician_id',
+                  'request_type', 'scheduled_date', 'duration_hours', 'status')
+REQUEST_INSERT = """
+    INSERT INTO maintenance_requests (subject, equipment_id, team_id, technician_id,
+                                      request_type, scheduled_date, duration_hours, status)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+"""
+REQUEST_BULK_INSERT = """
+    INSERT INTO maintenance_requests (subject, equipment_id, team_id, technician_id,
+                                      request_type, scheduled_date, duration_hours, status, batch_key)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+REQUEST_IDS_BY_BATCH = "SELECT id FROM maintenance_requests WHERE batch_key = %s ORDER BY id"
+REQUEST_UPDATE_FIELDS = ('subject', 'technician_id', 'scheduled_date', 'duration_hours', 'status')
+REQUEST_UPDATE = """
+    UPDATE maintenance_requests
+    SET subject = %s, technician_id = %s, scheduled_date = %s,
+        duration_hours = %s, status = %s
+    WHERE id = %s
+"""
+REQUEST_SCRAP_EQUIPMENT = """
+    UPDATE equipment e
+    INNER JOIN maintenance_requests mr ON e.id = mr.equipment_id
+    SET e.is_scrapped = TRUE
+    WHERE mr.id = %s
+"""
+CALENDAR_SELECT = """
+    SELECT mr.id, mr.subject, mr.equipment_id, mr.team_id, mr.technician_id,
+           mr.request_type, mr.scheduled_date, mr.duration_hours, mr.status,
+           mr.created_at,
+           e.name as equipment_name,
+           t.name as technician_name
+    FROM maintenance_requests mr
+    LEFT JOIN equipment e ON mr.equipment_id = e.id
+    LEFT JOIN technicians t ON mr.technician_id = t.id
+"""
+
+PLAN_SELECT = """
+    SELECT p.id, p.equipment_id, p.subject, p.interval_days, p.interval_hours,
+           p.run_hours_per_day, p.team_id, p.technician_id, p.duration_hours,
+           p.next_due, p.active, p.created_at, p.updated_at,
+           e.name as equipment_name,
+           mt.team_name,
+           t.name as technician_name
+    FROM maintenance_plans p
+    LEFT JOIN equipment e ON p.equipment_id = e.id
+    LEFT JOIN maintenance_teams mt ON p.team_id = mt.id
+    LEFT JOIN technicians t ON p.technician_id = t.id
+"""
+PLAN_BY_ID = PLAN_SELECT + " WHERE p.id = %s"
+PLAN_BOOLEANS = frozenset({'active'})
+PLAN_FIELDS = ('equipment_id', 'subject', 'interval_days', 'interval_hours', 'run_hours_per_day',
+               'team_id', 'technician_id', 'duration_hours', 'next_due', 'active')
+PLAN_INSERT = """
+    INSERT INTO maintenance_plans (equipment_id, subject, interval_days, interval_hours, run_hours_per_day,
+                                   team_id, technician_id, duration_hours, next_due, active)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+PLAN_UPDATE = """
+    UPDATE maintenance_plans
+    SET equipment_id = %s, subject = %s, interval_days = %s, interval_hours = %s, run_hours_per_day = %s,
+        team_id = %s, technician_id = %s, duration_hours = %s, next_due = %s, active = %s
+    WHERE id = %s
+"""
+
+
+def _cursor(connection, sql, prepared):
+    return connection.prepared_cursor(sql) if prepared else connection.cursor()
+
+
+def fetch_all(connection, sql, params=(), prepared=True, booleans=()):
+    """Run a SELECT and return its rows as dicts; booleans: its TINYINT(1) columns"""
+    cursor = _cursor(connection, sql, prepared)
+    try:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+        serialize = row_serializer(cursor, booleans)
+        return [serialize(row) for row in rows]
+    finally:
+        if not prepared:
+            cursor.close()
+
+
+def fetch_one(connection, sql, params=(), prepared=True, booleans=()):
+    """Run a SELECT and return its first row as a dict, or None"""
+    cursor = _cursor(connection, sql, prepared)
+    try:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+        return row_serializer(cursor, booleans)(rows[0]) if rows else None
+    finally:
+        if not prepared:
+            cursor.close()
+
+
+def fetch_raw(connection, sql, params=(), prepared=True):
+    """Run a SELECT and return its rows as tuples"""
+    cursor = _cursor(connection, sql, prepared)
+    try:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+    finally:
+        if not prepared:
+            cursor.close()
+
+
+def execute(connection, sql, params=(), prepared=True):
+    """Run a write statement and return the new row id (if any)"""
+    cursor = _cursor(connection, sql, prepared)
+    try:
+        cursor.execute(sql, params)
+        return cursor.lastrowid
+    finally:
+        if not prepared:
+            cursor.close()
+
+
+def values(data, fields, defaults=None):
+    """Statement parameters for fields, taken from a request body"""
+    defaults = defaults or {}
+    return tuple(data.get(field, defaults.get(field)) for field in fields)
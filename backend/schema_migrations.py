@@ -0,0 +1,212 @@
+"""Versioned schema migrations for the GearGuard database.
+
+Migrations live in ``migrations/`` as ``NNNN_description.py`` modules, each
+with an ``upgrade(cursor)`` function, and are applied in version order. The
+``schema_version`` table records every applied version, so a process start
+costs a single ``SELECT MAX(version)`` when the schema is current.
+
+MySQL commits DDL implicitly, so each migration is recorded (and committed)
+as soon as it has run; a failed migration stops the run and is retried from
+that version next time. Migrations should be idempotent where they can be.
+
+    cd backend && python schema_migrations.py status
+    cd backend && python schema_migrations.py upgrade [--to N]
+    cd backend && python schema_migrations.py new add_some_index
+"""
+import argparse
+import importlib
+import os
+import re
+
+from mysql.connector import Error
+
+MIGRATIONS_PACKAGE = 'migrations'
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), MIGRATIONS_PACKAGE)
+_FILENAME = re.compile(r'^(\d{4})_(\w+)\.py$')
+
+# Named MySQL lock serializing migration runs across processes and hosts
+LOCK_NAME = 'gearguard_schema'
+LOCK_TIMEOUT = 60
+
+
+class MigrationError(Exception):
+    """Raised when the migrations cannot be loaded or applied"""
+
+
+class Migration:
+    __slots__ = ('version', 'name', 'module')
+
+    def __init__(self, version, name, module):
+        self.version = version
+        self.name = name
+        self.module = module
+
+
+def discover():
+    """All migrations in MIGRATIONS_DIR, ordered by version"""
+    migrations = []
+    seen = {}
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        match = _FILENAME.match(filename)
+        if not match:
+            continue
+        version = int(match.group(1))
+        if version in seen:
+            raise MigrationError(f'Duplicate migration version {version}: {seen[version]} and {filename}')
+        seen[version] = filename
+        module = importlib.import_module(f'{MIGRATIONS_PACKAGE}.{filename[:-3]}')
+        if not callable(getattr(module, 'upgrade', None)):
+            raise MigrationError(f'{filename} has no upgrade(cursor) function')
+        migrations.append(Migration(version, match.group(2), module))
+    return migrations
+
+
+def latest_version():
+    migrations = discover()
+    return migrations[-1].version if migrations else 0
+
+
+def ensure_index(cursor, table, index_name, index_columns, unique=False, fulltext=False):
+    """Create an index unless it already exists, without blocking writes.
+
+    MySQL has no CREATE INDEX IF NOT EXISTS; ALGORITHM=INPLACE, LOCK=NONE
+    builds the index online so concurrent DML on the table keeps running.
+    FULLTEXT indexes cannot be built with LOCK=NONE: reads continue but
+    writes wait (LOCK=SHARED) while they build.
+    """
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+    """, (table, index_name))
+    if cursor.fetchone()[0] == 0:
+        kind = 'FULLTEXT INDEX' if fulltext else 'UNIQUE INDEX' if unique else 'INDEX'
+        lock = 'SHARED' if fulltext else 'NONE'
+        cursor.execute(
+            f"CREATE {kind} {index_name} ON {table} ({index_columns}) ALGORITHM=INPLACE LOCK={lock}"
+        )
+
+
+def _ensure_version_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INT PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def current_version(cursor):
+    """Highest applied version, or 0 for a database without schema_version"""
+    try:
+        cursor.execute("SELECT MAX(version) FROM schema_version")
+    except Error as e:
+        if e.errno == 1146:  # ER_NO_SUCH_TABLE
+            return 0
+        raise
+    return cursor.fetchone()[0] or 0
+
+
+def applied(cursor):
+    """(version, name, applied_at) rows, oldest first"""
+    try:
+        cursor.execute("SELECT version, name, applied_at FROM schema_version ORDER BY version")
+    except Error as e:
+        if e.errno == 1146:
+            return []
+        raise
+    return cursor.fetchall()
+
+
+def migrate(connection, target=None):
+    """Apply pending migrations up to target (default: latest); return the versions applied.
+
+    The version check runs first without the lock, so an up-to-date
+    database costs one query. Otherwise the run holds LOCK_NAME and
+    re-reads the version, so concurrent starters apply each migration once.
+    """
+    migrations = discover()
+    if target is None:
+        target = migrations[-1].version if migrations else 0
+
+    cursor = connection.cursor()
+    try:
+        if current_version(cursor) >= target:
+            return []
+
+        cursor.execute("SELECT GET_LOCK(%s, %s)", (LOCK_NAME, LOCK_TIMEOUT))
+        if cursor.fetchone()[0] != 1:
+            raise MigrationError('Timed out waiting for the schema lock')
+        try:
+            _ensure_version_table(cursor)
+            version = current_version(cursor)
+            done = []
+            for migration in migrations:
+                if migration.version <= version or migration.version > target:
+                    continue
+                print(f"Applying migration {migration.version:04d}_{migration.name}")
+                try:
+                    migration.module.upgrade(cursor)
+                    cursor.execute(
+                        "INSERT INTO schema_version (version, name) VALUES (%s, %s)",
+                        (migration.version, migration.name)
+                    )
+                    connection.commit()
+                except Error as e:
+                    connection.rollback()
+                    raise MigrationError(f'Migration {migration.version:04d}_{migration.name} failed: {e}') from e
+                done.append(migration.version)
+            return done
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+            cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+def new_migration(name):
+    """Create the next NNNN_name.py file and return its path"""
+    if not re.match(r'^\w+$', name):
+        raise MigrationError('Migration names may only contain letters, digits and underscores')
+    path = os.path.join(MIGRATIONS_DIR, f'{latest_version() + 1:04d}_{name}.py')
+    with open(path, 'x') as f:
+        f.write(f'"""{name.replace("_", " ").capitalize()}."""\n\n\ndef upgrade(cursor):\n    pass\n')
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='GearGuard schema migrations')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('status', help='show applied and pending migrations')
+    upgrade = commands.add_parser('upgrade', help='apply pending migrations')
+    upgrade.add_argument('--to', type=int, help='stop after this version')
+    new = commands.add_parser('new', help='create an empty migration file')
+    new.add_argument('name')
+    args = parser.parse_args()
+
+    if args.command == 'new':
+        print(new_migration(args.name))
+        return
+
+    from flask_server import PoolError, get_db_connection
+    try:
+        connection = get_db_connection()
+    except PoolError as e:
+        raise SystemExit(f"Error connecting to MySQL: {e}")
+    with connection:
+        if args.command == 'upgrade':
+            done = migrate(connection, args.to)
+            print(f"Applied {len(done)} migration(s)" if done else "Schema is up to date")
+            return
+        cursor = connection.cursor()
+        try:
+            done = {version: applied_at for version, _, applied_at in applied(cursor)}
+        finally:
+            cursor.close()
+    for migration in discover():
+        state = f"applied {done[migration.version]}" if migration.version in done else "pending"
+        print(f"{migration.version:04d}_{migration.name}: {state}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""Row serialization compiled once per query shape, plus a fast JSON provider."""
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from flask.json.provider import DefaultJSONProvider
+from mysql.connector.constants import FieldType
+
+try:
+    import orjson
+except ImportError:  # optional, falls back to the stdlib encoder
+    orjson = None
+
+_TEMPORAL_TYPES = frozenset({
+    FieldType.DATE, FieldType.NEWDATE, FieldType.DATETIME, FieldType.TIMESTAMP
+})
+_DECIMAL_TYPES = frozenset({FieldType.DECIMAL, FieldType.NEWDECIMAL})
+
+_serializers = {}
+
+
+def _isoformat(value):
+    return value.isoformat()
+
+
+def _is_boolean(column, booleans):
+    """TINYINT(1), going by the reported column length or, for drivers that
+    leave it out (mysql-connector), by the query's own booleans"""
+    if column[1] != FieldType.TINY:
+        return False
+    length = column[3] if len(column) > 3 else None
+    return length == 1 if length is not None else column[0] in booleans
+
+
+def _converter(column, booleans):
+    type_code = column[1]
+    if _is_boolean(column, booleans):
+        return bool
+    if type_code in _TEMPORAL_TYPES:
+        return _isoformat
+    if type_code in _DECIMAL_TYPES:
+        return float
+    if type_code == FieldType.TIME:
+        return str
+    return None
+
+
+def compile_serializer(description, booleans=()):
+    """Build a row -> dict function for a cursor.description.
+
+    Column names come from the description (so SQL aliases are the keys) and
+    the per-column converters are chosen once; the returned function does a
+    zip() plus a conversion for the few columns that need one. booleans
+    names the query's TINYINT(1) columns for drivers whose description has
+    no column length (see repository.EQUIPMENT_BOOLEANS).
+    """
+    names = tuple(column[0] for column in description)
+    conversions = tuple(
+        (name, converter)
+        for name, converter in ((column[0], _converter(column, booleans)) for column in description)
+        if converter is not None
+    )
+
+    if not conversions:
+        def serialize(row):
+            return dict(zip(names, row))
+        return serialize
+
+    def serialize(row):
+        result = dict(zip(names, row))
+        for name, convert in conversions:
+            value = result[name]
+            if value is not None:
+                result[name] = convert(value)
+        return result
+    return serialize
+
+
+def row_serializer(cursor, booleans=()):
+    """Cached serializer for the result set currently open on cursor"""
+    description = cursor.description
+    booleans = frozenset(booleans)
+    key = (tuple((column[0], column[1], column[3] if len(column) > 3 else None) for column in description),
+           booleans)
+    serialize = _serializers.get(key)
+    if serialize is None:
+        serialize = _serializers[key] = compile_serializer(description, booleans)
+    return serialize
+
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, timedelta):
+        return str(value)
+    return DefaultJSONProvider.default(value)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson when it is installed"""
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None:
+            kwargs.setdefault('default', _default)
+            return super().dumps(obj, **kwargs)
+        option = orjson.OPT_NON_STR_KEYS
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=_default, option=option).decode()
@@ -1,14 +1,22 @@
-from fastapi import FastAPI, APIRouter
+from fastapi import FastAPI, APIRouter, Query
+from fastapi.responses import StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+from pymongo.errors import DuplicateKeyError
+import asyncio
+import json
 import os
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict
-from typing import List
+from typing import List, Optional, Union
 import uuid
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+
+import gearguard_async
+from query_args import QueryArgError, decode_cursor, encode_cursor
 
 
 ROOT_DIR = Path(__file__).parent
@@ -16,9 +24,18 @@ load_dotenv(ROOT_DIR / '.env')
 
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+# tz_aware: BSON dates come back as UTC datetimes, not naive ones
+client = AsyncIOMotorClient(mongo_url, tz_aware=True)
 db = client[os.environ['DB_NAME']]
 
+# Status check list pages and ingest batches
+STATUS_PAGE_SIZE = 100
+MAX_STATUS_PAGE_SIZE = 1000
+MAX_STATUS_BATCH = 1000
+# Heartbeats are buffered and written with one insert_many per flush
+STATUS_FLUSH_SIZE = int(os.environ.get('STATUS_FLUSH_SIZE', 500))
+STATUS_FLUSH_INTERVAL = float(os.environ.get('STATUS_FLUSH_INTERVAL', 1.0))
+
 # Create the main app without a prefix
 app = FastAPI()
 
@@ -37,6 +54,186 @@ class StatusCheck(BaseModel):
 class StatusCheckCreate(BaseModel):
     client_name: str
 
+class StatusCheckPage(BaseModel):
+    items: List[StatusCheck]
+    next_cursor: Optional[str] = None
+
+
+class StatusBuffer:
+    """Collects status documents and writes them with insert_many.
+
+    A flush happens when STATUS_FLUSH_SIZE documents are pending or every
+    STATUS_FLUSH_INTERVAL seconds, whichever comes first. Buffered documents
+    are lost if the process dies before the next flush.
+    """
+
+    def __init__(self, collection, max_size, interval):
+        self.collection = collection
+        self.max_size = max_size
+        self.interval = interval
+        self._pending = []
+        self._task = None
+        # Held for the whole insert_many, so stop() never cancels one midway
+        self._lock = asyncio.Lock()
+
+    async def add(self, doc):
+        self._pending.append(doc)
+        if len(self._pending) >= self.max_size:
+            await self.flush()
+
+    async def flush(self):
+        async with self._lock:
+            docs, self._pending = self._pending, []
+            if not docs:
+                return
+            try:
+                await self.collection.insert_many(docs, ordered=False)
+            except Exception:
+                logger.exception("Failed to write %d buffered status checks", len(docs))
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flush loop once any in-flight insert_many is done, then write what is left"""
+        task, self._task = self._task, None
+        if task is not None:
+            async with self._lock:
+                task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+
+status_buffer = StatusBuffer(db.status_checks, STATUS_FLUSH_SIZE, STATUS_FLUSH_INTERVAL)
+
+
+async def ensure_status_indexes():
+    # Newest-first listing, optionally narrowed to one client; id breaks timestamp ties
+    await db.status_checks.create_index([("timestamp", DESCENDING), ("id", DESCENDING)])
+    await db.status_checks.create_index(
+        [("client_name", ASCENDING), ("timestamp", DESCENDING), ("id", DESCENDING)]
+    )
+
+
+async def convert_string_timestamps(batch_size=1000):
+    """One-off rewrite of ISO string timestamps (older documents) to BSON dates"""
+    updates = []
+    async for doc in db.status_checks.find({"timestamp": {"$type": "string"}}, {"timestamp": 1}):
+        updates.append(UpdateOne(
+            {"_id": doc["_id"]}, {"$set": {"timestamp": datetime.fromisoformat(doc["timestamp"])}}
+        ))
+        if len(updates) >= batch_size:
+            await db.status_checks.bulk_write(updates, ordered=False)
+            updates = []
+    if updates:
+        await db.status_checks.bulk_write(updates, ordered=False)
+
+
+# Run once per database, in order; add new steps at the end under a new name
+STATUS_MIGRATIONS = [
+    ('status_check_indexes', ensure_status_indexes),
+    ('status_check_timestamp_dates', convert_string_timestamps),
+]
+
+# A "running" claim older than this (seconds) belongs to a worker that died
+# mid-step and may be taken over; keep it above the slowest step's runtime
+STATUS_MIGRATION_LEASE = float(os.environ.get('STATUS_MIGRATION_LEASE', 600))
+
+
+async def claim_status_migration(name):
+    """Claim step name for this worker; None when another live worker holds it.
+
+    The claim is the step's _id in schema_migrations. A claim still
+    "running" after STATUS_MIGRATION_LEASE is stale and is taken over in
+    one conditional update, so only one waiting worker wins it.
+    """
+    now = datetime.now(timezone.utc)
+    claim = uuid.uuid4().hex
+    try:
+        await db.schema_migrations.insert_one(
+            {"_id": name, "state": "running", "claim": claim, "started_at": now}
+        )
+        return claim
+    except DuplicateKeyError:
+        pass
+    result = await db.schema_migrations.update_one(
+        {"_id": name, "state": "running",
+         "started_at": {"$lt": now - timedelta(seconds=STATUS_MIGRATION_LEASE)}},
+        {"$set": {"claim": claim, "started_at": now}}
+    )
+    if result.matched_count:
+        logger.warning("Taking over stale status migration claim %s", name)
+        return claim
+    return None
+
+
+async def migrate_status_checks():
+    """Apply the STATUS_MIGRATIONS not recorded in schema_migrations yet.
+
+    A worker claims a step before running it, so with several workers
+    starting at once exactly one runs it and the others go on serving. A
+    failed step drops its claim and is retried at the next startup; the
+    claim of a worker that died mid-step lapses after STATUS_MIGRATION_LEASE.
+    Steps are idempotent, so a taken-over step is simply run again.
+    """
+    for name, migration in STATUS_MIGRATIONS:
+        claim = await claim_status_migration(name)
+        if claim is None:
+            continue
+        try:
+            await migration()
+        except Exception:
+            await db.schema_migrations.delete_one({"_id": name, "claim": claim})
+            raise
+        await db.schema_migrations.update_one(
+            {"_id": name, "claim": claim},
+            {"$set": {"state": "applied", "applied_at": datetime.now(timezone.utc)}}
+        )
+
+
+def status_document(status_obj):
+    # timestamp stays a datetime so it is stored as a BSON date
+    return status_obj.model_dump()
+
+
+def as_utc(value):
+    return value.replace(tzinfo=timezone.utc) if value is not None and value.tzinfo is None else value
+
+
+def status_query(client_name, since, until, cursor_key):
+    """Mongo filter for the status list; cursor_key is the (timestamp, id) of the last row seen"""
+    conditions = []
+    if client_name:
+        conditions.append({"client_name": client_name})
+    time_range = {}
+    if since:
+        time_range["$gte"] = as_utc(since)
+    if until:
+        time_range["$lt"] = as_utc(until)
+    if time_range:
+        conditions.append({"timestamp": time_range})
+    if cursor_key:
+        try:
+            last_timestamp = as_utc(datetime.fromisoformat(cursor_key[0]))
+            last_id = str(cursor_key[1])
+        except (TypeError, ValueError):
+            raise QueryArgError('Invalid cursor')
+        conditions.append({"$or": [
+            {"timestamp": {"$lt": last_timestamp}},
+            {"timestamp": last_timestamp, "id": {"$lt": last_id}},
+        ]})
+    if not conditions:
+        return {}
+    return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
 # Add your routes to the router instead of directly to app
 @api_router.get("/")
 async def root():
@@ -47,28 +244,69 @@ async def create_status_check(input: StatusCheckCreate):
     status_dict = input.model_dump()
     status_obj = StatusCheck(**status_dict)
     
-    # Convert to dict and serialize datetime to ISO string for MongoDB
-    doc = status_obj.model_dump()
-    doc['timestamp'] = doc['timestamp'].isoformat()
-    
-    _ = await db.status_checks.insert_one(doc)
+    _ = await db.status_checks.insert_one(status_document(status_obj))
     return status_obj
 
-@api_router.get("/status", response_model=List[StatusCheck])
-async def get_status_checks():
-    # Exclude MongoDB's _id field from the query results
-    status_checks = await db.status_checks.find({}, {"_id": 0}).to_list(1000)
-    
-    # Convert ISO string timestamps back to datetime objects
-    for check in status_checks:
-        if isinstance(check['timestamp'], str):
-            check['timestamp'] = datetime.fromisoformat(check['timestamp'])
-    
-    return status_checks
+@api_router.post("/status/batch", response_model=List[StatusCheck], status_code=201)
+async def create_status_checks(inputs: List[StatusCheckCreate]):
+    """Record many status checks with a single insert_many"""
+    if len(inputs) > MAX_STATUS_BATCH:
+        raise QueryArgError(f'At most {MAX_STATUS_BATCH} status checks per batch')
+    status_objs = [StatusCheck(**item.model_dump()) for item in inputs]
+    if status_objs:
+        await db.status_checks.insert_many([status_document(obj) for obj in status_objs], ordered=False)
+    return status_objs
+
+@api_router.post("/status/heartbeat", response_model=StatusCheck, status_code=202)
+async def record_heartbeat(input: StatusCheckCreate):
+    """Accept a status check for the next buffered insert_many (see StatusBuffer)"""
+    status_obj = StatusCheck(**input.model_dump())
+    await status_buffer.add(status_document(status_obj))
+    return status_obj
+
+@api_router.get("/status", response_model=Union[StatusCheckPage, List[StatusCheck]])
+async def get_status_checks(
+    client_name: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_STATUS_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    stream: Optional[str] = None,
+):
+    """Status checks newest first, served from the (client_name,) timestamp, id indexes.
+
+    With limit/cursor the result is a {'items', 'next_cursor'} page; with
+    ?stream=ndjson every match is streamed; otherwise the newest 1000 are
+    returned as a list.
+    """
+    cursor_key = decode_cursor(cursor)
+    query = status_query(client_name, since, until, cursor_key)
+    found = db.status_checks.find(query, {"_id": 0}).sort([("timestamp", DESCENDING), ("id", DESCENDING)])
+
+    if stream == 'ndjson':
+        async def generate():
+            async for doc in found.batch_size(STATUS_PAGE_SIZE):
+                doc['timestamp'] = doc['timestamp'].isoformat()
+                yield json.dumps(doc) + '\n'
+        return StreamingResponse(generate(), media_type='application/x-ndjson')
+
+    if limit is None and cursor_key is None:
+        return await found.limit(MAX_STATUS_PAGE_SIZE).to_list(MAX_STATUS_PAGE_SIZE)
+
+    limit = limit or STATUS_PAGE_SIZE
+    items = await found.limit(limit + 1).to_list(limit + 1)
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor([items[-1]['timestamp'], items[-1]['id']])
+    return StatusCheckPage(items=items, next_cursor=next_cursor)
 
 # Include the router in the main app
 app.include_router(api_router)
 
+# GearGuard endpoints on an async MySQL pool
+gearguard_async.register(app)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -84,6 +322,12 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def prepare_status_checks():
+    await migrate_status_checks()
+    status_buffer.start()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await status_buffer.stop()
     client.close()
\ No newline at end of file
@@ -0,0 +1,3 @@
+#!/bin/bash
+cd /app/backend
+exec /root/.venv/bin/gunicorn -c gunicorn.conf.py flask_server:app
@@ -0,0 +1,302 @@
+"""Technician workload index behind request auto-assignment.
+
+``TechnicianWorkload`` keeps, per technician, the number of open (New or
+In Progress) requests assigned to them and their scheduled hours per day.
+It is built from maintenance_requests by ``load_workload`` and the write
+handlers report every change after they commit, so picking an assignee
+never touches MySQL.
+
+Each team has a min-heap of (open requests, technician id). A load change
+pushes a fresh entry and stale entries are discarded when they surface, so
+``pick`` is O(log n) in the team size. ``rebalance`` plans the moves that
+even out a team's New backlog.
+
+Like DashboardSummary, a background reload every ``reconcile_interval``
+seconds repairs drift from other workers and from writes that do not
+report here. ``loader(connection)`` gets the caller's connection when a
+read has to load the index inside a handler that already holds one (None
+otherwise), so a request never checks out a second pooled connection.
+"""
+import heapq
+import threading
+import time
+
+OPEN_STATUSES = ('New', 'In Progress')
+
+# Hours booked for a scheduled request that has no duration yet
+DEFAULT_REQUEST_HOURS = 2.0
+
+
+def _day(value):
+    """Scheduled date as YYYY-MM-DD (rows carry dates, request bodies strings)"""
+    if not value:
+        return None
+    return value.isoformat() if hasattr(value, 'isoformat') else str(value)[:10]
+
+
+def _hours(value):
+    return float(value) if value else DEFAULT_REQUEST_HOURS
+
+
+def _technician(value):
+    return int(value) if value not in (None, '') else None
+
+
+class TechnicianWorkload:
+    """Open request counts and daily hours per technician; see the module docstring"""
+
+    def __init__(self, loader, reconcile_interval=60, daily_hours=8.0):
+        self._loader = loader
+        self.reconcile_interval = reconcile_interval
+        self.daily_hours = daily_hours
+        self._lock = threading.Lock()
+        self._state = None
+        self._reconciler = None
+
+    def reload(self, connection=None):
+        teams, assignments = self._loader(connection)
+        state = {
+            'team_of': {},      # technician -> team
+            'members': {},      # team -> set of technicians
+            'open': {},         # technician -> open requests
+            'hours': {},        # technician -> {day: scheduled hours}
+            'requests': {},     # request -> (technician, day, hours)
+            'heaps': {},        # team -> [(open requests, technician)]
+        }
+        for technician_id, team_id in teams:
+            self._join(state, technician_id, team_id)
+        for request_id, technician_id, scheduled_date, duration_hours in assignments:
+            self._assign(state, request_id, technician_id, _day(scheduled_date), _hours(duration_hours), push=False)
+        for team_id, members in state['members'].items():
+            state['heaps'][team_id] = [(state['open'][technician_id], technician_id) for technician_id in members]
+            heapq.heapify(state['heaps'][team_id])
+        with self._lock:
+            self._state = state
+
+    def invalidate(self):
+        """Drop the index; the next read reloads it"""
+        with self._lock:
+            self._state = None
+
+    # ---- reads ----
+
+    def pick(self, team_id, scheduled_date=None, duration_hours=None, connection=None):
+        """Least-loaded technician of team_id, or None when the team has none.
+
+        With a scheduled_date, technicians whose hours that day would pass
+        daily_hours are passed over, unless that is all of them.
+        """
+        day = _day(scheduled_date)
+        hours = _hours(duration_hours)
+
+        def choose(state):
+            heap = state['heaps'].get(team_id)
+            if not heap:
+                return None
+            passed_over = []
+            chosen = fallback = None
+            while heap:
+                count, technician_id = heap[0]
+                if not self._current(state, team_id, count, technician_id):
+                    heapq.heappop(heap)
+                    continue
+                if fallback is None:
+                    fallback = technician_id
+                booked = state['hours'].get(technician_id, {}).get(day, 0.0) if day else 0.0
+                if booked + hours <= self.daily_hours:
+                    chosen = technician_id
+                    break
+                passed_over.append(heapq.heappop(heap))
+            for entry in passed_over:
+                heapq.heappush(heap, entry)
+            return chosen if chosen is not None else fallback
+        return self._read(choose, connection)
+
+    def team_workload(self, team_id, connection=None):
+        """[{technician_id, open_requests, scheduled_hours: {day: hours}}], least loaded first"""
+        def describe(state):
+            rows = [{
+                'technician_id': technician_id,
+                'open_requests': state['open'].get(technician_id, 0),
+                'scheduled_hours': dict(sorted(state['hours'].get(technician_id, {}).items())),
+            } for technician_id in state['members'].get(team_id, ())]
+            rows.sort(key=lambda row: (row['open_requests'], row['technician_id']))
+            return rows
+        return self._read(describe, connection)
+
+    def rebalance(self, team_id, backlog, connection=None):
+        """Moves that even out open request counts within team_id.
+
+        backlog: the team's movable requests as (id, technician_id) pairs,
+        preferred movers first. Unassigned ones go to the least-loaded
+        technician, then requests move from the most to the least loaded
+        until no two technicians differ by more than one (as far as their
+        movable requests allow). Requests assigned outside the team are left
+        alone. Returns [(request_id, old technician, new technician)];
+        nothing is applied here.
+        """
+        def plan(state):
+            members = state['members'].get(team_id)
+            if not members:
+                return []
+            load = {technician_id: state['open'].get(technician_id, 0) for technician_id in members}
+            lightest = [(count, technician_id) for technician_id, count in load.items()]
+            heapq.heapify(lightest)
+            movable = {technician_id: [] for technician_id in members}
+            moves = []
+
+            def take_lightest():
+                while True:
+                    count, technician_id = heapq.heappop(lightest)
+                    if count == load[technician_id]:
+                        return technician_id
+
+            def shift(request_id, source, target):
+                moves.append((request_id, source, target))
+                load[target] += 1
+                heapq.heappush(lightest, (load[target], target))
+                if source is not None:
+                    load[source] -= 1
+                    heapq.heappush(lightest, (load[source], source))
+                    if movable[source]:
+                        heapq.heappush(heaviest, (-load[source], source))
+                if movable[target]:
+                    heapq.heappush(heaviest, (-load[target], target))
+
+            heaviest = []
+            for request_id, technician_id in backlog:
+                technician_id = _technician(technician_id)
+                if technician_id is None:
+                    shift(request_id, None, take_lightest())
+                elif technician_id in movable:
+                    movable[technician_id].append(request_id)
+            heaviest.extend((-count, technician_id) for technician_id, count in load.items()
+                            if movable[technician_id])
+            heapq.heapify(heaviest)
+
+            while heaviest:
+                count, donor = heaviest[0]
+                if -count != load[donor] or not movable[donor]:
+                    heapq.heappop(heaviest)
+                    continue
+                receiver = take_lightest()
+                if load[donor] - load[receiver] <= 1:
+                    break
+                heapq.heappop(heaviest)
+                shift(movable[donor].pop(0), donor, receiver)
+            return moves
+        return self._read(plan, connection)
+
+    # ---- deltas applied by the write handlers after commit ----
+
+    def technician_added(self, technician_id, team_id):
+        with self._lock:
+            state = self._state
+            if state is None:
+                return
+            self._join(state, int(technician_id), _technician(team_id))
+            self._push(state, int(technician_id))
+
+    def request_saved(self, request_id, technician_id, status, scheduled_date, duration_hours):
+        """A request was created or rewritten with these values"""
+        with self._lock:
+            state = self._state
+            if state is None:
+                return
+            self._unassign(state, request_id)
+            technician_id = _technician(technician_id)
+            if technician_id is not None and status in OPEN_STATUSES:
+                self._assign(state, request_id, technician_id, _day(scheduled_date), _hours(duration_hours))
+
+    def request_status_changed(self, request_id, status):
+        if status in OPEN_STATUSES:
+            return
+        with self._lock:
+            state = self._state
+            if state is not None:
+                self._unassign(state, request_id)
+
+    # ---- internals (callers hold the lock) ----
+
+    def _read(self, func, connection=None):
+        self._start_reconciler()
+        while True:
+            with self._lock:
+                if self._state is not None:
+                    return func(self._state)
+            self.reload(connection)
+
+    @staticmethod
+    def _join(state, technician_id, team_id):
+        state['team_of'][technician_id] = team_id
+        state['open'].setdefault(technician_id, 0)
+        if team_id is not None:
+            state['members'].setdefault(team_id, set()).add(technician_id)
+
+    @staticmethod
+    def _current(state, team_id, count, technician_id):
+        return state['team_of'].get(technician_id) == team_id and state['open'].get(technician_id) == count
+
+    @staticmethod
+    def _push(state, technician_id):
+        team_id = state['team_of'].get(technician_id)
+        if team_id is None:
+            return
+        heap = state['heaps'].setdefault(team_id, [])
+        heapq.heappush(heap, (state['open'][technician_id], technician_id))
+        if len(heap) > 4 * len(state['members'][team_id]) + 16:
+            # Too many stale entries: rebuild from the live counts
+            heap[:] = [(state['open'][member], member) for member in state['members'][team_id]]
+            heapq.heapify(heap)
+
+    def _assign(self, state, request_id, technician_id, day, hours, push=True):
+        state['requests'][request_id] = (technician_id, day, hours)
+        state['open'][technician_id] = state['open'].get(technician_id, 0) + 1
+        if day:
+            booked = state['hours'].setdefault(technician_id, {})
+            booked[day] = booked.get(day, 0.0) + hours
+        if push:
+            self._push(state, technician_id)
+
+    def _unassign(self, state, request_id):
+        previous = state['requests'].pop(request_id, None)
+        if previous is None:
+            return
+        technician_id, day, hours = previous
+        state['open'][technician_id] -= 1
+        if day:
+            booked = state['hours'][technician_id]
+            booked[day] -= hours
+            if booked[day] <= 1e-9:
+                del booked[day]
+        self._push(state, technician_id)
+
+    def _start_reconciler(self):
+        # Started lazily so each forked worker gets its own thread.
+        if self._reconciler is not None or not self.reconcile_interval:
+            return
+        with self._lock:
+            if self._reconciler is not None:
+                return
+            self._reconciler = threading.Thread(target=self._reconcile_loop, name='workload-reconcile', daemon=True)
+            self._reconciler.start()
+
+    def _reconcile_loop(self):
+        while True:
+            time.sleep(self.reconcile_interval)
+            try:
+                self.reload()
+            except Exception as e:
+                print(f"Error reconciling technician workload: {e}")
+
+
+def load_workload(cursor):
+    """(technician, team) pairs and the open assigned requests, for TechnicianWorkload.reload"""
+    cursor.execute("SELECT id, team_id FROM technicians")
+    teams = cursor.fetchall()
+    cursor.execute("""
+        SELECT id, technician_id, scheduled_date, duration_hours
+        FROM maintenance_requests
+        WHERE status IN ('New', 'In Progress') AND technician_id IS NOT NULL
+    """)
+    return teams, cursor.fetchall()
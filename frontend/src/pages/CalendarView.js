@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useMemo, useRef } from 'react';
 import axios from 'axios';
 import { Calendar as BigCalendar, momentLocalizer } from 'react-big-calendar';
 import moment from 'moment';
@@ -9,32 +9,60 @@ const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
 const localizer = momentLocalizer(moment);
 
+const toEvent = (req) => ({
+  id: req.id,
+  title: `${req.subject} - ${req.equipment_name}`,
+  start: new Date(req.scheduled_date),
+  end: new Date(new Date(req.scheduled_date).getTime() + (req.duration_hours || 2) * 60 * 60 * 1000),
+  resource: req
+});
+
 const CalendarView = () => {
-  const [events, setEvents] = useState([]);
+  // Events are fetched one visible month grid at a time, keyed by YYYY-MM
+  const [eventsByMonth, setEventsByMonth] = useState({});
   const [loading, setLoading] = useState(true);
+  const requestedMonths = useRef(new Set());
   
   useEffect(() => {
-    fetchCalendarData();
+    loadAround(new Date());
   }, []);
   
-  const fetchCalendarData = async () => {
+  const fetchMonth = async (date) => {
+    const key = moment(date).format('YYYY-MM');
+    if (requestedMonths.current.has(key)) return;
+    requestedMonths.current.add(key);
+    
+    // The month grid also shows the leading/trailing days of adjacent weeks
+    const start = moment(date).startOf('month').startOf('week');
+    const end = moment(date).endOf('month').endOf('week').add(1, 'day');
     try {
-      const response = await axios.get(`${API}/requests/calendar`);
-      const calendarEvents = response.data.map(req => ({
-        id: req.id,
-        title: `${req.subject} - ${req.equipment_name}`,
-        start: new Date(req.scheduled_date),
-        end: new Date(new Date(req.scheduled_date).getTime() + (req.duration_hours || 2) * 60 * 60 * 1000),
-        resource: req
-      }));
-      setEvents(calendarEvents);
+      const response = await axios.get(`${API}/requests/calendar`, {
+        params: { start: start.format('YYYY-MM-DD'), end: end.format('YYYY-MM-DD') }
+      });
+      setEventsByMonth(prev => ({ ...prev, [key]: response.data.map(toEvent) }));
     } catch (error) {
+      requestedMonths.current.delete(key);
       console.error('Error fetching calendar data:', error);
-    } finally {
-      setLoading(false);
     }
   };
   
+  const loadAround = async (date) => {
+    await fetchMonth(date);
+    setLoading(false);
+    // Prefetch the neighbouring months so navigation renders immediately
+    fetchMonth(moment(date).subtract(1, 'month').toDate());
+    fetchMonth(moment(date).add(1, 'month').toDate());
+  };
+  
+  const events = useMemo(() => {
+    // Adjacent month grids overlap, so de-duplicate by request id
+    const byId = new Map();
+    Object.values(eventsByMonth).forEach(monthEvents => {
+      monthEvents.forEach(event => byId.set(event.id, event));
+    });
+    return Array.from(byId.values());
+  }, [eventsByMonth]);
+  
   const eventStyleGetter = (event) => {
     const style = {
       backgroundColor: event.resource.status === 'Repaired' ? '#10b981' : '#3b82f6',
@@ -77,6 +105,7 @@ const CalendarView = () => {
           eventPropGetter={eventStyleGetter}
           views={['month', 'week', 'day', 'agenda']}
           defaultView="month"
+          onNavigate={loadAround}
           popup
           style={{ height: '100%' }}
           data-testid="calendar-component"
@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import axios from 'axios';
-import { Plus, Package, AlertCircle } from 'lucide-react';
+import { Plus, Package, AlertCircle, Search } from 'lucide-react';
 import { Button } from '@/components/ui/button';
 import { Dialog, DialogContent, DialogHeader, DialogTitle, DialogTrigger } from '@/components/ui/dialog';
 import { Input } from '@/components/ui/input';
@@ -27,11 +27,46 @@ const EquipmentList = () => {
     maintenance_team_id: ''
   });
   
+  const [query, setQuery] = useState('');
+  const [results, setResults] = useState(null);
+  
   useEffect(() => {
     fetchEquipment();
     fetchTeams();
   }, []);
   
+  // Type-ahead: ranked matches come from the server instead of filtering the full list
+  useEffect(() => {
+    const q = query.trim();
+    if (!q) {
+      setResults(null);
+      return undefined;
+    }
+    let cancelled = false;
+    const timer = setTimeout(async () => {
+      try {
+        const response = await axios.get(`${API}/search`, { params: { q, types: 'equipment', limit: 50 } });
+        const matches = response.data.equipment;
+        let counts = {};
+        if (matches.length > 0) {
+          const countsResponse = await axios.get(`${API}/equipment/maintenance_counts`, {
+            params: { ids: matches.map(item => item.id).join(',') }
+          });
+          counts = countsResponse.data.counts;
+        }
+        if (!cancelled) {
+          setResults(matches.map(item => ({ ...item, open_request_count: counts[item.id] ?? null })));
+        }
+      } catch (error) {
+        console.error('Error searching equipment:', error);
+      }
+    }, 200);
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [query]);
+  
   const fetchEquipment = async () => {
     try {
       const response = await axios.get(`${API}/equipment`);
@@ -76,15 +111,10 @@ const EquipmentList = () => {
     }
   };
   
-  const getMaintenanceCount = async (equipmentId) => {
-    try {
-      const response = await axios.get(`${API}/equipment/${equipmentId}/maintenance_count`);
-      return response.data.count;
-    } catch (error) {
-      console.error('Error fetching maintenance count:', error);
-      return 0;
-    }
-  };
+  const teamNames = Object.fromEntries(teams.map(team => [team.id, team.team_name]));
+  const displayed = results === null
+    ? equipment
+    : results.map(item => ({ ...item, team_name: teamNames[item.maintenance_team_id] }));
   
   if (loading) {
     return (
@@ -207,13 +237,31 @@ const EquipmentList = () => {
         </Dialog>
       </div>
       
+      <div className="relative mb-6 max-w-md">
+        <Search className="w-4 h-4 absolute left-3 top-1/2 -translate-y-1/2 text-slate-400" />
+        <Input
+          data-testid="equipment-search-input"
+          className="pl-9"
+          placeholder="Search name, serial, location, department, employee"
+          value={query}
+          onChange={(e) => setQuery(e.target.value)}
+        />
+      </div>
+      
       <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-6">
-        {equipment.map((item) => (
-          <EquipmentCard key={item.id} equipment={item} getMaintenanceCount={getMaintenanceCount} />
+        {displayed.map((item) => (
+          <EquipmentCard key={item.id} equipment={item} />
         ))}
       </div>
       
-      {equipment.length === 0 && (
+      {results !== null && results.length === 0 && (
+        <div className="text-center py-12" data-testid="no-search-results-message">
+          <Search className="w-16 h-16 mx-auto text-slate-400 mb-4" />
+          <h3 className="text-lg font-semibold text-slate-700">No matching equipment</h3>
+        </div>
+      )}
+      
+      {results === null && equipment.length === 0 && (
         <div className="text-center py-12" data-testid="no-equipment-message">
           <Package className="w-16 h-16 mx-auto text-slate-400 mb-4" />
           <h3 className="text-lg font-semibold text-slate-700">No equipment found</h3>
@@ -224,16 +272,9 @@ const EquipmentList = () => {
   );
 };
 
-const EquipmentCard = ({ equipment, getMaintenanceCount }) => {
-  const [maintenanceCount, setMaintenanceCount] = useState(null);
-  
-  useEffect(() => {
-    const fetchCount = async () => {
-      const count = await getMaintenanceCount(equipment.id);
-      setMaintenanceCount(count);
-    };
-    fetchCount();
-  }, [equipment.id]);
+const EquipmentCard = ({ equipment }) => {
+  // Open request count comes inline with the equipment list
+  const maintenanceCount = equipment.open_request_count ?? null;
   
   const isWarrantyExpired = equipment.warranty_end && new Date(equipment.warranty_end) < new Date();
   
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useReducer, useRef } from 'react';
 import axios from 'axios';
 import { DndContext, closestCenter, PointerSensor, useSensor, useSensors } from '@dnd-kit/core';
 import { SortableContext, verticalListSortingStrategy, useSortable } from '@dnd-kit/sortable';
@@ -13,9 +13,77 @@ import { toast } from 'sonner';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
+// Matches the server's Retry-After for refused change streams
+const STREAM_RETRY_MS = 30000;
+const STATUSES = ['New', 'In Progress', 'Repaired', 'Scrap'];
+
+const emptyBoard = {
+  columns: { 'New': [], 'In Progress': [], 'Repaired': [], 'Scrap': [] },
+  counts: {},
+  nextCursors: {}
+};
+
+const newerFirst = (a, b) => (a.created_at === b.created_at ? b.id - a.id : (a.created_at < b.created_at ? 1 : -1));
+
+// Insert or move a card. Safe to apply twice (our own PUT response and the
+// change feed event for it), so the column counts only move once.
+const upsertCard = (board, card, { created = false, oldStatus = null } = {}) => {
+  let found = null;
+  const columns = {};
+  for (const status of STATUSES) {
+    const cards = board.columns[status] || [];
+    const existing = cards.find(c => c.id === card.id);
+    if (existing) found = { status, card: existing };
+    columns[status] = existing ? cards.filter(c => c.id !== card.id) : cards;
+  }
+  const merged = found ? { ...found.card, ...card } : card;
+  const from = found ? found.status : (created ? null : oldStatus);
+  
+  const counts = { ...board.counts };
+  if (from !== merged.status) {
+    if (from && counts[from] != null) counts[from] -= 1;
+    if (counts[merged.status] != null) counts[merged.status] += 1;
+  }
+  
+  const target = columns[merged.status];
+  if (created && !found) {
+    columns[merged.status] = [merged, ...target];
+  } else if (merged.created_at) {
+    // Keep newest-first order; skip cards that belong to a page not loaded yet
+    const last = target[target.length - 1];
+    if (!board.nextCursors[merged.status] || !last || newerFirst(merged, last) <= 0) {
+      columns[merged.status] = [...target, merged].sort(newerFirst);
+    }
+  }
+  return { ...board, columns, counts };
+};
+
+const boardReducer = (board, action) => {
+  switch (action.type) {
+    case 'loaded': {
+      const { counts, next_cursors, ...columns } = action.data;
+      return { columns, counts: counts || {}, nextCursors: next_cursors || {} };
+    }
+    case 'page': {
+      // Cards the change feed already placed on the board are not repeated
+      const loaded = board.columns[action.status];
+      const items = action.items.filter(item => !loaded.some(c => c.id === item.id));
+      return {
+        ...board,
+        columns: { ...board.columns, [action.status]: [...loaded, ...items] },
+        nextCursors: { ...board.nextCursors, [action.status]: action.nextCursor }
+      };
+    }
+    case 'upsert':
+      return upsertCard(board, action.card, action);
+    default:
+      return board;
+  }
+};
 
 const RequestsKanban = () => {
-  const [kanbanData, setKanbanData] = useState({ 'New': [], 'In Progress': [], 'Repaired': [], 'Scrap': [] });
+  const [board, dispatch] = useReducer(boardReducer, emptyBoard);
+  const { columns: kanbanData, counts: columnCounts, nextCursors } = board;
   const [equipment, setEquipment] = useState([]);
   const [teams, setTeams] = useState([]);
   const [technicians, setTechnicians] = useState([]);
@@ -40,22 +108,85 @@ const RequestsKanban = () => {
     })
   );
   
+  // Latest reference lists for the change feed handler, which is bound once
+  const lookups = useRef({ equipment: [], teams: [], technicians: [] });
+  lookups.current = { equipment, teams, technicians };
+  
   useEffect(() => {
     fetchData();
+    
+    // Other users' changes arrive as small deltas; patch the board locally
+    let source = null;
+    let retryTimer = null;
+    const connect = () => {
+      source = new EventSource(`${API}/requests/stream`);
+      source.addEventListener('created', (e) => {
+        const event = JSON.parse(e.data);
+        dispatch({ type: 'upsert', card: cardFromChanges(event), created: true });
+      });
+      source.addEventListener('updated', (e) => {
+        const event = JSON.parse(e.data);
+        dispatch({ type: 'upsert', card: cardFromChanges(event), oldStatus: event.old_status });
+        if (event.status === 'Scrap') markScrapped(event.equipment_id);
+      });
+      source.addEventListener('reset', () => fetchKanban());
+      source.onerror = () => {
+        // A refused stream (503 when the server is at its stream limit) is not retried by
+        // the browser: refetch the board and try again later instead
+        if (source.readyState === EventSource.CLOSED) {
+          retryTimer = setTimeout(() => {
+            fetchKanban();
+            connect();
+          }, STREAM_RETRY_MS);
+        }
+      };
+    };
+    connect();
+    return () => {
+      clearTimeout(retryTimer);
+      source.close();
+    };
   }, []);
   
+  const markScrapped = (equipmentId) => {
+    setEquipment(prev => prev.map(e => (e.id === equipmentId ? { ...e, is_scrapped: true } : e)));
+  };
+  
+  // Card fields from a change event, with names filled in from the loaded lists
+  const cardFromChanges = (event) => {
+    const { equipment, teams, technicians } = lookups.current;
+    const card = { ...event.changes, id: event.request_id, status: event.status };
+    if ('technician_id' in event.changes) {
+      const tech = technicians.find(t => String(t.id) === String(event.changes.technician_id));
+      card.technician_name = tech ? tech.name : null;
+    }
+    if (event.type === 'created') {
+      const eq = equipment.find(e => String(e.id) === String(event.changes.equipment_id));
+      const team = teams.find(t => String(t.id) === String(event.changes.team_id));
+      card.equipment_name = eq?.name;
+      card.serial_number = eq?.serial_number;
+      card.team_name = team?.team_name;
+    }
+    return card;
+  };
+  
+  const fetchKanban = async () => {
+    try {
+      const response = await axios.get(`${API}/requests/kanban`, { params: { meta: 1 } });
+      dispatch({ type: 'loaded', data: response.data });
+    } catch (error) {
+      console.error('Error fetching requests:', error);
+    }
+  };
+  
   const fetchData = async () => {
     try {
-      const [requestsRes, equipmentRes, teamsRes, techRes] = await Promise.all([
-        axios.get(`${API}/requests/kanban`),
-        axios.get(`${API}/equipment`),
-        axios.get(`${API}/teams`),
-        axios.get(`${API}/technicians`)
-      ]);
-      setKanbanData(requestsRes.data);
-      setEquipment(equipmentRes.data);
-      setTeams(teamsRes.data);
-      setTechnicians(techRes.data);
+      // Board and slim lookup lists in one round trip
+      const response = await axios.get(`${API}/bootstrap/kanban`);
+      dispatch({ type: 'loaded', data: response.data.board });
+      setEquipment(response.data.equipment);
+      setTeams(response.data.teams);
+      setTechnicians(response.data.technicians);
     } catch (error) {
       console.error('Error fetching data:', error);
       toast.error('Failed to load data');
@@ -64,13 +195,29 @@ const RequestsKanban = () => {
     }
   };
   
+  const loadMore = async (status) => {
+    try {
+      const response = await axios.get(`${API}/requests/kanban`, {
+        params: { status, cursor: nextCursors[status] }
+      });
+      dispatch({ type: 'page', status, items: response.data.items, nextCursor: response.data.next_cursor });
+    } catch (error) {
+      console.error('Error loading more requests:', error);
+      toast.error('Failed to load more requests');
+    }
+  };
+  
   const handleSubmit = async (e) => {
     e.preventDefault();
     try {
-      await axios.post(`${API}/requests`, formData);
+      // 'auto' lets the server pick the least-loaded technician of the team
+      const payload = formData.technician_id === 'auto'
+        ? { ...formData, technician_id: '', auto_assign: true }
+        : formData;
+      const response = await axios.post(`${API}/requests`, payload);
+      dispatch({ type: 'upsert', card: response.data, created: true });
       toast.success('Request created successfully');
       setOpen(false);
-      fetchData();
       setFormData({
         subject: '',
         equipment_id: '',
@@ -88,11 +235,12 @@ const RequestsKanban = () => {
   const handleUpdate = async (e) => {
     e.preventDefault();
     try {
-      await axios.put(`${API}/requests/${selectedRequest.id}`, selectedRequest);
+      const response = await axios.put(`${API}/requests/${selectedRequest.id}`, selectedRequest);
+      dispatch({ type: 'upsert', card: response.data });
+      if (response.data.status === 'Scrap') markScrapped(response.data.equipment_id);
       toast.success('Request updated successfully');
       setEditOpen(false);
       setSelectedRequest(null);
-      fetchData();
     } catch (error) {
       console.error('Error updating request:', error);
       toast.error(error.response?.data?.error || 'Failed to update request');
@@ -128,14 +276,18 @@ const RequestsKanban = () => {
           return;
         }
         
+        // Move the card right away; put it back if the server refuses
+        dispatch({ type: 'upsert', card: { ...request, status: targetStatus } });
         try {
-          await axios.put(`${API}/requests/${activeId}`, {
+          const response = await axios.put(`${API}/requests/${activeId}`, {
             ...request,
             status: targetStatus
           });
+          dispatch({ type: 'upsert', card: response.data });
+          if (targetStatus === 'Scrap') markScrapped(response.data.equipment_id);
           toast.success(`Request moved to ${targetStatus}`);
-          fetchData();
         } catch (error) {
+          dispatch({ type: 'upsert', card: request });
           console.error('Error updating request:', error);
           toast.error('Failed to update request status');
         }
@@ -248,6 +400,9 @@ const RequestsKanban = () => {
                       <SelectValue placeholder="Select technician" />
                     </SelectTrigger>
                     <SelectContent>
+                      {filteredTechnicians.length > 0 && (
+                        <SelectItem value="auto">Auto-assign (least busy)</SelectItem>
+                      )}
                       {filteredTechnicians.map(tech => (
                         <SelectItem key={tech.id} value={tech.id.toString()}>{tech.name}</SelectItem>
                       ))}
@@ -268,11 +423,14 @@ const RequestsKanban = () => {
       
       <DndContext sensors={sensors} collisionDetection={closestCenter} onDragEnd={handleDragEnd}>
         <div className="kanban-container">
-          {Object.entries(kanbanData).map(([status, requests]) => (
+          {STATUSES.map(status => (
             <KanbanColumn 
               key={status} 
               status={status} 
-              requests={requests}
+              requests={kanbanData[status] || []}
+              total={columnCounts[status]}
+              hasMore={Boolean(nextCursors[status])}
+              onLoadMore={() => loadMore(status)}
               onCardClick={handleCardClick}
             />
           ))}
@@ -363,7 +521,7 @@ const RequestsKanban = () => {
   );
 };
 
-const KanbanColumn = ({ status, requests, onCardClick }) => {
+const KanbanColumn = ({ status, requests, total, hasMore, onLoadMore, onCardClick }) => {
   const { setNodeRef } = useSortable({
     id: status,
     data: { type: 'column' }
@@ -380,7 +538,7 @@ const KanbanColumn = ({ status, requests, onCardClick }) => {
     <div ref={setNodeRef} className="kanban-column" data-testid={`kanban-column-${status.toLowerCase().replace(' ', '-')}`}>
       <div className={`kanban-column-header ${statusColors[status]}`}>
         <span>{status}</span>
-        <span className="font-bold">{requests.length}</span>
+        <span className="font-bold">{total ?? requests.length}</span>
       </div>
       
       <SortableContext items={requests.map(r => r.id)} strategy={verticalListSortingStrategy}>
@@ -388,6 +546,16 @@ const KanbanColumn = ({ status, requests, onCardClick }) => {
           {requests.map(request => (
             <KanbanCard key={request.id} request={request} onClick={() => onCardClick(request)} />
           ))}
+          {hasMore && (
+            <button
+              type="button"
+              className="w-full text-sm text-blue-700 py-2 rounded-lg hover:bg-blue-50"
+              onClick={onLoadMore}
+              data-testid={`kanban-load-more-${status.toLowerCase().replace(' ', '-')}`}
+            >
+              Load more
+            </button>
+          )}
         </div>
       </SortableContext>
     </div>
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The backend modules import each other as top-level siblings
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
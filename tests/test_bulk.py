@@ -0,0 +1,249 @@
+import pytest
+from mysql.connector import Error
+
+from bulk import (
+    MAX_BULK_ITEMS, ItemError, bulk_items, insert_rows, results_status, validate_equipment, validate_request,
+    validate_status_move
+)
+
+
+def test_bulk_items_accepts_an_array_or_an_items_object():
+    assert bulk_items([{'a': 1}]) == [{'a': 1}]
+    assert bulk_items({'items': []}) == []
+    for body in ({'rows': []}, 'x', [{}] * (MAX_BULK_ITEMS + 1)):
+        with pytest.raises(ItemError):
+            bulk_items(body)
+
+
+def test_validate_request_normalizes_fields():
+    fields = validate_request({'subject': 'Oil leak', 'equipment_id': '4', 'request_type': 'Corrective',
+                               'technician_id': '', 'scheduled_date': '2024-06-01', 'duration_hours': '1.5'})
+    assert fields == {
+        'subject': 'Oil leak', 'equipment_id': 4, 'team_id': None, 'technician_id': None,
+        'request_type': 'Corrective', 'scheduled_date': '2024-06-01', 'duration_hours': 1.5, 'status': 'New',
+    }
+
+
+@pytest.mark.parametrize('item, message', [
+    ('not an object', 'Item must be an object'),
+    ({'subject': 'x', 'request_type': 'Corrective'}, 'equipment_id is required'),
+    ({'subject': 'x', 'equipment_id': 'four', 'request_type': 'Corrective'}, 'equipment_id must be an integer'),
+    ({'subject': ' ', 'equipment_id': 1, 'request_type': 'Corrective'}, 'subject is required'),
+    ({'subject': 'x', 'equipment_id': 1, 'request_type': 'Urgent'}, 'request_type must be one of'),
+    ({'subject': 'x', 'equipment_id': 1, 'request_type': 'Corrective', 'status': 'Repaired'},
+     'Duration is required'),
+    ({'subject': 'x', 'equipment_id': 1, 'request_type': 'Corrective', 'duration_hours': -1}, 'must not be negative'),
+    ({'subject': 'x', 'equipment_id': 1, 'request_type': 'Corrective', 'scheduled_date': '01/06/2024'},
+     'scheduled_date must be a date'),
+])
+def test_validate_request_rejects(item, message):
+    with pytest.raises(ItemError, match=message):
+        validate_request(item)
+
+
+def test_validate_status_move():
+    assert validate_status_move({'id': '7', 'status': 'In Progress'}) == (7, 'In Progress', None)
+    with pytest.raises(ItemError, match='id is required'):
+        validate_status_move({'status': 'New'})
+    with pytest.raises(ItemError, match='status must be one of'):
+        validate_status_move({'id': 1, 'status': 'Done'})
+
+
+def test_validate_equipment_reads_csv_flags_and_blanks():
+    fields = validate_equipment({'name': 'Lathe', 'serial_number': ' L-1 ', 'department': '',
+                                 'maintenance_team_id': '3', 'is_scrapped': 'False'})
+    assert fields['serial_number'] == 'L-1'
+    assert fields['department'] is None
+    assert fields['maintenance_team_id'] == 3
+    assert fields['is_scrapped'] is False
+    assert validate_equipment({'name': 'Lathe', 'serial_number': 'L-2', 'is_scrapped': 'yes'})['is_scrapped'] is True
+    with pytest.raises(ItemError, match='serial_number is required'):
+        validate_equipment({'name': 'Lathe'})
+
+
+def test_results_status():
+    assert results_status([{'index': 0, 'error': 'x'}, {'index': 1, 'id': 5}]) == 201
+    assert results_status([{'index': 0, 'error': 'x'}]) == 400
+    assert results_status([{'index': 0, 'id': 5}], success=200) == 200
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.rows = []
+        self.lastrowid = None
+
+    def execute(self, sql, params=()):
+        self.connection.statements.append(('execute', sql, params))
+        if 'WHERE batch_key = %s' in sql:
+            self.rows = sorted((id_,) for id_, key in self.connection.inserted if key == params[0])
+
+    def executemany(self, sql, rows):
+        rows = list(rows)
+        self.connection.statements.append(('executemany', sql, rows))
+        for row in rows:
+            # innodb_autoinc_lock_mode=2 may hand ids in between to concurrent inserts
+            self.connection.next_id += 1 + self.connection.interleave
+            self.connection.inserted.append((self.connection.next_id, row[-1]))
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, interleave=0):
+        self.interleave = interleave
+        self.next_id = 100
+        self.inserted = []
+        self.statements = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def prepared_cursor(self, sql):
+        return FakeCursor(self)
+
+
+@pytest.mark.parametrize('interleave, ids', [(0, [101, 102, 103]), (2, [103, 106, 109])])
+def test_insert_rows_reads_ids_back_by_batch_key(interleave, ids):
+    connection = FakeConnection(interleave)
+    assert insert_rows(connection, 'INSERT INTO t (a, batch_key) VALUES (%s, %s)',
+                       'SELECT id FROM t WHERE batch_key = %s ORDER BY id', [(1,), (2,), (3,)]) == ids
+    (insert,) = [rows for kind, _, rows in connection.statements if kind == 'executemany']
+    keys = {row[-1] for row in insert}
+    assert [row[:-1] for row in insert] == [(1,), (2,), (3,)]
+    assert len(keys) == 1
+    assert connection.statements[-1][2] == tuple(keys)
+
+
+def test_insert_rows_batch_keys_differ_per_call():
+    connection = FakeConnection()
+    sql, ids_sql = 'INSERT INTO t (a, batch_key) VALUES (%s, %s)', 'SELECT id FROM t WHERE batch_key = %s'
+    assert insert_rows(connection, sql, ids_sql, [(1,)]) == [101]
+    assert insert_rows(connection, sql, ids_sql, [(2,), (3,)]) == [102, 103]
+
+
+class UnreadableCursor(FakeCursor):
+    def executemany(self, sql, rows):
+        pass
+
+
+def test_insert_rows_fails_when_ids_cannot_be_read_back():
+    connection = FakeConnection()
+    connection.cursor = lambda: UnreadableCursor(connection)
+    with pytest.raises(Error, match='read back 0 ids'):
+        insert_rows(connection, 'INSERT INTO t (a, batch_key) VALUES (%s, %s)',
+                    'SELECT id FROM t WHERE batch_key = %s', [(1,)])
+
+
+class ReferenceConnection(FakeConnection):
+    """Answers write_requests' IN lookups from in-memory tables"""
+
+    def __init__(self, equipment_teams, teams, technicians):
+        super().__init__()
+        self.tables = {'equipment': equipment_teams, 'maintenance_teams': teams, 'technicians': technicians}
+        self.commits = 0
+
+    def cursor(self):
+        connection = self
+        cursor = FakeCursor(self)
+        execute = cursor.execute
+
+        def lookup(sql, params=()):
+            execute(sql, params)
+            table = sql.split(' FROM ')[1].split()[0] if sql.startswith('SELECT id') else None
+            if table in connection.tables:
+                values = connection.tables[table]
+                cursor.rows = [(id_, values[id_] if isinstance(values, dict) else id_)
+                               for id_ in params if id_ in values]
+        cursor.execute = lookup
+        cursor.fetchall = lambda: cursor.rows
+        return cursor
+
+    def commit(self):
+        self.commits += 1
+
+
+def test_write_requests_rejects_bad_references_per_item():
+    import flask_server
+
+    # Equipment 1 belongs to team 2, equipment 3 has no team; team 9 and technician 8 do not exist
+    connection = ReferenceConnection(equipment_teams={1: 2, 3: None}, teams={2}, technicians={7})
+    items = [
+        {'subject': 'a', 'equipment_id': 1, 'request_type': 'Corrective', 'technician_id': 7},
+        {'subject': 'b', 'equipment_id': 1, 'request_type': 'Corrective', 'technician_id': 8},
+        {'subject': 'c', 'equipment_id': 3, 'request_type': 'Corrective'},
+        {'subject': 'd', 'equipment_id': 3, 'request_type': 'Corrective', 'team_id': 9},
+        {'subject': 'e', 'equipment_id': 3, 'request_type': 'Corrective', 'team_id': 2},
+        {'subject': 'f', 'equipment_id': 4, 'request_type': 'Corrective'},
+    ]
+    results, valid = flask_server.validate_items(items, validate_request)
+    created = flask_server.write_requests(connection, valid, results, notify=False)
+
+    assert created == 2
+    assert [result.get('error') for result in results] == [
+        None, 'Technician not found', 'Equipment has no maintenance team; give team_id', 'Team not found', None,
+        'Equipment not found',
+    ]
+    assert [result.get('id') for result in results] == [101, None, None, None, 102, None]
+    inserted = [rows for kind, sql, rows in connection.statements if kind == 'executemany']
+    # Only the two good items reach the INSERT; the team comes from the equipment
+    assert [(row[0], row[2]) for row in inserted[0]] == [('a', 2), ('e', 2)]
+    assert connection.commits == 1
+
+
+class MoveConnection(FakeConnection):
+    """maintenance_requests rows (id -> status, equipment, hours, technician, date) for bulk moves"""
+
+    def __init__(self, requests):
+        super().__init__()
+        self.requests = requests
+        self.commits = 0
+
+    def cursor(self):
+        connection = self
+        cursor = FakeCursor(self)
+
+        def lookup(sql, params=()):
+            connection.statements.append(('execute', sql, params))
+            if sql.startswith('SELECT id, status'):
+                cursor.rows = [(id_,) + connection.requests[id_] for id_ in params if id_ in connection.requests]
+        cursor.execute = lookup
+        return cursor
+
+    def commit(self):
+        self.commits += 1
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def test_bulk_reopen_puts_the_request_back_on_its_technician(monkeypatch):
+    import flask_server
+    from workload import TechnicianWorkload
+
+    day = '2024-06-10'
+    connection = MoveConnection({5: ('Repaired', 3, 2.0, 7, day), 6: ('New', 3, None, 7, None)})
+    workload = TechnicianWorkload(lambda connection=None: ([(7, 2)], [(6, 7, None, None)]), reconcile_interval=0)
+    monkeypatch.setattr(flask_server, 'technician_workload', workload)
+    monkeypatch.setattr(flask_server, 'get_db_connection', lambda: connection)
+    client = flask_server.app.test_client()
+    assert workload.team_workload(2)[0]['open_requests'] == 1
+
+    response = client.patch('/api/requests/bulk', json=[{'id': 5, 'status': 'In Progress'}])
+    assert response.status_code == 200
+    (load,) = workload.team_workload(2)
+    assert load['open_requests'] == 2
+    assert load['scheduled_hours'] == {day: 2.0}
+
+    client.patch('/api/requests/bulk', json=[{'id': 5, 'status': 'Repaired'}, {'id': 6, 'status': 'Scrap'}])
+    assert workload.team_workload(2)[0]['open_requests'] == 0
@@ -0,0 +1,114 @@
+import pytest
+
+from change_feed import RESET, ChangeFeed, FeedFull, feed_from_env, stream_limit
+
+
+def drain(subscription):
+    events = []
+    while True:
+        event = subscription.get(timeout=0)
+        if event is None:
+            return events
+        events.append(event)
+
+
+def test_published_events_reach_every_subscriber_in_order():
+    feed = ChangeFeed()
+    first, second = feed.subscribe(), feed.subscribe()
+    feed.publish('request_created', request_id=1)
+    feed.publish('request_moved', request_id=1, status='Repaired')
+
+    for subscription in (first, second):
+        events = drain(subscription)
+        assert [e['type'] for e in events] == ['request_created', 'request_moved']
+        assert [e['id'] for e in events] == [1, 2]
+        assert events[1]['status'] == 'Repaired'
+    assert feed.stats()['published'] == 2
+
+
+def test_get_times_out_with_none():
+    assert ChangeFeed().subscribe().get(timeout=0.01) is None
+
+
+def test_closed_subscription_stops_receiving():
+    feed = ChangeFeed()
+    subscription = feed.subscribe()
+    subscription.close()
+    feed.publish('request_created', request_id=1)
+    assert drain(subscription) == []
+    assert feed.stats()['subscribers'] == 0
+
+
+def test_reconnect_replays_events_after_last_event_id():
+    feed = ChangeFeed()
+    for request_id in range(1, 5):
+        feed.publish('request_created', request_id=request_id)
+
+    subscription = feed.subscribe(last_event_id=2)
+    assert [e['id'] for e in drain(subscription)] == [3, 4]
+    feed.publish('request_created', request_id=5)
+    assert [e['id'] for e in drain(subscription)] == [5]
+
+
+def test_up_to_date_reconnect_replays_nothing():
+    feed = ChangeFeed()
+    feed.publish('request_created', request_id=1)
+    assert drain(feed.subscribe(last_event_id=1)) == []
+
+
+def test_reconnect_older_than_the_history_gets_a_reset():
+    feed = ChangeFeed(history=2)
+    for request_id in range(1, 6):
+        feed.publish('request_created', request_id=request_id)
+
+    assert drain(feed.subscribe(last_event_id=1)) == [RESET]
+    assert [e['id'] for e in drain(feed.subscribe(last_event_id=3))] == [4, 5]
+
+
+def test_stalled_subscriber_is_marked_overflowed():
+    feed = ChangeFeed(max_pending=2)
+    subscription = feed.subscribe()
+    for request_id in range(3):
+        feed.publish('request_created', request_id=request_id)
+    assert subscription.overflowed
+    assert len(drain(subscription)) == 2
+
+
+def test_feed_from_env_is_local_without_a_broker(monkeypatch):
+    monkeypatch.delenv('CHANGE_FEED_URL', raising=False)
+    monkeypatch.setenv('CHANGE_FEED_HISTORY', '5')
+    feed = feed_from_env()
+    assert feed.stats()['broker'] == 'local'
+    for request_id in range(7):
+        feed.publish('request_created', request_id=request_id)
+    assert feed.stats()['history'] == 5
+
+
+def test_subscribe_beyond_max_subscribers_raises_feed_full():
+    feed = ChangeFeed(max_subscribers=2)
+    first = feed.subscribe()
+    feed.subscribe()
+    with pytest.raises(FeedFull):
+        feed.subscribe()
+    assert feed.stats()['rejected'] == 1
+
+    first.close()
+    feed.subscribe()
+    assert feed.stats()['subscribers'] == 2
+
+
+def test_feed_from_env_reads_the_stream_cap(monkeypatch):
+    monkeypatch.delenv('CHANGE_FEED_URL', raising=False)
+    monkeypatch.setenv('GUNICORN_THREADS', '16')
+    monkeypatch.setenv('SSE_MAX_STREAMS', '3')
+    assert feed_from_env().max_subscribers == 3
+
+
+@pytest.mark.parametrize('threads, limit', [(None, 2), ('8', 4), ('3', 1), ('1', 0)])
+def test_stream_limit_defaults_to_half_the_worker_threads(monkeypatch, threads, limit):
+    monkeypatch.delenv('SSE_MAX_STREAMS', raising=False)
+    if threads is None:
+        monkeypatch.delenv('GUNICORN_THREADS', raising=False)
+    else:
+        monkeypatch.setenv('GUNICORN_THREADS', threads)
+    assert stream_limit() == limit
@@ -0,0 +1,122 @@
+import threading
+
+import pytest
+from flask import Flask, jsonify
+
+import coalesce
+from coalesce import SingleFlight
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(coalesce, 'time', clock)
+    return clock
+
+
+def make_app(flight, view):
+    app = Flask(__name__)
+    app.add_url_rule('/report', 'report', flight(view))
+    return app.test_client()
+
+
+def test_fresh_result_is_replayed_without_running_the_view(clock):
+    flight = SingleFlight(fresh_for=1, stale_for=5)
+    calls = []
+
+    def view():
+        calls.append(1)
+        return jsonify(run=len(calls))
+
+    client = make_app(flight, view)
+    assert client.get('/report').json == {'run': 1}
+    clock.now += 0.5
+    assert client.get('/report').json == {'run': 1}
+    assert len(calls) == 1
+    assert flight.stats()['coalesced'] == 1
+
+    # A different query string is a different key
+    assert client.get('/report?team=2').json == {'run': 2}
+
+
+def test_stale_result_is_served_while_one_request_recomputes(clock):
+    flight = SingleFlight(fresh_for=1, stale_for=5)
+    release = threading.Event()
+    started = threading.Event()
+    calls = []
+
+    def view():
+        calls.append(1)
+        if len(calls) == 2:
+            started.set()
+            release.wait(5)
+        return jsonify(run=len(calls))
+
+    client = make_app(flight, view)
+    assert client.get('/report').json == {'run': 1}
+    clock.now += 3  # past fresh_for, within fresh_for + stale_for
+
+    results = {}
+    leader = threading.Thread(target=lambda: results.update(leader=client.get('/report').json))
+    leader.start()
+    assert started.wait(5)
+    # The leader is recomputing: everyone else gets the stale body at once
+    assert client.get('/report').json == {'run': 1}
+    release.set()
+    leader.join(5)
+    assert results['leader'] == {'run': 2}
+    assert flight.stats()['stale_served'] == 1
+    # The new result is fresh again
+    assert client.get('/report').json == {'run': 2}
+    assert len(calls) == 2
+
+
+def test_expired_result_makes_followers_wait_for_the_leader(clock):
+    flight = SingleFlight(fresh_for=1, stale_for=5)
+    release = threading.Event()
+    started = threading.Event()
+    calls = []
+
+    def view():
+        calls.append(1)
+        if len(calls) == 2:
+            started.set()
+            release.wait(5)
+        return jsonify(run=len(calls))
+
+    client = make_app(flight, view)
+    client.get('/report')
+    clock.now += 10  # beyond the stale window
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(client.get('/report').json)) for _ in range(2)]
+    threads[0].start()
+    assert started.wait(5)
+    threads[1].start()
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert results == [{'run': 2}, {'run': 2}]
+    assert len(calls) == 2
+
+
+def test_errors_are_not_shared(clock):
+    flight = SingleFlight(fresh_for=1, stale_for=5)
+    calls = []
+
+    def view():
+        calls.append(1)
+        return jsonify(error='boom'), 500
+
+    client = make_app(flight, view)
+    assert client.get('/report').status_code == 500
+    assert client.get('/report').status_code == 500
+    assert len(calls) == 2
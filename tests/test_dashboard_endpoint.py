@@ -0,0 +1,23 @@
+import flask_server
+
+
+class Summary:
+    def __init__(self):
+        self.reads = []
+
+    def get(self, fresh=False):
+        self.reads.append(fresh)
+        return {'total_requests': len(self.reads)}
+
+
+def test_fresh_dashboard_reads_are_never_shared(monkeypatch):
+    summary = Summary()
+    monkeypatch.setattr(flask_server, 'dashboard_summary', summary)
+    client = flask_server.app.test_client()
+
+    bodies = [client.get('/api/stats/dashboard?fresh=1').get_json() for _ in range(3)]
+    assert summary.reads == [True, True, True]
+    assert [body['total_requests'] for body in bodies] == [1, 2, 3]
+
+    assert client.get('/api/stats/dashboard').get_json() == {'total_requests': 4}
+    assert summary.reads[-1] is False
@@ -0,0 +1,96 @@
+from dashboard_stats import DashboardSummary, load_snapshot
+
+
+class ScriptedCursor:
+    """Answers load_snapshot's three queries from in-memory tables"""
+
+    def __init__(self, teams, equipment, requests):
+        self.teams = teams            # {id: name}
+        self.equipment = equipment    # {id: (name, is_scrapped)}
+        self.requests = requests      # [(team_id, equipment_id, status)]
+        self._rows = []
+
+    def execute(self, sql, params=()):
+        if 'FROM maintenance_teams' in sql:
+            self._rows = list(self.teams.items())
+        elif 'FROM equipment' in sql:
+            self._rows = [(id_, name, int(scrapped)) for id_, (name, scrapped) in self.equipment.items()]
+        else:
+            groups = {}
+            for team_id, equipment_id, status in self.requests:
+                total, open_count, completed = groups.get((team_id, equipment_id), (0, 0, 0))
+                groups[(team_id, equipment_id)] = (total + 1, open_count + (status in ('New', 'In Progress')),
+                                                   completed + (status == 'Repaired'))
+            self._rows = [key + counts for key, counts in groups.items()]
+
+    def fetchall(self):
+        return self._rows
+
+
+def summary_of(cursor):
+    return DashboardSummary(lambda: load_snapshot(cursor), reconcile_interval=0)
+
+
+def make_cursor():
+    return ScriptedCursor(
+        teams={1: 'Mechanics', 2: 'IT'},
+        equipment={10: ('Lathe', False), 11: ('Printer', False), 12: ('Old press', True)},
+        requests=[(1, 10, 'New'), (1, 10, 'Repaired'), (2, 11, 'In Progress')],
+    )
+
+
+def test_snapshot_counts():
+    stats = summary_of(make_cursor()).get()
+    assert stats['total_equipment'] == 2
+    assert stats['total_teams'] == 2
+    assert stats['open_requests'] == 2
+    assert stats['completed_requests'] == 1
+    assert stats['requests_by_team'] == [{'team': 'Mechanics', 'count': 2}, {'team': 'IT', 'count': 1}]
+    assert stats['requests_by_equipment'][0] == {'equipment': 'Lathe', 'count': 2}
+
+
+def test_deltas_match_a_recount():
+    cursor = make_cursor()
+    summary = summary_of(cursor)
+    summary.get()
+
+    # The same writes, applied to the tables and reported as deltas
+    cursor.teams[3] = 'Electrical'
+    summary.team_created(3, 'Electrical')
+    cursor.equipment[13] = ('Generator', False)
+    summary.equipment_saved(13, 'Generator', False)
+    for _ in range(3):
+        cursor.requests.append((3, 13, 'New'))
+        summary.request_created(3, 13, 'New')
+    cursor.requests[0] = (1, 10, 'Repaired')
+    summary.request_status_changed('New', 'Repaired')
+    cursor.requests[2] = (2, 11, 'Scrap')
+    summary.request_status_changed('In Progress', 'Scrap')
+    cursor.equipment[11] = ('Printer', True)
+    summary.equipment_scrapped(11)
+
+    incremental = summary.get()
+    assert incremental == summary_of(cursor).get()
+    assert incremental['open_requests'] == 3
+    assert incremental['completed_requests'] == 2
+    assert incremental['total_equipment'] == 2
+    assert incremental['requests_by_team'][0] == {'team': 'Electrical', 'count': 3}
+
+
+def test_unchanged_status_is_not_counted_twice():
+    summary = summary_of(make_cursor())
+    before = summary.get()['open_requests']
+    summary.request_status_changed('New', 'New')
+    summary.request_status_changed(None, 'New')
+    assert summary.get()['open_requests'] == before + 1
+
+
+def test_deltas_before_the_first_load_are_ignored_and_fresh_reloads():
+    cursor = make_cursor()
+    summary = summary_of(cursor)
+    summary.request_created(1, 10, 'New')  # no snapshot yet: the load will count it
+    assert summary.get()['open_requests'] == 2
+
+    cursor.requests.append((1, 10, 'New'))  # a write from another worker
+    assert summary.get()['open_requests'] == 2
+    assert summary.get(fresh=True)['open_requests'] == 3
@@ -0,0 +1,201 @@
+import threading
+import time
+
+import pytest
+from mysql.connector import Error
+
+import db_pool
+from db_pool import ConnectionPool, PoolError
+
+
+class FakeCursor:
+    def __init__(self, prepared):
+        self.prepared = prepared
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeConnection:
+    def __init__(self, number):
+        self.number = number
+        self.closed = False
+        self.unread_result = False
+        self.in_transaction = False
+        self.rollbacks = 0
+        self.broken = False
+        self.pings = 0
+
+    def ping(self, reconnect=False):
+        self.pings += 1
+        if self.broken:
+            raise Error('Lost connection to MySQL server')
+
+    def rollback(self):
+        if self.broken:
+            raise Error('Lost connection to MySQL server')
+        self.rollbacks += 1
+        self.in_transaction = False
+
+    def consume_results(self):
+        self.unread_result = False
+
+    def cursor(self, prepared=False):
+        return FakeCursor(prepared)
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def opened(monkeypatch):
+    connections = []
+
+    def connect(**config):
+        connection = FakeConnection(len(connections) + 1)
+        connections.append(connection)
+        return connection
+
+    monkeypatch.setattr(db_pool.mysql.connector, 'connect', connect)
+    return connections
+
+
+def make_pool(**kwargs):
+    return ConnectionPool({'host': 'db'}, **kwargs)
+
+
+def test_released_connection_is_reused(opened):
+    pool = make_pool(size=2)
+    with pool.connect() as connection:
+        assert connection.number == 1
+        assert pool.stats()['in_use'] == 1
+
+    assert pool.stats()['in_use'] == 0
+    assert pool.stats()['idle'] == 1
+    with pool.connect() as connection:
+        assert connection.number == 1
+    assert len(opened) == 1
+
+
+def test_returned_proxy_cannot_be_used(opened):
+    pool = make_pool()
+    connection = pool.connect()
+    connection.close()
+    connection.close()
+    with pytest.raises(PoolError):
+        connection.ping()
+    assert pool.stats()['in_use'] == 0
+
+
+def test_release_rolls_back_an_open_transaction(opened):
+    pool = make_pool()
+    with pool.connect():
+        opened[0].in_transaction = True
+        opened[0].unread_result = True
+    assert opened[0].rollbacks == 1
+    assert opened[0].unread_result is False
+    assert pool.stats()['idle'] == 1
+
+
+def test_overflow_connections_close_on_return(opened):
+    pool = make_pool(size=1, max_overflow=1)
+    first, second = pool.connect(), pool.connect()
+    assert pool.stats()['overflow'] == 1
+    first.close()
+    second.close()
+    assert [c.closed for c in opened] == [False, True]
+    assert pool.stats()['open'] == 1
+
+
+def test_checkout_times_out_when_pool_is_exhausted(opened):
+    pool = make_pool(size=1, max_overflow=0, timeout=0.05)
+    held = pool.connect()
+    with pytest.raises(PoolError):
+        pool.connect()
+    assert pool.stats()['timeouts'] == 1
+    held.close()
+
+
+def test_checkout_waits_for_a_returned_connection(opened):
+    pool = make_pool(size=1, max_overflow=0, timeout=5)
+    held = pool.connect()
+    timer = threading.Timer(0.05, held.close)
+    timer.start()
+    started = time.monotonic()
+    with pool.connect() as connection:
+        assert connection.number == 1
+    timer.join()
+    assert time.monotonic() - started >= 0.04
+    assert pool.stats()['waiters'] == 0
+    assert len(opened) == 1
+
+
+def test_broken_connection_is_dropped_on_release(opened):
+    pool = make_pool()
+    with pool.connect():
+        opened[0].in_transaction = True
+        opened[0].broken = True
+    assert opened[0].closed
+    assert pool.stats()['open'] == 0
+
+    with pool.connect() as connection:
+        assert connection.number == 2
+
+
+def test_idle_connection_failing_ping_is_replaced(opened):
+    pool = make_pool(ping_interval=0)
+    pool.connect().close()
+    opened[0].broken = True
+    time.sleep(0.001)
+
+    with pool.connect() as connection:
+        assert connection.number == 2
+    assert opened[0].pings == 1
+    assert opened[0].closed
+    assert pool.stats()['reconnects'] == 1
+
+
+def test_old_connection_is_recycled_on_checkout(opened):
+    pool = make_pool(recycle=0)
+    pool.connect().close()
+    time.sleep(0.001)
+
+    with pool.connect() as connection:
+        assert connection.number == 2
+    assert opened[0].closed
+    assert pool.stats()['recycled'] == 1
+
+
+def test_prepared_cursors_are_cached_per_connection(opened):
+    pool = make_pool()
+    with pool.connect() as connection:
+        cursor = connection.prepared_cursor('SELECT 1')
+        assert cursor.prepared
+        assert connection.prepared_cursor('SELECT 1') is cursor
+        assert connection.prepared_cursor('SELECT 2') is not cursor
+    with pool.connect() as connection:
+        assert connection.prepared_cursor('SELECT 1') is cursor
+
+
+def test_prepared_cursor_cache_evicts_the_oldest_statement(opened, monkeypatch):
+    monkeypatch.setattr(db_pool, 'MAX_PREPARED_STATEMENTS', 2)
+    pool = make_pool()
+    with pool.connect() as connection:
+        first = connection.prepared_cursor('SELECT 1')
+        second = connection.prepared_cursor('SELECT 2')
+        third = connection.prepared_cursor('SELECT 3')
+        assert first.closed
+        assert not second.closed and not third.closed
+        assert connection.prepared_cursor('SELECT 2') is second
+        assert connection.prepared_cursor('SELECT 1') is not first
+        assert second.closed
+
+
+def test_recycled_connection_starts_with_an_empty_statement_cache(opened):
+    pool = make_pool(recycle=0)
+    with pool.connect() as connection:
+        cursor = connection.prepared_cursor('SELECT 1')
+    time.sleep(0.001)
+    with pool.connect() as connection:
+        assert connection.prepared_cursor('SELECT 1') is not cursor
@@ -0,0 +1,136 @@
+import pytest
+from flask import jsonify
+
+import flask_server
+import repository
+
+
+class VersionsCursor:
+    def __init__(self, source):
+        self.source = source
+
+    def execute(self, sql, params=()):
+        assert sql == repository.TABLE_VERSIONS
+        self.source.lookups += 1
+
+    def fetchall(self):
+        return list(self.source.versions.items())
+
+    def close(self):
+        pass
+
+
+class VersionsConnection:
+    """Stands in for a pooled connection that can only read table_versions"""
+
+    def __init__(self, source):
+        self.source = source
+
+    def cursor(self, *args, **kwargs):
+        return VersionsCursor(self.source)
+
+    def prepared_cursor(self, sql):
+        return VersionsCursor(self.source)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+class VersionSource:
+    def __init__(self):
+        self.versions = {'maintenance_teams': 3, 'technicians': 7}
+        self.lookups = 0
+
+
+@pytest.fixture
+def source(monkeypatch):
+    source = VersionSource()
+    monkeypatch.setattr(flask_server, 'get_db_connection', lambda: VersionsConnection(source))
+    return source
+
+
+class View:
+    def __init__(self, status=200):
+        self.calls = 0
+        self.status = status
+
+    def __call__(self):
+        self.calls += 1
+        return jsonify([{'id': 1}]), self.status
+
+
+def get(view, path='/api/teams', if_none_match=None):
+    headers = {'If-None-Match': if_none_match} if if_none_match else {}
+    with flask_server.app.test_request_context(path, headers=headers):
+        return flask_server.conditional('maintenance_teams')(view)()
+
+
+def test_first_read_carries_a_weak_etag(source):
+    view = View()
+    response = get(view)
+    assert response.status_code == 200
+    assert view.calls == 1
+    assert response.headers['ETag'].startswith('W/"')
+    assert response.headers['ETag'].endswith('"')
+    etag, weak = response.get_etag()
+    assert weak and len(etag) == 20
+    assert response.headers['Cache-Control'] == 'no-cache'
+
+
+def test_matching_if_none_match_answers_304_without_running_the_view(source):
+    view = View()
+    etag = get(view).headers['ETag']
+
+    response = get(view, if_none_match=etag)
+    assert response.status_code == 304
+    assert view.calls == 1
+    assert response.headers['ETag'] == etag
+    assert response.get_data() == b''
+
+
+def test_strong_form_of_the_tag_also_matches(source):
+    view = View()
+    etag, _ = get(view).get_etag()
+    assert get(view, if_none_match=f'"{etag}"').status_code == 304
+
+
+def test_version_bump_changes_the_etag(source):
+    view = View()
+    etag = get(view).headers['ETag']
+
+    source.versions['maintenance_teams'] += 1
+    response = get(view, if_none_match=etag)
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert view.calls == 2
+
+
+def test_bumps_of_other_tables_keep_the_etag(source):
+    view = View()
+    etag = get(view).headers['ETag']
+    source.versions['technicians'] += 1
+    assert get(view, if_none_match=etag).status_code == 304
+
+
+def test_etag_depends_on_the_query_string(source):
+    view = View()
+    assert get(view, '/api/teams?limit=5').headers['ETag'] != get(view, '/api/teams?limit=6').headers['ETag']
+
+
+def test_current_etag_matches_the_header(source):
+    with flask_server.app.test_request_context('/api/teams'):
+        etag = flask_server.current_etag(('maintenance_teams',))
+    assert get(View()).get_etag() == (etag, True)
+
+
+def test_error_responses_are_not_tagged(source):
+    response = get(View(status=404))
+    assert response.status_code == 404
+    assert 'ETag' not in response.headers
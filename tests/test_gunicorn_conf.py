@@ -0,0 +1,71 @@
+import importlib.util
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend')
+
+
+@pytest.fixture
+def conf(monkeypatch):
+    spec = importlib.util.spec_from_file_location('gunicorn_conf', os.path.join(BACKEND_DIR, 'gunicorn.conf.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    runs = []
+
+    def run(args, cwd=None):
+        runs.append((args, cwd))
+        return SimpleNamespace(returncode=module.returncode)
+    module.returncode = 0
+    monkeypatch.setattr(module.subprocess, 'run', run)
+    module.runs = runs
+    return module
+
+
+class Log:
+    def __init__(self):
+        self.errors = []
+
+    def error(self, message, *args):
+        self.errors.append(message % args)
+
+
+def master(app_uri, workers=1):
+    return SimpleNamespace(app=SimpleNamespace(app_uri=app_uri), cfg=SimpleNamespace(workers=workers), log=Log())
+
+
+def test_migrations_run_in_a_child_process(conf):
+    conf.on_starting(master('flask_server:app'))
+    conf.on_reload(master('flask_server:app'))
+    command = [sys.executable, 'schema_migrations.py', 'upgrade']
+    assert conf.runs == [(command, conf.BACKEND_DIR), (command, conf.BACKEND_DIR)]
+    assert os.path.samefile(conf.BACKEND_DIR, BACKEND_DIR)
+
+
+def test_other_apps_and_disabled_init_skip_migrations(conf, monkeypatch):
+    conf.on_starting(master('server:app'))
+    monkeypatch.setattr(conf, 'init_database', False)
+    conf.on_starting(master('flask_server:app'))
+    assert conf.runs == []
+
+
+def test_failed_migration_is_logged(conf):
+    conf.returncode = 1
+    server = master('flask_server:app')
+    conf.on_starting(server)
+    assert server.log.errors == ['Schema migration failed (exit status 1)']
+
+
+def test_several_workers_need_a_change_feed_broker(conf, monkeypatch):
+    monkeypatch.delenv('CHANGE_FEED_URL', raising=False)
+    server = master('flask_server:app', workers=4)
+    with pytest.raises(SystemExit):
+        conf.on_starting(server)
+    assert 'CHANGE_FEED_URL is not set but 4 workers' in server.log.errors[0]
+    assert conf.runs == []
+
+    monkeypatch.setenv('CHANGE_FEED_URL', 'redis://localhost:6379/0')
+    conf.on_starting(master('flask_server:app', workers=4))
+    assert len(conf.runs) == 1
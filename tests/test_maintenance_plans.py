@@ -0,0 +1,171 @@
+from datetime import date, timedelta
+
+import pytest
+
+import maintenance_plans
+from bulk import ItemError
+from maintenance_plans import expand_plans, interval_in_days, occurrences, validate_plan
+
+TODAY = date(2024, 6, 10)
+
+
+def test_occurrences_up_to_the_horizon():
+    dates, following = occurrences(date(2024, 6, 12), 7, TODAY, date(2024, 7, 1))
+    assert dates == [date(2024, 6, 12), date(2024, 6, 19), date(2024, 6, 26)]
+    assert following == date(2024, 7, 3)
+
+
+def test_missed_occurrences_are_skipped_not_backfilled():
+    # Due 2024-05-20 every 7 days: 05-27, 06-03 were missed, 06-10 is today
+    dates, following = occurrences(date(2024, 5, 20), 7, TODAY, date(2024, 6, 20))
+    assert dates == [date(2024, 6, 10), date(2024, 6, 17)]
+    assert following == date(2024, 6, 24)
+
+
+def test_nothing_due_within_the_horizon():
+    dates, following = occurrences(date(2024, 8, 1), 30, TODAY, date(2024, 7, 1))
+    assert dates == []
+    assert following == date(2024, 8, 1)
+
+
+def test_interval_in_days_rounds_run_hours_up():
+    assert interval_in_days(14, None, None) == 14
+    assert interval_in_days(None, 100, 8) == 13
+    assert interval_in_days(None, 100, None) == 13  # one 8-hour shift a day by default
+    assert interval_in_days(None, 2, 24) == 1
+
+
+def test_validate_plan_defaults():
+    fields = validate_plan({'equipment_id': '3', 'subject': 'Lubricate', 'interval_hours': '250',
+                            'run_hours_per_day': 16}, today=TODAY)
+    assert fields['equipment_id'] == 3
+    assert fields['interval_days'] is None
+    assert fields['interval_hours'] == 250.0
+    assert fields['run_hours_per_day'] == 16.0
+    assert fields['next_due'] == '2024-06-10'
+    assert fields['active'] is True
+    # run_hours_per_day only applies to run-hour intervals
+    assert validate_plan({'equipment_id': 3, 'subject': 's', 'interval_days': 7,
+                          'run_hours_per_day': 16})['run_hours_per_day'] is None
+
+
+@pytest.mark.parametrize('item, message', [
+    ({'subject': 's', 'interval_days': 7}, 'equipment_id is required'),
+    ({'equipment_id': 1, 'subject': 's'}, 'exactly one of'),
+    ({'equipment_id': 1, 'subject': 's', 'interval_days': 7, 'interval_hours': 10}, 'exactly one of'),
+    ({'equipment_id': 1, 'subject': 's', 'interval_days': 0}, 'at least 1'),
+    ({'equipment_id': 1, 'subject': 's', 'interval_hours': -5}, 'must not be negative'),
+    ({'equipment_id': 1, 'subject': 's', 'interval_hours': 5, 'run_hours_per_day': 25}, 'between 0 and 24'),
+    ({'equipment_id': 1, 'subject': 's', 'interval_days': 7, 'next_due': 'soon'}, 'next_due must be a date'),
+    ({'equipment_id': 1, 'interval_days': 7}, 'subject is required'),
+])
+def test_validate_plan_rejects(item, message):
+    with pytest.raises(ItemError, match=message):
+        validate_plan(item)
+
+
+class PlanCursor:
+    """Plays the database side of expand_plans for one page of plans"""
+
+    def __init__(self, db):
+        self.db = db
+        self.rowcount = -1
+        self.lastrowid = None
+        self._rows = []
+
+    def execute(self, sql, params=()):
+        db = self.db
+        db.statements.append(sql.split()[0:2])
+        if sql.startswith('SELECT GET_LOCK'):
+            self._rows = [(0 if db.locked else 1,)]
+        elif sql.startswith('SELECT RELEASE_LOCK'):
+            self._rows = [(1,)]
+        elif 'FROM maintenance_plans p' in sql:
+            self._rows = [plan for plan in db.plans if plan[0] > params[1]]
+        elif sql.startswith('SELECT plan_id'):
+            self._rows = [key for key in db.requests if key[0] in params[:-2]]
+        elif sql.startswith('UPDATE maintenance_plans'):
+            count = len(params) // 3
+            db.advanced = dict(zip(params[0:2 * count:2], params[1:2 * count:2]))
+
+    def executemany(self, sql, rows):
+        # ON DUPLICATE KEY UPDATE id = id: an existing (plan_id, date) is left unchanged (0 rows)
+        self.rowcount = 0
+        for row in rows:
+            key = (row[8], row[5])
+            if key not in self.db.requests:
+                self.db.requests.add(key)
+                self.rowcount += 1
+
+    def fetchone(self):
+        return self._rows[0]
+
+    def fetchall(self):
+        return self._rows
+
+    def close(self):
+        pass
+
+
+class PlanDatabase:
+    def __init__(self, plans, requests=(), locked=False):
+        self.plans = plans
+        self.requests = set(requests)
+        self.locked = locked
+        self.statements = []
+        self.advanced = {}
+        self.commits = 0
+
+    def cursor(self):
+        return PlanCursor(self)
+
+    def prepared_cursor(self, sql):
+        return PlanCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+
+def plan(plan_id, next_due, interval_days=7, team_id=2):
+    return (plan_id, 10, f'Plan {plan_id}', interval_days, None, None, team_id, None, None, next_due)
+
+
+def test_expand_plans_creates_occurrences_and_advances_next_due():
+    db = PlanDatabase([plan(1, TODAY), plan(2, TODAY + timedelta(days=3), team_id=None)])
+    stats = expand_plans(db, 14, today=TODAY)
+    assert stats['created'] == 3
+    assert stats['plans'] == 1
+    assert stats['skipped'] == 1  # no team to assign the requests to
+    assert stats['locked'] is False
+    assert db.requests == {(1, TODAY), (1, TODAY + timedelta(days=7)), (1, TODAY + timedelta(days=14))}
+    assert db.advanced == {1: TODAY + timedelta(days=21)}
+    assert db.commits == 1
+    assert db.statements[-1] == ['SELECT', 'RELEASE_LOCK(%s)']
+
+
+def test_expand_plans_counts_only_rows_actually_inserted(monkeypatch):
+    # A racing writer inserted the second occurrence after the pre-filter ran
+    db = PlanDatabase([plan(1, TODAY)])
+    monkeypatch.setattr(maintenance_plans, '_existing_occurrences', lambda *args: set())
+    db.requests.add((1, TODAY + timedelta(days=7)))
+    stats = expand_plans(db, 7, today=TODAY)
+    assert stats['created'] == 1
+
+
+def test_expand_plans_reports_a_held_lock():
+    db = PlanDatabase([plan(1, TODAY)], locked=True)
+    stats = expand_plans(db, 14, today=TODAY, lock_timeout=5)
+    assert stats['locked'] is True
+    assert stats['created'] == 0
+    assert db.requests == set()
+    assert db.statements == [['SELECT', 'GET_LOCK(%s,']]
+
+
+def test_expand_plans_skips_occurrences_already_generated():
+    db = PlanDatabase([plan(1, TODAY)], requests=[(1, TODAY)])
+    stats = expand_plans(db, 7, today=TODAY)
+    assert stats['created'] == 1
+    assert db.requests == {(1, TODAY), (1, TODAY + timedelta(days=7))}
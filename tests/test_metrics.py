@@ -0,0 +1,173 @@
+import re
+
+from flask import Flask, jsonify
+
+from metrics import LATENCY_BUCKETS, Metrics, sql_shape
+
+SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{(.*)\})? (-?[0-9.e+-]+|\+Inf|NaN)$')
+LABEL = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"')
+
+
+def parse(text):
+    """Check the exposition format and return {family: (kind, [(name, labels, value)])}"""
+    assert text.endswith('\n')
+    families = {}
+    declared = {}
+    for line in text.splitlines():
+        if line.startswith('# HELP '):
+            name = line.split()[2]
+            assert name not in declared, f'{name} declared twice'
+            declared[name] = None
+        elif line.startswith('# TYPE '):
+            _, _, name, kind = line.split()
+            assert name in declared and declared[name] is None
+            assert kind in ('counter', 'gauge', 'histogram')
+            declared[name] = kind
+            families[name] = (kind, [])
+        else:
+            match = SAMPLE.match(line)
+            assert match, f'malformed sample: {line!r}'
+            name, _, labels, value = match.groups()
+            family = next(f for f in families if name == f or
+                          (families[f][0] == 'histogram' and name in (f + '_bucket', f + '_sum', f + '_count')))
+            families[family][1].append((name, dict(LABEL.findall(labels or '')), float(value)))
+    for name, (kind, _) in families.items():
+        if kind == 'counter':
+            assert name.endswith('_total'), f'counter {name} must end in _total'
+    return families
+
+
+def make_app(metrics):
+    app = Flask(__name__)
+    metrics.init_app(app)
+
+    @app.route('/api/items/<int:item_id>')
+    def item(item_id):
+        if item_id == 0:
+            return jsonify({'error': 'Item not found'}), 404
+        return jsonify({'id': item_id})
+
+    @app.route('/api/items')
+    def items():
+        return jsonify([])
+    return app.test_client()
+
+
+def samples(families, family, name=None):
+    return {(s[1].get('method'), s[1].get('route'), s[1].get('status'), s[1].get('le')): s[2]
+            for s in families[family][1] if name is None or s[0] == name}
+
+
+def test_render_is_well_formed_before_any_request():
+    families = parse(Metrics().render())
+    assert families['gearguard_http_requests_total'] == ('counter', [])
+
+
+def test_requests_accumulate_per_route_rule_and_status():
+    metrics = Metrics()
+    client = make_app(metrics)
+    for item_id in (1, 2, 0):
+        client.get(f'/api/items/{item_id}')
+    client.get('/api/items')
+
+    families = parse(metrics.render())
+    counts = samples(families, 'gearguard_http_requests_total')
+    assert counts == {
+        ('GET', '/api/items/<int:item_id>', '200', None): 2,
+        ('GET', '/api/items/<int:item_id>', '404', None): 1,
+        ('GET', '/api/items', '200', None): 1,
+    }
+
+
+def test_latency_histogram_is_cumulative_per_route():
+    metrics = Metrics()
+    client = make_app(metrics)
+    for item_id in (1, 2, 3):
+        client.get(f'/api/items/{item_id}')
+
+    families = parse(metrics.render())
+    kind, series = families['gearguard_http_request_duration_seconds']
+    assert kind == 'histogram'
+    route = '/api/items/<int:item_id>'
+    buckets = [(s[1]['le'], s[2]) for s in series if s[0].endswith('_bucket') and s[1]['route'] == route]
+    assert [le for le, _ in buckets] == [str(b) for b in LATENCY_BUCKETS] + ['+Inf']
+    values = [count for _, count in buckets]
+    assert values == sorted(values)
+    assert values[-1] == 3
+    count = samples(families, 'gearguard_http_request_duration_seconds',
+                    'gearguard_http_request_duration_seconds_count')
+    assert count[('GET', route, None, None)] == 3
+
+
+class FakeCursor:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def execute(self, sql, params=None):
+        pass
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+def test_cursor_queries_and_rows_are_charged_to_the_route():
+    metrics = Metrics(slow_query_seconds=0)
+    app = Flask(__name__)
+
+    @app.route('/api/teams')
+    def teams():
+        cursor = metrics.cursor(FakeCursor([(1,), (2,)]))
+        cursor.execute('SELECT id FROM t WHERE id IN (%s, %s,%s)', (1, 2, 3))
+        return jsonify(cursor.fetchall())
+
+    metrics.init_app(app)
+    app.test_client().get('/api/teams')
+    app.test_client().get('/api/teams')
+
+    families = parse(metrics.render())
+    key = ('GET', '/api/teams', None, None)
+    assert samples(families, 'gearguard_db_queries_total')[key] == 2
+    assert samples(families, 'gearguard_db_rows_total')[key] == 4
+    assert samples(families, 'gearguard_slow_queries_total')[key] == 2
+    slow = metrics.slow_queries()
+    assert slow[0]['route'] == 'GET /api/teams'
+    assert slow[0]['sql'] == 'SELECT id FROM t WHERE id IN (...)'
+
+
+def test_pool_checkout_time_is_charged_to_the_route():
+    metrics = Metrics()
+    app = Flask(__name__)
+
+    @app.route('/api/teams')
+    def teams():
+        metrics.checkout(0.25)
+        return jsonify([])
+
+    metrics.init_app(app)
+    app.test_client().get('/api/teams')
+    families = parse(metrics.render())
+    assert samples(families, 'gearguard_pool_checkout_seconds_total')[('GET', '/api/teams', None, None)] == 0.25
+
+
+def test_route_labels_are_escaped():
+    metrics = Metrics()
+    metrics.query(('GET', '/a"b\\c'), 'SELECT 1', 0.001)
+    families = parse(metrics.render())
+    (sample,) = families['gearguard_db_queries_total'][1]
+    assert sample[1]['route'] == '/a\\"b\\\\c'
+
+
+def test_sql_shape_folds_whitespace_and_in_lists():
+    assert sql_shape(b'SELECT *\n  FROM t WHERE id IN ( %s,%s , %s )') == 'SELECT * FROM t WHERE id IN (...)'
+
+
+def test_extra_series_keep_their_kind():
+    families = parse(Metrics().render([
+        ('pool_in_use', 'gauge', 'Connections checked out.', 3),
+        ('pool_timeouts_total', 'counter', 'Checkouts that timed out.', 1),
+    ]))
+    assert families['gearguard_pool_in_use'] == ('gauge', [('gearguard_pool_in_use', {}, 3.0)])
+    assert families['gearguard_pool_timeouts_total'] == ('counter', [('gearguard_pool_timeouts_total', {}, 1.0)])
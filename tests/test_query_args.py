@@ -0,0 +1,87 @@
+from datetime import datetime
+
+import pytest
+
+from query_args import (
+    MAX_PAGE_SIZE, DEFAULT_PAGE_SIZE, QueryArgError, decode_cursor, encode_cursor, equipment_list_query,
+    paginated_response, parse_page_args, request_list_query
+)
+
+
+def test_cursor_round_trip_serializes_dates():
+    created = datetime(2024, 3, 1, 12, 30, 5)
+    token = encode_cursor([created, 42])
+    assert decode_cursor(token) == ['2024-03-01T12:30:05', 42]
+
+
+@pytest.mark.parametrize('token', [
+    'not base64 at all!',
+    encode_cursor([1, 2])[:-4] + '####',
+])
+def test_decode_cursor_rejects_garbage(token):
+    with pytest.raises(QueryArgError):
+        decode_cursor(token)
+
+
+def test_decode_cursor_needs_a_two_value_key():
+    with pytest.raises(QueryArgError):
+        decode_cursor(encode_cursor([1, 2, 3]))
+    assert decode_cursor('') is None
+
+
+def test_page_args_default_limit_with_cursor_only():
+    cursor = encode_cursor(['Lathe', 3])
+    assert parse_page_args({'cursor': cursor}) == (DEFAULT_PAGE_SIZE, ['Lathe', 3])
+    assert parse_page_args({}) == (None, None)
+
+
+@pytest.mark.parametrize('limit', ['0', str(MAX_PAGE_SIZE + 1), 'ten'])
+def test_page_args_rejects_bad_limits(limit):
+    with pytest.raises(QueryArgError):
+        parse_page_args({'limit': limit})
+
+
+def test_equipment_keyset_predicate_follows_name_id_order():
+    query = equipment_list_query({'limit': '20', 'cursor': encode_cursor(['Lathe', 3]), 'team_id': '2'})
+    assert '(e.name > %s OR (e.name = %s AND e.id > %s))' in query.sql
+    assert query.sql.rstrip().endswith('ORDER BY e.name, e.id LIMIT %s')
+    # Filter first, then the keyset values, then the look-ahead limit
+    assert query.params == (2, 'Lathe', 'Lathe', 3, 21)
+    # The total ignores the cursor
+    assert query.count_params == (2,)
+    assert 'e.id >' not in query.count_sql
+
+
+def test_equipment_stream_query_has_no_lookahead_row():
+    query = equipment_list_query({'limit': '20'}, lookahead=False)
+    assert query.params == (20,)
+
+
+def test_request_keyset_predicate_is_newest_first():
+    query = request_list_query({'limit': '5', 'cursor': encode_cursor(['2024-03-01T12:30:05', 9])})
+    assert '(mr.created_at < %s OR (mr.created_at = %s AND mr.id < %s))' in query.sql
+    last = datetime(2024, 3, 1, 12, 30, 5)
+    assert query.params == (last, last, 9, 6)
+
+
+@pytest.mark.parametrize('key', [['Lathe', 'x'], [None, None]])
+def test_equipment_cursor_with_bad_values(key):
+    with pytest.raises(QueryArgError):
+        equipment_list_query({'cursor': encode_cursor(key)})
+
+
+def test_request_cursor_needs_a_timestamp():
+    with pytest.raises(QueryArgError):
+        request_list_query({'cursor': encode_cursor(['yesterday', 1])})
+
+
+def test_paginated_response_trims_lookahead_and_points_at_last_row():
+    rows = [{'name': f'M{i}', 'id': i} for i in range(4)]
+    body = paginated_response(rows, 3, ('name', 'id'), total=10)
+    assert [row['id'] for row in body['items']] == [0, 1, 2]
+    assert decode_cursor(body['next_cursor']) == ['M2', 2]
+    assert body['total'] == 10
+
+    last_page = paginated_response(rows[:2], 3, ('name', 'id'))
+    assert last_page['next_cursor'] is None
+    assert 'total' not in last_page
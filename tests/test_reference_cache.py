@@ -0,0 +1,192 @@
+import asyncio
+
+import pytest
+from mysql.connector.constants import FieldType
+
+import flask_server
+import gearguard_async
+import repository
+from reference_cache import LocalBackend, ReferenceCache, versioned_key
+
+
+class VersionSource:
+    def __init__(self):
+        self.versions = {'equipment': 4, 'technicians': 2, 'maintenance_teams': 1}
+        self.lookups = 0
+        self.reads = 0
+
+
+# SELECT 1 AS n, as mysql-connector and aiomysql describe it
+CONNECTOR_N = [('n', FieldType.LONGLONG, None, None, None, None, False, 0, 63)]
+AIOMYSQL_N = [('n', FieldType.LONGLONG, None, 1, 1, 0, False)]
+
+
+class Cursor:
+    description = CONNECTOR_N
+
+    def __init__(self, source):
+        self.source = source
+        self.sql = None
+
+    def execute(self, sql, params=()):
+        self.sql = sql
+        if sql == repository.TABLE_VERSIONS:
+            self.source.lookups += 1
+        else:
+            self.source.reads += 1
+
+    def fetchall(self):
+        if self.sql == repository.TABLE_VERSIONS:
+            return list(self.source.versions.items())
+        return [(1,)]
+
+    def close(self):
+        pass
+
+
+class Connection:
+    def __init__(self, source):
+        self.source = source
+
+    def cursor(self, *args, **kwargs):
+        return Cursor(self.source)
+
+    def prepared_cursor(self, sql):
+        return Cursor(self.source)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+@pytest.fixture
+def source(monkeypatch):
+    source = VersionSource()
+    monkeypatch.setattr(flask_server, 'get_db_connection', lambda: Connection(source))
+    monkeypatch.setattr(flask_server, 'reference_cache', ReferenceCache(LocalBackend(16, ttl=60), versions_ttl=60))
+    return source
+
+
+def test_version_copy_expires_after_its_ttl():
+    cache = ReferenceCache(LocalBackend(16, ttl=60), versions_ttl=0)
+    cache.remember_versions({'equipment': 1})
+    assert cache.table_versions() is None
+
+    cache.versions_ttl = 60
+    cache.remember_versions({'equipment': 2})
+    assert cache.table_versions() == {'equipment': 2}
+
+
+def test_invalidate_drops_the_version_copy():
+    cache = ReferenceCache(LocalBackend(16, ttl=60), versions_ttl=60)
+    cache.remember_versions({'equipment': 1})
+    cache.invalidate('equipment_team')
+    assert cache.table_versions() is None
+
+
+def test_reference_key_reuses_the_worker_wide_versions(source):
+    for _ in range(3):
+        with flask_server.app.test_request_context('/api/requests', method='POST'):
+            key = flask_server.reference_key('equipment_team', 7)
+    assert key == versioned_key('equipment_team', 7, source.versions)
+    assert source.lookups == 1
+
+
+def test_reference_key_rereads_after_a_local_write(source):
+    with flask_server.app.test_request_context('/api/requests', method='POST'):
+        flask_server.reference_key('equipment_team', 7)
+    source.versions['equipment'] += 1
+    flask_server.reference_cache.invalidate('equipment_team')
+
+    with flask_server.app.test_request_context('/api/requests', method='POST'):
+        key = flask_server.reference_key('equipment_team', 7)
+    assert key == versioned_key('equipment_team', 7, source.versions)
+    assert source.lookups == 2
+
+
+def test_reference_key_prefers_the_versions_behind_the_etag(source):
+    flask_server.reference_cache.remember_versions({'equipment': 1})
+    with flask_server.app.test_request_context('/api/teams'):
+        flask_server.table_versions()
+        key = flask_server.reference_key('equipment_team', 7)
+    assert key == versioned_key('equipment_team', 7, source.versions)
+    assert flask_server.reference_cache.table_versions() == source.versions
+
+
+def test_cached_rows_skip_the_database_on_a_hit(source):
+    for _ in range(3):
+        with flask_server.app.test_request_context('/api/teams'):
+            rows = flask_server.cached_rows('teams', 'all', 'SELECT 1 AS n')
+    assert rows == [{'n': 1}]
+    assert source.reads == 1
+
+
+class AsyncCursor:
+    description = AIOMYSQL_N
+
+    def __init__(self, source):
+        self.source = source
+        self.sql = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, sql, params=()):
+        self.sql = sql
+        if sql == repository.TABLE_VERSIONS:
+            self.source.lookups += 1
+        else:
+            self.source.reads += 1
+
+    async def fetchall(self):
+        if self.sql == repository.TABLE_VERSIONS:
+            return list(self.source.versions.items())
+        return [(1,)]
+
+
+class AsyncConnection:
+    def __init__(self, source):
+        self.source = source
+
+    def cursor(self):
+        return AsyncCursor(self.source)
+
+
+class AsyncPool:
+    def __init__(self, source):
+        self.source = source
+        self.acquired = 0
+
+    def acquire(self):
+        pool = self
+
+        class Acquire:
+            async def __aenter__(self):
+                pool.acquired += 1
+                return AsyncConnection(pool.source)
+
+            async def __aexit__(self, *exc):
+                return False
+        return Acquire()
+
+
+def test_async_reads_share_the_cache_and_version_copy(monkeypatch):
+    source = VersionSource()
+    monkeypatch.setattr(gearguard_async, '_pool', AsyncPool(source))
+    monkeypatch.setattr(gearguard_async, 'reference_cache', ReferenceCache(LocalBackend(16, ttl=60), versions_ttl=60))
+
+    async def scenario():
+        return [await gearguard_async.cached_rows('technicians', 'all', 'SELECT 1 AS n') for _ in range(3)]
+
+    assert asyncio.run(scenario()) == [[{'n': 1}]] * 3
+    assert source.reads == 1
+    assert source.lookups == 1
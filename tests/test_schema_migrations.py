@@ -0,0 +1,194 @@
+from types import SimpleNamespace
+
+import pytest
+from mysql.connector import Error
+
+import schema_migrations
+from schema_migrations import Migration, MigrationError, migrate
+
+
+class SchemaDatabase:
+    """schema_version plus the named lock, as seen through a cursor"""
+
+    def __init__(self, applied=None, lock_granted=True):
+        self.versions = dict(applied) if applied is not None else None
+        self.lock_granted = lock_granted
+        self.lock_held = False
+        self.statements = []
+        self.commits = 0
+        self.rollbacks = 0
+        self.ran = []
+
+
+class SchemaCursor:
+    def __init__(self, db):
+        self.db = db
+        self.result = []
+        self.closed = False
+
+    def execute(self, sql, params=()):
+        db = self.db
+        statement = ' '.join(sql.split())
+        db.statements.append(statement)
+        if statement.startswith('SELECT MAX(version)'):
+            if db.versions is None:
+                raise Error(msg="Table 'schema_version' doesn't exist", errno=1146)
+            self.result = [(max(db.versions, default=None),)]
+        elif statement.startswith('SELECT GET_LOCK'):
+            db.lock_held = db.lock_granted
+            self.result = [(1 if db.lock_granted else 0,)]
+        elif statement.startswith('SELECT RELEASE_LOCK'):
+            db.lock_held = False
+            self.result = [(1,)]
+        elif statement.startswith('CREATE TABLE IF NOT EXISTS schema_version'):
+            if db.versions is None:
+                db.versions = {}
+        elif statement.startswith('INSERT INTO schema_version'):
+            db.versions[params[0]] = params[1]
+        else:
+            raise AssertionError(f'unexpected SQL: {statement}')
+
+    def fetchone(self):
+        return self.result[0]
+
+    def fetchall(self):
+        return self.result
+
+    def close(self):
+        self.closed = True
+
+
+class SchemaConnection:
+    def __init__(self, db):
+        self.db = db
+
+    def cursor(self):
+        return SchemaCursor(self.db)
+
+    def commit(self):
+        self.db.commits += 1
+
+    def rollback(self):
+        self.db.rollbacks += 1
+
+
+def fake_migration(db, version, name, fails=False):
+    def upgrade(cursor):
+        assert db.lock_held
+        if fails:
+            raise Error(msg='Duplicate column name')
+        db.ran.append(version)
+    return Migration(version, name, SimpleNamespace(upgrade=upgrade))
+
+
+@pytest.fixture
+def migrations(monkeypatch):
+    available = []
+    monkeypatch.setattr(schema_migrations, 'discover', lambda: list(available))
+    return available
+
+
+def test_pending_migrations_run_in_version_order_under_the_lock(migrations):
+    db = SchemaDatabase()
+    migrations += [fake_migration(db, 1, 'initial'), fake_migration(db, 2, 'indexes'), fake_migration(db, 3, 'seed')]
+
+    assert migrate(SchemaConnection(db)) == [1, 2, 3]
+    assert db.ran == [1, 2, 3]
+    assert db.versions == {1: 'initial', 2: 'indexes', 3: 'seed'}
+    assert db.commits == 3
+    assert not db.lock_held
+
+
+def test_applied_versions_are_skipped(migrations):
+    db = SchemaDatabase(applied={1: 'initial'})
+    migrations += [fake_migration(db, 1, 'initial'), fake_migration(db, 2, 'indexes'), fake_migration(db, 3, 'seed')]
+
+    assert migrate(SchemaConnection(db)) == [2, 3]
+    assert db.ran == [2, 3]
+
+
+def test_current_schema_costs_one_query_and_no_lock(migrations):
+    db = SchemaDatabase(applied={1: 'initial', 2: 'indexes'})
+    migrations += [fake_migration(db, 1, 'initial'), fake_migration(db, 2, 'indexes')]
+
+    assert migrate(SchemaConnection(db)) == []
+    assert db.statements == ['SELECT MAX(version) FROM schema_version']
+
+
+def test_target_stops_the_run(migrations):
+    db = SchemaDatabase()
+    migrations += [fake_migration(db, 1, 'initial'), fake_migration(db, 2, 'indexes'), fake_migration(db, 3, 'seed')]
+
+    assert migrate(SchemaConnection(db), target=2) == [1, 2]
+    assert 3 not in db.versions
+
+
+def test_lock_timeout_applies_nothing(migrations):
+    db = SchemaDatabase(lock_granted=False)
+    migrations += [fake_migration(db, 1, 'initial')]
+
+    with pytest.raises(MigrationError, match='schema lock'):
+        migrate(SchemaConnection(db))
+    assert db.ran == []
+    assert db.versions is None
+    assert not any(s.startswith('SELECT RELEASE_LOCK') for s in db.statements)
+
+
+def test_failed_migration_stops_the_run_and_releases_the_lock(migrations):
+    db = SchemaDatabase()
+    migrations += [fake_migration(db, 1, 'initial'), fake_migration(db, 2, 'broken', fails=True),
+                   fake_migration(db, 3, 'seed')]
+
+    with pytest.raises(MigrationError, match='0002_broken'):
+        migrate(SchemaConnection(db))
+    assert db.ran == [1]
+    assert db.versions == {1: 'initial'}
+    assert db.rollbacks == 1
+    assert not db.lock_held
+
+
+def write_migrations(tmp_path, package, files):
+    directory = tmp_path / package
+    directory.mkdir()
+    (directory / '__init__.py').write_text('')
+    for filename, body in files.items():
+        (directory / filename).write_text(body)
+    return directory
+
+
+def use_package(monkeypatch, tmp_path, package, files):
+    directory = write_migrations(tmp_path, package, files)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setattr(schema_migrations, 'MIGRATIONS_PACKAGE', package)
+    monkeypatch.setattr(schema_migrations, 'MIGRATIONS_DIR', str(directory))
+
+
+UPGRADE = 'def upgrade(cursor):\n    pass\n'
+
+
+def test_discover_orders_by_version_and_ignores_other_files(monkeypatch, tmp_path):
+    use_package(monkeypatch, tmp_path, 'ordered_migrations', {
+        '0010_late.py': UPGRADE, '0002_second.py': UPGRADE, '0001_first.py': UPGRADE, 'notes.txt': '',
+        'helpers.py': '',
+    })
+    assert [(m.version, m.name) for m in schema_migrations.discover()] == [
+        (1, 'first'), (2, 'second'), (10, 'late')
+    ]
+    assert schema_migrations.latest_version() == 10
+
+
+def test_discover_rejects_duplicate_versions(monkeypatch, tmp_path):
+    use_package(monkeypatch, tmp_path, 'duplicate_migrations', {'0001_a.py': UPGRADE, '0001_b.py': UPGRADE})
+    with pytest.raises(MigrationError, match='Duplicate'):
+        schema_migrations.discover()
+
+
+def test_discover_requires_an_upgrade_function(monkeypatch, tmp_path):
+    use_package(monkeypatch, tmp_path, 'incomplete_migrations', {'0001_a.py': 'X = 1\n'})
+    with pytest.raises(MigrationError, match='upgrade'):
+        schema_migrations.discover()
+
+
+def test_bundled_migrations_are_numbered_without_gaps():
+    versions = [m.version for m in schema_migrations.discover()]
+    assert versions == list(range(1, len(versions) + 1))
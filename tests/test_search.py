@@ -0,0 +1,45 @@
+import pytest
+
+from query_args import (
+    SEARCH_DEFAULT_LIMIT, SEARCH_MAX_LIMIT, QueryArgError, fulltext_terms, like_prefix, parse_search_args,
+    search_queries
+)
+
+
+def test_fulltext_terms_keep_only_indexable_words_as_required_prefixes():
+    assert fulltext_terms('CNC ma-chine 3d') == '+cnc* +chine*'
+    assert fulltext_terms('ab x') is None
+
+
+def test_like_prefix_escapes_wildcards():
+    assert like_prefix('50%_a\\b') == '50\\%\\_a\\\\b%'
+
+
+def test_short_query_falls_back_to_name_and_serial_prefixes():
+    queries = search_queries('CN', ['equipment', 'requests'], 5)
+    sql, params = queries['equipment']
+    assert 'MATCH' not in sql
+    assert 'UNION' in sql
+    assert 'WHERE name LIKE %s' in sql and 'WHERE serial_number LIKE %s' in sql
+    assert params == ('CN%', 5, 'CN%', 5, 5)
+    # Request subjects have no prefix index to fall back on
+    assert queries['requests'] is None
+
+
+def test_long_query_uses_the_fulltext_indexes():
+    queries = search_queries('lathe', ['equipment', 'requests'], 10)
+    sql, params = queries['equipment']
+    assert 'AGAINST (%s IN BOOLEAN MODE)' in sql
+    assert params == ('+lathe*', 'lathe%', 'lathe%', '+lathe*', 10)
+    assert queries['requests'][1] == ('+lathe*', '+lathe*', 10)
+
+
+def test_search_queries_only_builds_requested_types():
+    assert list(search_queries('lathe', ['requests'], 10)) == ['requests']
+
+
+def test_parse_search_args_defaults_and_bounds():
+    assert parse_search_args({'q': '  pump '}) == ('pump', ['equipment', 'requests'], SEARCH_DEFAULT_LIMIT)
+    for args in ({'q': ' '}, {'q': 'pump', 'types': 'tickets'}, {'q': 'pump', 'limit': str(SEARCH_MAX_LIMIT + 1)}):
+        with pytest.raises(QueryArgError):
+            parse_search_args(args)
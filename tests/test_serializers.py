@@ -0,0 +1,81 @@
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from flask import Flask
+from mysql.connector.constants import FieldType
+
+from serializers import FastJSONProvider, compile_serializer, row_serializer
+
+
+def connector_column(name, type_code):
+    """mysql-connector description entry: no column length"""
+    return (name, type_code, None, None, None, None, True, 0, 63)
+
+
+def pymysql_column(name, type_code, length):
+    """PyMySQL/aiomysql description entry: internal_size is the column length"""
+    return (name, type_code, None, length, length, 0, True)
+
+
+class Cursor:
+    def __init__(self, description):
+        self.description = description
+
+
+def test_booleans_come_from_the_query_mapping_without_a_length():
+    serialize = compile_serializer(
+        [connector_column('id', FieldType.LONG), connector_column('is_scrapped', FieldType.TINY),
+         connector_column('active', FieldType.TINY)],
+        booleans={'is_scrapped'}
+    )
+    # active is not in this query's mapping, so it stays an int
+    assert serialize((1, 1, 1)) == {'id': 1, 'is_scrapped': True, 'active': 1}
+    assert serialize((2, 0, None)) == {'id': 2, 'is_scrapped': False, 'active': None}
+
+
+def test_booleans_come_from_the_column_length_when_reported():
+    serialize = compile_serializer([pymysql_column('is_scrapped', FieldType.TINY, 1),
+                                    pymysql_column('priority', FieldType.TINY, 4)])
+    assert serialize((1, 3)) == {'is_scrapped': True, 'priority': 3}
+
+
+def test_mapping_never_coerces_non_tinyint_columns():
+    serialize = compile_serializer([connector_column('active', FieldType.LONGLONG)], booleans={'active'})
+    assert serialize((7,)) == {'active': 7}
+
+
+def test_dates_decimals_and_times():
+    serialize = compile_serializer([
+        connector_column('scheduled_date', FieldType.DATE),
+        connector_column('created_at', FieldType.DATETIME),
+        connector_column('duration_hours', FieldType.NEWDECIMAL),
+        connector_column('slot', FieldType.TIME),
+        connector_column('name', FieldType.VAR_STRING),
+    ])
+    row = (date(2024, 5, 1), datetime(2024, 5, 1, 8, 30), Decimal('2.50'), timedelta(hours=9, minutes=15), 'x')
+    assert serialize(row) == {
+        'scheduled_date': '2024-05-01',
+        'created_at': '2024-05-01T08:30:00',
+        'duration_hours': 2.5,
+        'slot': '9:15:00',
+        'name': 'x',
+    }
+    assert serialize((None, None, None, None, None))['scheduled_date'] is None
+
+
+def test_row_serializer_caches_per_shape_and_mapping():
+    cursor = Cursor([connector_column('is_scrapped', FieldType.TINY)])
+    plain = row_serializer(cursor)
+    assert row_serializer(cursor) is plain
+    mapped = row_serializer(cursor, {'is_scrapped'})
+    assert mapped is not plain
+    assert plain((1,)) == {'is_scrapped': 1}
+    assert mapped((1,)) == {'is_scrapped': True}
+
+
+def test_json_provider_encodes_database_types():
+    dumps = FastJSONProvider(Flask(__name__)).dumps
+    encoded = dumps({'d': date(2024, 1, 2), 'n': Decimal('1.5'), 't': timedelta(minutes=5)})
+    assert '"2024-01-02"' in encoded
+    assert '1.5' in encoded
+    assert '"0:05:00"' in encoded
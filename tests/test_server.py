@@ -0,0 +1,226 @@
+import asyncio
+import os
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from pymongo.errors import DuplicateKeyError
+
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'gearguard_test')
+
+import server  # noqa: E402
+from query_args import QueryArgError  # noqa: E402
+from server import StatusBuffer, status_query  # noqa: E402
+
+
+def test_status_query_without_filters_matches_everything():
+    assert status_query(None, None, None, None) == {}
+
+
+def test_status_query_single_condition_is_not_wrapped():
+    assert status_query('probe-1', None, None, None) == {'client_name': 'probe-1'}
+
+
+def test_status_query_ranges_are_utc():
+    since = datetime(2024, 5, 1, 8, 0)
+    until = datetime(2024, 5, 2, 8, 0, tzinfo=timezone.utc)
+    query = status_query('probe-1', since, until, None)
+    assert query == {'$and': [
+        {'client_name': 'probe-1'},
+        {'timestamp': {'$gte': since.replace(tzinfo=timezone.utc), '$lt': until}},
+    ]}
+
+
+def test_status_query_cursor_continues_after_the_last_row():
+    query = status_query(None, None, None, ['2024-05-01T08:00:00', 'abc'])
+    last = datetime(2024, 5, 1, 8, 0, tzinfo=timezone.utc)
+    assert query == {'$or': [
+        {'timestamp': {'$lt': last}},
+        {'timestamp': last, 'id': {'$lt': 'abc'}},
+    ]}
+
+
+@pytest.mark.parametrize('cursor_key', [['yesterday', 'abc'], [None, 'abc']])
+def test_status_query_rejects_a_bad_cursor(cursor_key):
+    with pytest.raises(QueryArgError):
+        status_query(None, None, None, cursor_key)
+
+
+class FakeCollection:
+    def __init__(self, fail=False, delay=0):
+        self.batches = []
+        self.fail = fail
+        self.delay = delay
+
+    async def insert_many(self, docs, ordered=True):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError('not primary')
+        self.batches.append(list(docs))
+
+
+def test_buffer_writes_one_batch_when_full():
+    async def scenario():
+        collection = FakeCollection()
+        buffer = StatusBuffer(collection, max_size=3, interval=60)
+        for n in range(4):
+            await buffer.add({'n': n})
+        return collection.batches
+
+    assert asyncio.run(scenario()) == [[{'n': 0}, {'n': 1}, {'n': 2}]]
+
+
+def test_buffer_flushes_on_the_interval_and_on_stop():
+    async def scenario():
+        collection = FakeCollection()
+        buffer = StatusBuffer(collection, max_size=100, interval=0.01)
+        buffer.start()
+        await buffer.add({'n': 1})
+        await asyncio.sleep(0.05)
+        await buffer.add({'n': 2})
+        await buffer.stop()
+        return collection.batches
+
+    assert asyncio.run(scenario()) == [[{'n': 1}], [{'n': 2}]]
+
+
+def test_buffer_skips_empty_flushes():
+    async def scenario():
+        collection = FakeCollection()
+        await StatusBuffer(collection, max_size=10, interval=60).flush()
+        return collection.batches
+
+    assert asyncio.run(scenario()) == []
+
+
+def test_failed_insert_is_logged_not_raised(caplog):
+    async def scenario():
+        buffer = StatusBuffer(FakeCollection(fail=True), max_size=10, interval=60)
+        await buffer.add({'n': 1})
+        await buffer.flush()
+        await buffer.flush()
+
+    asyncio.run(scenario())
+    assert 'Failed to write 1 buffered status checks' in caplog.text
+
+
+def test_stop_waits_for_an_in_flight_flush():
+    async def scenario():
+        collection = FakeCollection(delay=0.05)
+        buffer = StatusBuffer(collection, max_size=100, interval=0.01)
+        buffer.start()
+        await buffer.add({'n': 1})
+        await asyncio.sleep(0.02)  # the loop's insert_many is now in flight
+        await buffer.add({'n': 2})
+        await buffer.stop()
+        return collection.batches
+
+    assert asyncio.run(scenario()) == [[{'n': 1}], [{'n': 2}]]
+
+
+class FakeMigrations:
+    """schema_migrations collection with a unique _id"""
+
+    def __init__(self, docs=()):
+        self.docs = {doc['_id']: dict(doc) for doc in docs}
+
+    async def insert_one(self, doc):
+        if doc['_id'] in self.docs:
+            raise DuplicateKeyError('E11000 duplicate key error')
+        self.docs[doc['_id']] = dict(doc)
+
+    def find(self, query):
+        doc = self.docs.get(query['_id'])
+        for field, value in query.items():
+            if doc is None:
+                break
+            if isinstance(value, dict):
+                if not doc.get(field) or not doc[field] < value['$lt']:
+                    doc = None
+            elif doc.get(field) != value:
+                doc = None
+        return doc
+
+    async def update_one(self, query, update):
+        doc = self.find(query)
+        if doc is not None:
+            doc.update(update['$set'])
+        return SimpleNamespace(matched_count=int(doc is not None))
+
+    async def delete_one(self, query):
+        if self.find(query) is not None:
+            del self.docs[query['_id']]
+
+
+@pytest.fixture
+def migrations(monkeypatch):
+    ran = []
+    collection = FakeMigrations()
+
+    def step(name, fail=False):
+        async def migration():
+            ran.append(name)
+            if fail:
+                raise RuntimeError('index build failed')
+        return name, migration
+
+    monkeypatch.setattr(server, 'db', SimpleNamespace(schema_migrations=collection))
+    monkeypatch.setattr(server, 'STATUS_MIGRATIONS', [step('first'), step('second')])
+    return SimpleNamespace(ran=ran, collection=collection, step=step)
+
+
+def test_status_migrations_run_once(migrations):
+    asyncio.run(server.migrate_status_checks())
+    asyncio.run(server.migrate_status_checks())
+    assert migrations.ran == ['first', 'second']
+    assert {name: doc['state'] for name, doc in migrations.collection.docs.items()} == {
+        'first': 'applied', 'second': 'applied'
+    }
+
+
+def test_step_claimed_by_another_worker_is_skipped(migrations):
+    migrations.collection.docs['first'] = {
+        '_id': 'first', 'state': 'running', 'claim': 'other', 'started_at': datetime.now(timezone.utc)
+    }
+    asyncio.run(server.migrate_status_checks())
+    assert migrations.ran == ['second']
+    assert migrations.collection.docs['first']['claim'] == 'other'
+
+
+def test_stale_claim_is_taken_over(migrations):
+    migrations.collection.docs['first'] = {
+        '_id': 'first', 'state': 'running', 'claim': 'dead',
+        'started_at': datetime.now(timezone.utc) - timedelta(seconds=server.STATUS_MIGRATION_LEASE + 1)
+    }
+    asyncio.run(server.migrate_status_checks())
+    assert migrations.ran == ['first', 'second']
+    assert migrations.collection.docs['first']['state'] == 'applied'
+    assert migrations.collection.docs['first']['claim'] != 'dead'
+
+
+def test_applied_step_is_never_taken_over(migrations):
+    migrations.collection.docs['first'] = {
+        '_id': 'first', 'state': 'applied', 'claim': 'done', 'started_at': datetime(2020, 1, 1, tzinfo=timezone.utc)
+    }
+    asyncio.run(server.migrate_status_checks())
+    assert migrations.ran == ['second']
+
+
+def test_lost_claim_is_not_marked_applied(migrations, monkeypatch):
+    async def slow_first():
+        migrations.ran.append('first')
+        migrations.collection.docs['first']['claim'] = 'newer'
+
+    monkeypatch.setattr(server, 'STATUS_MIGRATIONS', [('first', slow_first)])
+    asyncio.run(server.migrate_status_checks())
+    assert migrations.collection.docs['first']['state'] == 'running'
+
+
+def test_failed_step_drops_its_claim_and_stops(migrations, monkeypatch):
+    monkeypatch.setattr(server, 'STATUS_MIGRATIONS', [migrations.step('first', fail=True), migrations.step('second')])
+    with pytest.raises(RuntimeError):
+        asyncio.run(server.migrate_status_checks())
+    assert migrations.ran == ['first']
+    assert migrations.collection.docs == {}
@@ -0,0 +1,108 @@
+import json
+from datetime import datetime
+
+import pytest
+from mysql.connector.constants import FieldType
+
+import flask_server
+
+
+class StreamCursor:
+    description = [
+        ('id', FieldType.LONG, None, None, None, None, False, 0, 63),
+        ('name', FieldType.VAR_STRING, None, None, None, None, True, 0, 255),
+        ('created_at', FieldType.DATETIME, None, None, None, None, True, 0, 63),
+    ]
+
+    def __init__(self, rows):
+        self.rows = list(rows)
+        self.executed = None
+        self.closed = False
+
+    def execute(self, sql, params=()):
+        self.executed = (sql, params)
+
+    def fetchmany(self, size):
+        batch, self.rows = self.rows[:size], self.rows[size:]
+        return batch
+
+    def close(self):
+        self.closed = True
+
+
+class StreamConnection:
+    def __init__(self, rows):
+        self.cursor_ = StreamCursor(rows)
+        self.closed = 0
+
+    def cursor(self):
+        return self.cursor_
+
+    def close(self):
+        self.closed += 1
+
+
+@pytest.fixture
+def database(monkeypatch):
+    connections = []
+
+    def connect(rows=()):
+        connection = StreamConnection(rows)
+        connections.append(connection)
+        return connection
+
+    monkeypatch.setattr(flask_server, 'STREAM_BATCH_SIZE', 2)
+    return connections, connect
+
+
+def stream(database, monkeypatch, mode, rows):
+    connections, connect = database
+    monkeypatch.setattr(flask_server, 'get_db_connection', lambda: connect(rows))
+    with flask_server.app.test_request_context():
+        response = flask_server.stream_rows('SELECT id, name, created_at FROM t WHERE a = %s', (1,), mode)
+        body = response.get_data(as_text=True)
+        response.close()
+    return response, body, connections[-1]
+
+
+def row(number):
+    return (number, f'Pump {number}', datetime(2024, 1, number, 8, 0))
+
+
+def test_json_stream_is_one_array_across_batches(database, monkeypatch):
+    response, body, connection = stream(database, monkeypatch, 'json', [row(1), row(2), row(3)])
+    assert response.mimetype == 'application/json'
+    assert response.headers['X-Accel-Buffering'] == 'no'
+    assert json.loads(body) == [
+        {'id': 1, 'name': 'Pump 1', 'created_at': '2024-01-01T08:00:00'},
+        {'id': 2, 'name': 'Pump 2', 'created_at': '2024-01-02T08:00:00'},
+        {'id': 3, 'name': 'Pump 3', 'created_at': '2024-01-03T08:00:00'},
+    ]
+    assert connection.cursor_.executed[1] == (1,)
+    assert connection.cursor_.closed
+    assert connection.closed >= 1
+
+
+def test_json_stream_of_an_empty_result_is_an_empty_array(database, monkeypatch):
+    _, body, connection = stream(database, monkeypatch, 'json', [])
+    assert body == '[]'
+    assert connection.cursor_.closed
+
+
+def test_json_stream_of_a_single_row(database, monkeypatch):
+    _, body, _ = stream(database, monkeypatch, 'json', [row(4)])
+    assert body.startswith('[{') and body.endswith('}]')
+    assert json.loads(body) == [{'id': 4, 'name': 'Pump 4', 'created_at': '2024-01-04T08:00:00'}]
+
+
+def test_ndjson_stream_is_one_object_per_line(database, monkeypatch):
+    response, body, _ = stream(database, monkeypatch, 'ndjson', [row(1), row(2), row(3)])
+    assert response.mimetype == 'application/x-ndjson'
+    lines = body.split('\n')
+    assert lines[-1] == ''
+    assert [json.loads(line)['id'] for line in lines[:-1]] == [1, 2, 3]
+
+
+def test_ndjson_stream_of_an_empty_result_is_empty(database, monkeypatch):
+    _, body, _ = stream(database, monkeypatch, 'ndjson', [])
+    assert body == ''
@@ -0,0 +1,124 @@
+from collections import Counter
+
+from workload import TechnicianWorkload
+
+DAY = '2024-06-10'
+
+
+def make_workload(teams, assignments, daily_hours=8.0):
+    """teams: [(technician, team)]; assignments: [(request, technician, scheduled_date, hours)]"""
+    loads = []
+
+    def loader(connection=None):
+        loads.append(connection)
+        return list(teams), list(assignments)
+    workload = TechnicianWorkload(loader, reconcile_interval=0, daily_hours=daily_hours)
+    return workload, loads
+
+
+def test_pick_prefers_the_least_loaded_team_member():
+    workload, _ = make_workload([(1, 10), (2, 10), (3, 20)],
+                                [(100, 1, None, None), (101, 1, None, None), (102, 2, None, None)])
+    assert workload.pick(10) == 2
+    assert workload.pick(20) == 3
+    assert workload.pick(99) is None
+
+
+def test_pick_passes_over_technicians_booked_full_that_day():
+    # Technician 1 has the fewest open requests but 7 of 8 hours booked on DAY
+    workload, _ = make_workload([(1, 10), (2, 10)], [
+        (100, 1, DAY, 7), (101, 2, None, None), (102, 2, None, None),
+    ])
+    assert workload.pick(10, DAY, 2) == 2
+    # A shorter job still fits, and on another day technician 1 is free
+    assert workload.pick(10, DAY, 1) == 1
+    assert workload.pick(10, '2024-06-11', 2) == 1
+
+
+def test_pick_falls_back_to_the_least_loaded_when_everyone_is_full():
+    workload, _ = make_workload([(1, 10), (2, 10)], [
+        (100, 1, DAY, 7), (101, 2, DAY, 4), (102, 2, DAY, 3.5),
+    ])
+    assert workload.pick(10, DAY, 2) == 1
+    # The passed-over entries are back on the heap for the next pick
+    assert workload.pick(10) == 1
+
+
+def test_pick_follows_saved_and_closed_requests():
+    workload, _ = make_workload([(1, 10), (2, 10)], [(100, 1, None, None)])
+    assert workload.pick(10) == 2
+    workload.request_saved(101, 2, 'New', None, None)
+    workload.request_saved(102, 2, 'In Progress', DAY, 3)
+    assert workload.pick(10) == 1
+    workload.request_status_changed(101, 'Repaired')
+    workload.request_status_changed(102, 'Scrap')
+    assert workload.pick(10) == 2
+    # Reassigning moves the request, it is not counted twice
+    workload.request_saved(100, 2, 'New', None, None)
+    assert [row['open_requests'] for row in workload.team_workload(10)] == [0, 1]
+
+
+def test_technician_added_joins_the_team_heap():
+    workload, _ = make_workload([(1, 10)], [(100, 1, None, None)])
+    workload.pick(10)
+    workload.technician_added(5, 10)
+    assert workload.pick(10) == 5
+
+
+def test_reads_load_on_the_callers_connection_once():
+    workload, loads = make_workload([(1, 10)], [])
+    connection = object()
+    workload.pick(10, connection=connection)
+    workload.team_workload(10)
+    assert loads == [connection]
+    workload.invalidate()
+    workload.team_workload(10)
+    assert loads == [connection, None]
+
+
+def test_team_workload_reports_hours_per_day():
+    workload, _ = make_workload([(1, 10), (2, 10)], [(100, 1, DAY, None), (101, 1, DAY, 1.5)])
+    assert workload.team_workload(10) == [
+        {'technician_id': 2, 'open_requests': 0, 'scheduled_hours': {}},
+        {'technician_id': 1, 'open_requests': 2, 'scheduled_hours': {DAY: 3.5}},
+    ]
+
+
+def apply(moves, counts):
+    for request_id, source, target in moves:
+        if source is not None:
+            counts[source] -= 1
+        counts[target] += 1
+    return counts
+
+
+def test_rebalance_evens_out_the_team():
+    assignments = [(100 + i, 1, None, None) for i in range(6)] + [(200, 2, None, None)]
+    workload, _ = make_workload([(1, 10), (2, 10), (3, 10), (9, 20)], assignments + [(300, 9, None, None)])
+    backlog = [(100 + i, 1) for i in range(6)] + [(200, 2), (400, None), (401, None), (300, 9)]
+    moves = workload.rebalance(10, backlog)
+
+    moved = [request_id for request_id, _, _ in moves]
+    assert len(moved) == len(set(moved))
+    # Unassigned requests are placed, and one assigned outside the team is left alone
+    assert {400, 401} <= set(moved)
+    assert 300 not in moved
+    assert all(target in (1, 2, 3) for _, _, target in moves)
+    counts = apply(moves, Counter({1: 6, 2: 1, 3: 0}))
+    assert max(counts.values()) - min(counts.values()) <= 1
+    assert sum(counts.values()) == 9
+    # Nothing is applied by planning
+    assert workload.team_workload(10)[-1] == {'technician_id': 1, 'open_requests': 6, 'scheduled_hours': {}}
+
+
+def test_rebalance_only_moves_movable_requests():
+    # Technician 1's open requests are In Progress, so none of them are in the backlog
+    workload, _ = make_workload([(1, 10), (2, 10)], [(100 + i, 1, None, None) for i in range(4)])
+    assert workload.rebalance(10, []) == []
+    assert workload.rebalance(10, [(100, 1)]) == [(100, 1, 2)]
+
+
+def test_rebalance_leaves_a_balanced_team_alone():
+    workload, _ = make_workload([(1, 10), (2, 10)], [(100, 1, None, None), (101, 2, None, None),
+                                                      (102, 2, None, None)])
+    assert workload.rebalance(10, [(101, 2), (102, 2), (100, 1)]) == []